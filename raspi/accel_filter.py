@@ -0,0 +1,111 @@
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+AXES = ("ax_g", "ay_g", "az_g")
+# drain_stats() 가 반환하는 키 (업링크 스키마용)
+STATS_FIELDS = AXES + tuple(f"{a[:2]}_{k}" for a in AXES for k in ("peak", "rms")) + ("g_mean", "g_peak", "samples")
+
+
+def design_lowpass(rate_hz: float, cutoff_hz: float, taps: int) -> "np.ndarray":
+    """Hamming 창을 씌운 sinc FIR 저역통과 계수 (DC 이득 1)."""
+    taps = max(3, taps | 1)
+    fc = min(cutoff_hz / rate_hz, 0.5)
+    n = np.arange(taps) - (taps - 1) / 2
+    h = 2 * fc * np.sinc(2 * fc * n) * np.hamming(taps)
+    return h / h.sum()
+
+
+class AccelFilter:
+    """
+    가속도 샘플 블록을 모아 두었다가 업링크 주기마다 한꺼번에 처리하는 신호 처리 단계.
+    FIR 저역통과 -> decimation -> 윈도우 통계(평균/피크/RMS/합성 g) 순서로 모두 NumPy 배열
+    연산으로 수행합니다. 블록 사이의 필터 상태(직전 taps-1개 샘플)와 decimation 위상을 이어가므로
+    블록 경계에서도 결과가 연속입니다. 원본 전체 속도 데이터는 세션 로그에 따로 기록됩니다.
+    """
+
+    def __init__(self, rate_hz: float, cutoff_hz: float = 10.0, decimation: int = 4, taps: int = 31):
+        if np is None:
+            raise RuntimeError("numpy 가 설치되어 있지 않습니다. pip3 install numpy")
+        self.rate_hz = rate_hz
+        self.decimation = max(1, int(decimation))
+        self.coeffs = design_lowpass(rate_hz, cutoff_hz, taps)
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[Sequence[float], ...]] = []
+        self._history: Optional["np.ndarray"] = None  # (taps-1, 3) 직전 블록의 꼬리
+        self._phase = 0
+        self.samples_in = 0
+        self.samples_out = 0
+
+    def push(self, ts: Sequence[float], xs: Sequence[float], ys: Sequence[float], zs: Sequence[float]):
+        """샘플 블록을 대기열에 넣습니다 (수신 스레드에서 호출, 계산 없음)."""
+        with self._lock:
+            self._pending.append((ts, xs, ys, zs))
+
+    def push_sample(self, ts: float, parsed: Dict[str, float]):
+        self.push((ts,), (parsed["ax_g"],), (parsed["ay_g"],), (parsed["az_g"],))
+
+    def process(self) -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        대기 중인 블록을 모두 필터링/decimation 해서 (t[n], xyz[n, 3])로 반환합니다.
+        대기열이 비어 있으면 길이 0 배열을 반환합니다.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return np.empty(0), np.empty((0, 3))
+
+        t = np.concatenate([np.asarray(b[0], dtype=np.float64) for b in pending])
+        raw = np.column_stack([
+            np.concatenate([np.asarray(b[axis], dtype=np.float64) for b in pending])
+            for axis in (1, 2, 3)
+        ])
+        self.samples_in += len(t)
+
+        ntaps = len(self.coeffs)
+        if self._history is None:
+            # 첫 블록은 첫 샘플로 채워 시작 과도 응답을 줄인다
+            self._history = np.repeat(raw[:1], ntaps - 1, axis=0)
+        ext = np.concatenate([self._history, raw])
+        self._history = ext[-(ntaps - 1):]
+
+        # 출력 i = sum_k h[k] * ext[i + ntaps-1 - k] (축별 'valid' 컨볼루션)
+        filtered = np.column_stack([np.convolve(ext[:, i], self.coeffs, mode='valid') for i in range(3)])
+
+        start = (-self._phase) % self.decimation
+        self._phase = (self._phase + len(t)) % self.decimation
+        out_t = t[start::self.decimation]
+        out = filtered[start::self.decimation]
+        self.samples_out += len(out_t)
+        return out_t, out
+
+    @staticmethod
+    def window_stats(xyz: "np.ndarray") -> Dict[str, float]:
+        """필터링된 윈도우의 축별 평균/피크(|max|)/RMS와 합성 g 평균/피크."""
+        if not len(xyz):
+            return {}
+        mean = xyz.mean(axis=0)
+        peak_idx = np.abs(xyz).argmax(axis=0)
+        peak = xyz[peak_idx, np.arange(3)]
+        rms = np.sqrt(np.mean(xyz * xyz, axis=0))
+        combined = np.sqrt(np.einsum('ij,ij->i', xyz, xyz))
+        out: Dict[str, float] = {}
+        for i, name in enumerate(AXES):
+            axis = name[:2]
+            out[name] = round(float(mean[i]), 4)
+            out[f"{axis}_peak"] = round(float(peak[i]), 4)
+            out[f"{axis}_rms"] = round(float(rms[i]), 4)
+        out["g_mean"] = round(float(combined.mean()), 4)
+        out["g_peak"] = round(float(combined.max()), 4)
+        out["samples"] = int(len(xyz))
+        return out
+
+    def drain_stats(self) -> Dict[str, float]:
+        """업링크 주기마다 호출: 지난 호출 이후 모인 샘플을 처리하고 윈도우 통계를 반환합니다."""
+        _, xyz = self.process()
+        return self.window_stats(xyz)
+
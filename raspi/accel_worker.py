@@ -1,25 +1,48 @@
-from typing import Callable, Dict, Any, Optional
-from time import sleep
+import asyncio
+import struct
+from typing import Callable, Dict, Any, List, Optional
+from time import sleep, monotonic
 try:
-    from smbus2 import SMBus
+    from smbus2 import SMBus, i2c_msg
 except ImportError:
     SMBus = None
+    i2c_msg = None
 
 # ADXL345 레지스터
 REG_DEVID       = 0x00
 REG_POWER_CTL   = 0x2D
+REG_INT_ENABLE  = 0x2E
+REG_INT_MAP     = 0x2F
 REG_DATA_FORMAT = 0x31
 REG_BW_RATE     = 0x2C
 REG_DATAX0      = 0x32
+REG_FIFO_CTL    = 0x38
+REG_FIFO_STATUS = 0x39
 
 ADXL345_ADDR = 0x53
 
+# BW_RATE 코드 -> 출력 데이터 속도(Hz)
+RATE_CODES = {0x0A: 100, 0x0B: 200, 0x0C: 400, 0x0D: 800, 0x0E: 1600, 0x0F: 3200}
+FIFO_MODE_STREAM = 0x80
+FIFO_DEPTH = 32
+INT_WATERMARK = 0x02
+# Linux I2C_RDWR 한 번에 보낼 수 있는 메시지는 최대 42개 -> (주소 쓰기 + 6바이트 읽기) 21샘플
+_RDWR_MAX_SAMPLES = 21
+
+LSB_G = 0.0156
+_SAMPLE = struct.Struct('<hhh')
+
 class AccelWorker:
     def __init__(
         self,
         i2c_bus: int = 1,
         address: int = ADXL345_ADDR,
-        on_update: Optional[Callable[[Dict[str, Any]], None]] = None
+        on_update: Optional[Callable[[Dict[str, Any]], None]] = None,
+        fifo: bool = False,
+        rate_code: int = 0x0D,
+        watermark: int = 16,
+        gpio=None,
+        on_block: Optional[Callable[[List[float], List[float], List[float], List[float]], None]] = None,
     ):
         self.i2c_bus_num = i2c_bus
         self.addr = address
@@ -27,6 +50,23 @@ class AccelWorker:
         self.bus: Optional[SMBus] = None
         self.enabled = SMBus is not None
 
+        # FIFO 스트림 모드 설정 (gpio가 주어지면 INT1 워터마크 인터럽트로 깨어남)
+        self.fifo = fifo
+        self.rate_code = rate_code
+        self.rate_hz = RATE_CODES.get(rate_code, 100)
+        self.watermark = max(1, min(watermark, FIFO_DEPTH - 1))
+        self.gpio = gpio
+        self.on_block = on_block
+        self.samples_read = 0
+        self._burst_msgs = None
+
+    @property
+    def poll_interval(self) -> float:
+        """FIFO 모드에서 워터마크가 절반쯤 찼을 때 다시 확인하도록 하는 폴링 간격."""
+        if self.fifo:
+            return self.watermark / self.rate_hz / 2
+        return 0.001
+
     def start(self):
         if not self.enabled:
             raise RuntimeError("smbus2 가 설치되어 있지 않습니다. pip3 install smbus2")
@@ -36,16 +76,39 @@ class AccelWorker:
         except Exception as e:
             raise RuntimeError(f"ADXL345 접근 실패: {e}")
 
-        # 설정 (기존과 동일)
-        self.bus.write_byte_data(self.addr, REG_BW_RATE, 0x0A)
+        if not self.fifo:
+            # 설정 (기존과 동일)
+            self.bus.write_byte_data(self.addr, REG_BW_RATE, 0x0A)
+            self.bus.write_byte_data(self.addr, REG_DATA_FORMAT, 0x08)
+            self.bus.write_byte_data(self.addr, REG_POWER_CTL, 0x08)
+            sleep(0.02)
+            return
+
+        # FIFO 스트림 모드: 측정 정지 상태에서 설정 후 측정 시작
+        self.bus.write_byte_data(self.addr, REG_POWER_CTL, 0x00)
+        self.bus.write_byte_data(self.addr, REG_BW_RATE, self.rate_code)
         self.bus.write_byte_data(self.addr, REG_DATA_FORMAT, 0x08)
+        self.bus.write_byte_data(self.addr, REG_FIFO_CTL, FIFO_MODE_STREAM | self.watermark)
+        self.bus.write_byte_data(self.addr, REG_INT_MAP, 0x00)  # 모든 인터럽트 -> INT1
+        self.bus.write_byte_data(self.addr, REG_INT_ENABLE, INT_WATERMARK if self.gpio else 0x00)
         self.bus.write_byte_data(self.addr, REG_POWER_CTL, 0x08)
+        self._burst_msgs = [
+            (i2c_msg.write(self.addr, [REG_DATAX0]), i2c_msg.read(self.addr, 6))
+            for _ in range(_RDWR_MAX_SAMPLES)
+        ]
+        print(f"ADXL345 FIFO 스트림 모드: {self.rate_hz}Hz, 워터마크 {self.watermark}샘플"
+              f"{' (INT1 인터럽트)' if self.gpio else ''}")
         sleep(0.02)
 
     def read_once(self):
         """한 번 읽어 g 단위로 변환하고 콜백을 호출합니다."""
         if not self.bus:
             return
+        if self.fifo:
+            if self.gpio:
+                self.gpio.wait_accel_interrupt(int(self.poll_interval * 4000))
+            self.read_fifo()
+            return
         try:
             data = self.bus.read_i2c_block_data(self.addr, REG_DATAX0, 6)
 
@@ -53,7 +116,7 @@ class AccelWorker:
             x = self._to_int16(data[3] << 8 | data[2])
             z = -(self._to_int16(data[5] << 8 | data[4]))
 
-            lsb_g = 0.0156
+            lsb_g = LSB_G
             ax_g = x * lsb_g
             ay_g = y * lsb_g
             az_g = z * lsb_g
@@ -68,6 +131,81 @@ class AccelWorker:
             # 센서 오류는 무시
             return
 
+    def read_fifo(self) -> int:
+        """
+        FIFO에 쌓인 샘플을 I2C_RDWR 묶음 전송으로 한 번에 읽고, 샘플 주기로 거슬러 올라가
+        각 샘플의 monotonic 타임스탬프를 붙여 on_block으로 전달합니다. 읽은 샘플 수를 반환합니다.
+        """
+        try:
+            count = self.bus.read_byte_data(self.addr, REG_FIFO_STATUS) & 0x3F
+            if not count:
+                return 0
+            raw: List[bytes] = []
+            remaining = count
+            while remaining:
+                n = min(remaining, _RDWR_MAX_SAMPLES)
+                msgs = self._burst_msgs[:n]
+                self.bus.i2c_rdwr(*[m for pair in msgs for m in pair])
+                raw.extend(bytes(rd) for _, rd in msgs)
+                remaining -= n
+        except Exception:
+            # 센서 오류는 무시
+            return 0
+
+        now = monotonic()
+        period = 1.0 / self.rate_hz
+        ts, xs, ys, zs = [], [], [], []
+        unpack = _SAMPLE.unpack
+        for k, data in enumerate(raw):
+            y, x, z = unpack(data)
+            ts.append(now - (count - 1 - k) * period)
+            xs.append(x * LSB_G)
+            ys.append(y * LSB_G)
+            zs.append(-z * LSB_G)
+        self.samples_read += count
+
+        if self.on_block:
+            self.on_block(ts, xs, ys, zs)
+        if self.on_update:
+            self.on_update({"ax_g": xs[-1], "ay_g": ys[-1], "az_g": zs[-1]})
+        return count
+
+    async def run_async(self, period: float = 0.01):
+        """
+        이벤트 루프 타이머로 period 간격(누적 지연 없음)마다 read_once를 호출합니다.
+        FIFO 모드에서 gpio가 있으면 INT1 인터럽트(또는 폴링 간격 경과) 때마다 FIFO를 비웁니다.
+        """
+        if not self.bus:
+            return
+        loop = asyncio.get_running_loop()
+        if self.fifo and self.gpio:
+            ready = asyncio.Event()
+            self.gpio.on_accel_interrupt(lambda: loop.call_soon_threadsafe(ready.set))
+            try:
+                while True:
+                    try:
+                        await asyncio.wait_for(ready.wait(), timeout=self.poll_interval * 4)
+                    except asyncio.TimeoutError:
+                        pass
+                    ready.clear()
+                    self.read_fifo()
+            finally:
+                self.gpio.on_accel_interrupt(None)
+        if self.fifo:
+            period = self.poll_interval
+        next_time = loop.time()
+        while True:
+            if self.fifo:
+                self.read_fifo()
+            else:
+                self.read_once()
+            next_time += period
+            delay = next_time - loop.time()
+            if delay <= 0:
+                next_time = loop.time()
+                delay = 0
+            await asyncio.sleep(delay)
+
     @staticmethod
     def _to_int16(v: int) -> int:
         return v - 65536 if v & 0x8000 else v
@@ -75,6 +213,9 @@ class AccelWorker:
     def shutdown(self):
         if self.bus:
             try:
+                if self.fifo:
+                    self.bus.write_byte_data(self.addr, REG_INT_ENABLE, 0x00)
+                    self.bus.write_byte_data(self.addr, REG_FIFO_CTL, 0x00)
                 self.bus.close()
             except Exception:
                 pass
@@ -0,0 +1,60 @@
+# bench_can_decoder.py (기존 _PARSERS 딕셔너리와 컴파일된 시그널 테이블 디코더의 frames/s 비교)
+# 실행: python3 -m raspi.bench_can_decoder [프레임 수]
+
+import os
+import sys
+import time
+
+from .can_worker import _PARSERS
+from .can_decoder import build_decoder
+
+
+def make_frames(count: int):
+    """실제 버스와 비슷하게 모든 ID가 섞인 (id, data) 프레임 목록을 만듭니다."""
+    ids = sorted(_PARSERS)
+    frames = []
+    for i in range(count):
+        arb_id = ids[i % len(ids)]
+        dlc = 2 if arb_id == 0x500 else 8
+        frames.append((arb_id, os.urandom(dlc)))
+    return frames
+
+
+def bench_parsers(frames) -> float:
+    parsers = _PARSERS
+    t0 = time.perf_counter()
+    for arb_id, data in frames:
+        parser = parsers.get(arb_id)
+        if parser:
+            parser(data)
+    return len(frames) / (time.perf_counter() - t0)
+
+
+def bench_decoder(frames) -> float:
+    decode = build_decoder().decode
+    t0 = time.perf_counter()
+    for arb_id, data in frames:
+        decode(arb_id, data)
+    return len(frames) / (time.perf_counter() - t0)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    frames = make_frames(count)
+
+    # 두 방식의 결과가 같은지 먼저 확인
+    decoder = build_decoder()
+    for arb_id, data in frames[:1000]:
+        if decoder.decode(arb_id, data) != _PARSERS[arb_id](data):
+            print(f"[BENCH] 결과 불일치: ID 0x{arb_id:X} data={data.hex()}")
+            sys.exit(1)
+
+    legacy = bench_parsers(frames)
+    compiled = bench_decoder(frames)
+    print(f"[BENCH] 프레임 수: {count}")
+    print(f"[BENCH] _PARSERS       : {legacy:>12,.0f} frames/s")
+    print(f"[BENCH] SignalDecoder  : {compiled:>12,.0f} frames/s ({compiled / legacy:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# bench_codec.py (업링크 JSON과 스키마 기반 바이너리 페이로드의 메시지 크기/인코딩·디코딩 CPU 비교)
+# 실행: python3 -m raspi.bench_codec [메시지 수]
+# zstandard 가 설치되어 있으면 JSON+zstd / 바이너리+zstd 도 함께 측정합니다.
+
+import sys
+import json
+import math
+import time
+import random
+from datetime import datetime
+
+from .can_decoder import build_decoder
+from .session_log import build_uplink_groups
+from .accel_filter import STATS_FIELDS
+from .signal_store import FUSION_FIELDS
+from .telemetry_codec import TelemetryCodec, TelemetrySchema, TelemetryDecoder, zstd
+
+_INT_RANGES = {'b': 127, 'B': 255, 'h': 32767, 'H': 65535, 'i': 2 ** 31 - 1, 'I': 2 ** 32 - 1}
+
+
+def make_messages(schema: TelemetrySchema, count: int):
+    """main.publish_telemetry 와 같은 모양의 업링크 dict (CAN 값은 신호 타입 범위의 난수)."""
+    can_columns = dict(schema.groups)["can"]
+    out = []
+    for i in range(count):
+        t = i * 0.2
+        can = {}
+        for name, code in can_columns:
+            if code in ('f', 'd'):
+                can[name] = round(random.uniform(-50, 500), 3)
+            else:
+                hi = min(_INT_RANGES.get(code, 255), 10_000)
+                can[name] = random.randint(0 if code.isupper() else -hi, hi)
+        ang = t / 60 * 2 * math.pi
+        gps = {
+            "Latitude": 37.2830 + 0.004 * math.sin(ang), "Longitude": 127.0450 + 0.005 * math.cos(ang),
+            "GPS_Speed_KPH": round(80 + 20 * math.sin(ang * 3), 2), "Satellites": 14, "Altitude_m": 52.3,
+            "Heading_deg": round(math.degrees(ang) % 360, 2), "gps_fix": True, "gps_fix_type": 1,
+            "gps_fix_mode": 3, "HDOP": 0.8, "GPS_Time": 1_700_000_000 + t,
+        }
+        accel = {name: round(random.uniform(-1.5, 1.5), 4) for name in STATS_FIELDS}
+        accel["samples"] = 20
+        fusion = {name: gps.get(name.replace("Fused_", ""), 0.5) for name in FUSION_FIELDS}
+        now = time.time()
+        out.append({
+            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
+            'can': can, 'gps': gps, 'accel': accel, 'fusion': fusion,
+            'trace': {'seq': i + 1, 'rx': {'can': now - 0.004, 'gps': now - 0.05, 'accel': now - 0.01}, 'pub': now},
+        })
+    return out
+
+
+def measure(name: str, encode, decode, messages):
+    t0 = time.perf_counter()
+    payloads = [encode(m) for m in messages]
+    t1 = time.perf_counter()
+    for p in payloads:
+        decode(p)
+    t2 = time.perf_counter()
+    n = len(messages)
+    size = sum(len(p) for p in payloads) / n
+    print(f"[BENCH] {name:<16}: {size:>7.0f} B/msg  encode {(t1 - t0) / n * 1e6:>7.1f} us  "
+          f"decode {(t2 - t1) / n * 1e6:>7.1f} us")
+    return size
+
+
+def check_roundtrip(codec: TelemetryCodec, decoder: TelemetryDecoder, messages) -> int:
+    """디코딩 결과가 원본과 같은지 확인 (float32 컬럼은 상대오차 1e-6 허용). 불일치 수를 반환합니다."""
+    bad = 0
+    for m in messages:
+        d = decoder.decode(codec.encode(m))
+        for group in ("can", "gps", "accel", "fusion"):
+            for k, v in m[group].items():
+                got = d[group].get(k)
+                if got is None or not math.isclose(got, v, rel_tol=1e-6, abs_tol=1e-9):
+                    bad += 1
+        if d["trace"] != m["trace"] or d["timestamp"] != m["timestamp"]:
+            bad += 1
+    return bad
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    random.seed(1)
+    schema = TelemetrySchema(build_uplink_groups(build_decoder().signals))
+    messages = make_messages(schema, count)
+    codec = TelemetryCodec(schema)
+    decoder = TelemetryDecoder()
+    decoder.add_schema(schema.json)
+
+    bad = check_roundtrip(codec, decoder, messages[:500])
+    if bad:
+        print(f"[BENCH] 결과 불일치: {bad}개")
+        sys.exit(1)
+
+    print(f"[BENCH] 메시지 수: {count}, 스키마 {schema.id:08x} ({sum(len(c) for _, c in schema.groups)}개 시그널, "
+          f"{len(schema.json)} B, retained 로 1회 발행)")
+    base = measure("JSON", lambda m: json.dumps(m).encode(), json.loads, messages)
+    size = measure("binary", codec.encode, decoder.decode, messages)
+    print(f"[BENCH] binary / JSON = {size / base:.2f}")
+    if zstd is None:
+        print("[BENCH] zstandard 미설치: zstd 측정 생략")
+        return
+    for level in (1, 3):
+        cctx, dctx = zstd.ZstdCompressor(level=level), zstd.ZstdDecompressor()
+        measure(f"JSON+zstd{level}", lambda m: cctx.compress(json.dumps(m).encode()),
+                lambda p: json.loads(dctx.decompress(p)), messages)
+        zcodec = TelemetryCodec(schema, zstd_level=level)
+        measure(f"binary+zstd{level}", zcodec.encode, decoder.decode, messages)
+
+
+if __name__ == "__main__":
+    main()
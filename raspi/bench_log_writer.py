@@ -0,0 +1,65 @@
+# bench_log_writer.py (CsvLogWriter의 최대 처리량과 50/100Hz 지속 기록 시 유실 여부 확인)
+# 실행: python3 -m raspi.bench_log_writer [출력 디렉터리]
+
+import os
+import sys
+import time
+import random
+import tempfile
+
+from .can_decoder import EMU_SIGNALS
+from .signal_store import SignalStore, GPS_FIELDS, ACCEL_FIELDS
+from .log_writer import CsvLogWriter
+
+
+def make_store() -> SignalStore:
+    store = SignalStore({
+        "can": [sig.name for sig in EMU_SIGNALS],
+        "gps": GPS_FIELDS,
+        "accel": ACCEL_FIELDS,
+    })
+    for group in store.groups:
+        start, end = store.groups[group]
+        store.writer(group).update({store.names[i]: random.random() * 100 for i in range(start, end)})
+    return store
+
+
+def bench_max(store: SignalStore, path: str, rows: int = 50_000):
+    """링 버퍼가 넘치지 않도록 용량을 크게 잡고 최대 인코딩/기록 속도를 측정합니다."""
+    logger = CsvLogWriter(path, store, capacity=rows, flush_interval=0.1)
+    snap = store.snapshot()
+    t0 = time.perf_counter()
+    for _ in range(rows):
+        logger.push(time.time(), snap)
+    logger.close()
+    elapsed = time.perf_counter() - t0
+    print(f"[BENCH] 최대 처리량: {logger.rows_written / elapsed:,.0f} rows/s ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+
+def bench_rate(store: SignalStore, path: str, rate_hz: int, seconds: float = 5.0):
+    """rate_hz로 실제 샘플러처럼 스냅샷을 넣어 지속 기록 시 유실이 없는지 확인합니다."""
+    logger = CsvLogWriter(path, store)
+    period = 1.0 / rate_hz
+    next_time = time.monotonic()
+    end = next_time + seconds
+    while next_time < end:
+        logger.push(time.time(), store.snapshot())
+        next_time += period
+        delay = next_time - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+    logger.close()
+    print(f"[BENCH] {rate_hz}Hz x {seconds:.0f}s: 기록 {logger.rows_written}행 "
+          f"(목표 {int(rate_hz * seconds)}행), 유실 {logger.rows_dropped}행")
+
+
+def main():
+    out_dir = sys.argv[1] if len(sys.argv) > 1 else tempfile.gettempdir()
+    store = make_store()
+    bench_max(store, os.path.join(out_dir, "bench_max.csv"))
+    for rate in (50, 100):
+        bench_rate(store, os.path.join(out_dir, f"bench_{rate}hz.csv"), rate)
+
+
+if __name__ == "__main__":
+    main()
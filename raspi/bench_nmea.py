@@ -0,0 +1,146 @@
+# bench_nmea.py (pynmea2 기반 기존 GPS 처리와 NmeaParser 고속 경로의 처리 속도/결과 비교)
+# 실행: python3 -m raspi.bench_nmea [녹화한 NMEA 파일 ...]
+# 녹화: stty -F /dev/serial0 9600 raw && cat /dev/serial0 > drive.nmea
+# 파일을 주지 않으면 u-blox 10Hz 출력과 같은 순서의 합성 스트림(RMC/VTG/GGA/GSA/GSV x3/GLL)을 사용합니다.
+
+import sys
+import math
+import time
+from functools import reduce
+from typing import Any, Dict, List
+
+import pynmea2
+
+from .gps_worker import GpsWorker
+
+
+def _sentence(body: str) -> bytes:
+    cs = reduce(lambda a, c: a ^ ord(c), body, 0)
+    return f"${body}*{cs:02X}\r\n".encode()
+
+
+def _dm(value: float, pos: str, neg: str, width: int) -> str:
+    hemi = pos if value >= 0 else neg
+    value = abs(value)
+    deg = int(value)
+    return f"{deg:0{width}d}{(value - deg) * 60:07.4f},{hemi}"
+
+
+def synthetic_stream(epochs: int = 20_000) -> bytes:
+    """서킷을 도는 차량의 10Hz NMEA 출력을 생성합니다."""
+    out = []
+    for i in range(epochs):
+        t = i / 10
+        hh, mm, ss = int(t // 3600) % 24, int(t // 60) % 60, t % 60
+        stamp = f"{hh:02d}{mm:02d}{ss:05.2f}"
+        ang = t / 60 * 2 * math.pi
+        lat = 37.2830 + 0.004 * math.sin(ang)
+        lon = 127.0450 + 0.005 * math.cos(ang)
+        knots = 40 + 20 * math.sin(ang * 3)
+        course = (math.degrees(ang) + 90) % 360
+        la, lo = _dm(lat, "N", "S", 2), _dm(lon, "E", "W", 3)
+        out.append(_sentence(f"GNRMC,{stamp},A,{la},{lo},{knots:.3f},{course:.2f},170326,,,A"))
+        out.append(_sentence(f"GNVTG,{course:.2f},T,,M,{knots:.3f},N,{knots * 1.852:.3f},K,A"))
+        out.append(_sentence(f"GNGGA,{stamp},{la},{lo},1,12,0.79,{45 + math.sin(ang):.1f},M,18.6,M,,"))
+        out.append(_sentence("GNGSA,A,3,02,05,12,13,15,18,20,25,29,,,,1.32,0.79,1.06"))
+        for k in range(3):
+            out.append(_sentence(f"GPGSV,3,{k + 1},11,02,45,120,41,05,60,210,44,12,30,300,38,13,15,045,35"))
+        out.append(_sentence(f"GNGLL,{la},{lo},{stamp},A,A"))
+    return b"".join(out)
+
+
+class Pynmea2Reference:
+    """기존 GpsWorker 처리 방식 (readline 단위 디코딩 + pynmea2.parse + dict 3개)."""
+
+    def __init__(self, on_update):
+        self.on_update = on_update
+        self.temp_gps_data: Dict[str, Any] = {}
+
+    def process_line(self, line: str):
+        try:
+            if not line:
+                return
+            msg = pynmea2.parse(line)
+            if isinstance(msg, pynmea2.types.talker.RMC):
+                self.temp_gps_data['lat'] = msg.latitude
+                self.temp_gps_data['lon'] = msg.longitude
+                self.temp_gps_data['GPS_Speed_KPH'] = msg.spd_over_grnd * 1.852 if msg.spd_over_grnd is not None else 0.0
+                self.temp_gps_data['heading'] = msg.true_course if msg.true_course is not None else None
+                self.temp_gps_data['gps_fix'] = msg.status == 'A'
+            elif isinstance(msg, pynmea2.types.talker.GGA):
+                self.temp_gps_data['altitude'] = msg.altitude
+                self.temp_gps_data['satellites'] = int(msg.num_sats or 0)
+                self.temp_gps_data['gps_fix_type'] = msg.gps_qual
+            if self.temp_gps_data.get('lat') is not None and self.temp_gps_data.get('GPS_Speed_KPH') is not None:
+                self.on_update({
+                    "Latitude": self.temp_gps_data.get('lat'),
+                    "Longitude": self.temp_gps_data.get('lon'),
+                    "GPS_Speed_KPH": self.temp_gps_data.get('GPS_Speed_KPH'),
+                    "Satellites": self.temp_gps_data.get('satellites'),
+                    "Altitude_m": self.temp_gps_data.get('altitude'),
+                    "Heading_deg": self.temp_gps_data.get('heading'),
+                    "gps_fix": self.temp_gps_data.get('gps_fix'),
+                    "gps_fix_type": self.temp_gps_data.get('gps_fix_type'),
+                })
+                self.temp_gps_data = {}
+        except (pynmea2.ParseError, UnicodeDecodeError, ValueError):
+            pass
+
+
+def run_reference(stream: bytes) -> List[Dict[str, Any]]:
+    out: List[Dict[str, Any]] = []
+    ref = Pynmea2Reference(out.append)
+    for raw in stream.split(b"\n"):
+        ref.process_line(raw.decode("utf-8", errors="ignore"))
+    return out
+
+
+def run_fast(stream: bytes, chunk: int = 256) -> List[Dict[str, Any]]:
+    """시리얼 in_waiting 묶음 읽기를 흉내 내어 chunk 바이트씩 _feed에 넣습니다."""
+    out: List[Dict[str, Any]] = []
+    worker = GpsWorker(port="", baudrate=0, on_update=out.append)
+    for i in range(0, len(stream), chunk):
+        worker._feed(stream[i:i + chunk])
+    return out
+
+
+def compare(ref: List[Dict[str, Any]], fast: List[Dict[str, Any]]) -> int:
+    """공통 키의 값이 다른 패킷 수를 셉니다 (부동소수점은 1e-9 허용)."""
+    mismatches = 0
+    for a, b in zip(ref, fast):
+        for key, va in a.items():
+            vb = b.get(key)
+            if isinstance(va, float) and isinstance(vb, float):
+                if abs(va - vb) > 1e-9:
+                    mismatches += 1
+                    break
+            elif va != vb:
+                mismatches += 1
+                break
+    return mismatches + abs(len(ref) - len(fast))
+
+
+def bench(name: str, stream: bytes):
+    lines = stream.count(b"\n")
+    t0 = time.perf_counter()
+    ref = run_reference(stream)
+    t_ref = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    fast = run_fast(stream)
+    t_fast = time.perf_counter() - t0
+    print(f"[BENCH] {name}: {lines}줄, 패킷 {len(ref)}/{len(fast)}, 불일치 {compare(ref, fast)}")
+    print(f"  pynmea2   : {lines / t_ref:>12,.0f} lines/s")
+    print(f"  NmeaParser: {lines / t_fast:>12,.0f} lines/s  ({t_ref / t_fast:.1f}x)")
+
+
+def main():
+    paths = sys.argv[1:]
+    if not paths:
+        bench("synthetic 10Hz", synthetic_stream())
+    for path in paths:
+        with open(path, 'rb') as f:
+            bench(path, f.read())
+
+
+if __name__ == "__main__":
+    main()
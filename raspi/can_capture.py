@@ -0,0 +1,142 @@
+# can_capture.py (CAN 원시 프레임 캡처 파일 기록 및 오프라인 일괄 디코딩)
+# 오프라인 디코딩: python3 -m raspi.can_capture <capture.can> [-o signals.npz]
+
+import os
+import sys
+import struct
+import argparse
+from typing import Dict, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .can_decoder import SignalDecoder, build_decoder
+from .config import CAN_DBC_PATH
+
+# ======== 파일 형식 ========
+# 헤더: magic(8) + 버전(2) + 레코드 크기(2) + 예약(4) = 16바이트
+# 레코드: timestamp(f64) + id(u32) + dlc(u8) + flags(u8) + 예약(2) + data(8) = 24바이트
+CAPTURE_MAGIC = b"EMUCAN\x00\x01"
+CAPTURE_VERSION = 1
+_HEADER = struct.Struct('<8sHH4x')
+_RECORD = struct.Struct('<dIBB2x8s')
+FLAG_VALID = 0x01
+FLAG_EXTENDED = 0x02
+
+
+class CaptureWriter:
+    """고정 크기 레코드를 미리 할당된 파일에 순차적으로 덧붙이는 CAN 원시 캡처 기록기"""
+
+    def __init__(self, path: str, prealloc_mb: int = 64, buffer_bytes: int = 64 * 1024):
+        self.path = path
+        self.records = 0
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        if prealloc_mb > 0:
+            try:
+                os.posix_fallocate(fd, 0, prealloc_mb * 1024 * 1024)
+            except (AttributeError, OSError):
+                pass
+        self._file = os.fdopen(fd, 'r+b', buffering=buffer_bytes)
+        self._file.write(_HEADER.pack(CAPTURE_MAGIC, CAPTURE_VERSION, _RECORD.size))
+        self._pack = _RECORD.pack
+
+    def write(self, timestamp: float, arb_id: int, data: bytes, is_extended: bool = False):
+        flags = FLAG_VALID | (FLAG_EXTENDED if is_extended else 0)
+        self._file.write(self._pack(timestamp, arb_id, len(data), flags, bytes(data)))
+        self.records += 1
+
+    def close(self):
+        """버퍼를 비우고 미리 할당한 여분을 잘라낸 뒤 파일을 닫습니다."""
+        if self._file.closed:
+            return
+        self._file.flush()
+        self._file.truncate(_HEADER.size + self.records * _RECORD.size)
+        self._file.close()
+
+
+# ======== 오프라인 디코딩 (NumPy) ========
+def _record_dtype():
+    return np.dtype([
+        ('timestamp', '<f8'), ('id', '<u4'), ('dlc', 'u1'), ('flags', 'u1'),
+        ('_pad', 'V2'), ('data', 'u1', (8,)),
+    ])
+
+
+def read_capture(path: str):
+    """캡처 파일을 구조화 배열로 메모리 매핑합니다. 비정상 종료로 남은 빈 레코드는 잘라냅니다."""
+    if np is None:
+        raise RuntimeError("numpy 가 설치되어 있지 않습니다. pip3 install numpy")
+    with open(path, 'rb') as f:
+        magic, version, record_size = _HEADER.unpack(f.read(_HEADER.size))
+    if magic != CAPTURE_MAGIC or record_size != _RECORD.size:
+        raise ValueError(f"CAN 캡처 파일 형식이 아닙니다: {path}")
+    count = (os.path.getsize(path) - _HEADER.size) // _RECORD.size
+    if count <= 0:
+        return np.zeros(0, dtype=_record_dtype())
+    records = np.memmap(path, dtype=_record_dtype(), mode='r', offset=_HEADER.size, shape=(count,))
+    invalid = np.flatnonzero((records['flags'] & FLAG_VALID) == 0)
+    if invalid.size:
+        records = records[:invalid[0]]
+    return records
+
+
+def decode_capture(records, decoder: SignalDecoder) -> Dict[str, Tuple["np.ndarray", "np.ndarray"]]:
+    """
+    캡처 레코드 전체를 프레임 ID별로 한 번에 디코딩합니다.
+    반환값: 시그널 이름 -> (timestamp 배열, 값 배열)
+    """
+    if np is None:
+        raise RuntimeError("numpy 가 설치되어 있지 않습니다. pip3 install numpy")
+    out: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+    ids = records['id']
+    dlcs = records['dlc']
+    for frame_id in sorted(decoder.frame_ids):
+        signals, required = decoder.frame_signals(frame_id)
+        frame_mask = (ids == frame_id) & (dlcs >= required)
+        if not frame_mask.any():
+            continue
+        frames = records[frame_mask]
+        ts = np.asarray(frames['timestamp'])
+        data = np.ascontiguousarray(frames['data'])
+        for sig in signals:
+            size = struct.calcsize('<' + sig.fmt)
+            raw = data[:, sig.offset:sig.offset + size].copy().view('<' + sig.fmt).ravel()
+            present = frames['dlc'] >= sig.offset + size
+            values = raw if sig.scale == 1 and not sig.bias else raw * sig.scale + sig.bias
+            if present.all():
+                out[sig.name] = (ts, values)
+            else:
+                out[sig.name] = (ts[present], values[present])
+    return out
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="CAN 원시 캡처 파일을 시그널별로 일괄 디코딩합니다.")
+    parser.add_argument("capture", help="CanWorker가 기록한 .can 캡처 파일")
+    parser.add_argument("-o", "--output", help="디코딩 결과를 저장할 .npz 경로")
+    parser.add_argument("--dbc", default=CAN_DBC_PATH, help="내장 EMU 테이블 대신 사용할 DBC 파일")
+    args = parser.parse_args(argv)
+
+    records = read_capture(args.capture)
+    if len(records):
+        span = float(records['timestamp'][-1] - records['timestamp'][0])
+        print(f"[CAPTURE] 프레임 {len(records)}개, {span:.1f}초")
+    else:
+        print("[CAPTURE] 기록된 프레임이 없습니다.")
+    signals = decode_capture(records, build_decoder(args.dbc))
+    for name, (ts, values) in signals.items():
+        print(f"  {name:<36} {len(values):>9} samples")
+
+    if args.output:
+        arrays = {}
+        for name, (ts, values) in signals.items():
+            arrays[name] = values
+            arrays[f"{name}__t"] = ts
+        np.savez(args.output, **arrays)
+        print(f"[CAPTURE] 저장 완료: {args.output}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,206 @@
+import re
+import struct
+from typing import Callable, Dict, Any, Iterable, List, NamedTuple, Optional, Tuple
+
+from .config import EMU_ID_BASE
+
+
+class CanSignal(NamedTuple):
+    """시그널 테이블의 한 줄: 프레임 ID, 바이트 오프셋, struct 타입, 배율, 이름"""
+    frame_id: int
+    offset: int
+    fmt: str
+    scale: float
+    name: str
+    bias: float = 0
+
+
+# ======== EMU 시그널 테이블 (emuLogger.py 파서와 동일한 정의) ========
+_AIN = 0.0048828125
+EMU_SIGNALS: List[CanSignal] = [
+    CanSignal(EMU_ID_BASE + 0, 0, 'H', 1, "RPM"),
+    CanSignal(EMU_ID_BASE + 0, 2, 'B', 0.5, "TPS_percent"),
+    CanSignal(EMU_ID_BASE + 0, 3, 'b', 1, "IAT_C"),
+    CanSignal(EMU_ID_BASE + 0, 4, 'H', 1, "MAP_kPa"),
+    CanSignal(EMU_ID_BASE + 0, 6, 'H', 0.016129, "PulseWidth_ms"),
+
+    CanSignal(EMU_ID_BASE + 1, 0, 'H', _AIN, "AnalogIn1_V"),
+    CanSignal(EMU_ID_BASE + 1, 2, 'H', _AIN, "AnalogIn2_V"),
+    CanSignal(EMU_ID_BASE + 1, 4, 'H', _AIN, "AnalogIn3_V"),
+    CanSignal(EMU_ID_BASE + 1, 6, 'H', _AIN, "AnalogIn4_V"),
+
+    CanSignal(EMU_ID_BASE + 2, 0, 'H', 1, "VSS_kmh"),
+    CanSignal(EMU_ID_BASE + 2, 2, 'B', 1, "Baro_kPa"),
+    CanSignal(EMU_ID_BASE + 2, 3, 'B', 1, "OilTemp_C"),
+    CanSignal(EMU_ID_BASE + 2, 4, 'B', 0.0625, "OilPressure_bar"),
+    CanSignal(EMU_ID_BASE + 2, 5, 'B', 0.0625, "FuelPressure_bar"),
+    CanSignal(EMU_ID_BASE + 2, 6, 'h', 1, "CLT_C"),
+
+    CanSignal(EMU_ID_BASE + 3, 0, 'b', 0.5, "IgnAngle_deg"),
+    CanSignal(EMU_ID_BASE + 3, 1, 'B', 0.05, "DwellTime_ms"),
+    CanSignal(EMU_ID_BASE + 3, 2, 'B', 0.0078125, "WBO_Lambda"),
+    CanSignal(EMU_ID_BASE + 3, 3, 'B', 0.5, "LambdaCorrection_percent"),
+    CanSignal(EMU_ID_BASE + 3, 4, 'H', 1, "EGT1_C"),
+    CanSignal(EMU_ID_BASE + 3, 6, 'H', 1, "EGT2_C"),
+
+    CanSignal(EMU_ID_BASE + 4, 0, 'B', 1, "Gear"),
+    CanSignal(EMU_ID_BASE + 4, 1, 'B', 1, "EmuTemp_C"),
+    CanSignal(EMU_ID_BASE + 4, 2, 'H', 0.027, "Batt_V"),
+    CanSignal(EMU_ID_BASE + 4, 4, 'H', 1, "CEL_Error"),
+    CanSignal(EMU_ID_BASE + 4, 6, 'B', 1, "Flags1"),
+    CanSignal(EMU_ID_BASE + 4, 7, 'B', 1, "Ethanol_percent"),
+
+    CanSignal(EMU_ID_BASE + 5, 0, 'B', 0.5, "DBW_Pos_percent"),
+    CanSignal(EMU_ID_BASE + 5, 1, 'B', 0.5, "DBW_Target_percent"),
+    CanSignal(EMU_ID_BASE + 5, 2, 'H', 1, "TC_drpm_raw"),
+    CanSignal(EMU_ID_BASE + 5, 4, 'H', 1, "TC_drpm"),
+    CanSignal(EMU_ID_BASE + 5, 6, 'B', 1, "TC_TorqueReduction_percent"),
+    CanSignal(EMU_ID_BASE + 5, 7, 'B', 1, "PitLimit_TorqueReduction_percent"),
+
+    CanSignal(EMU_ID_BASE + 6, 0, 'H', _AIN, "AnalogIn5_V"),
+    CanSignal(EMU_ID_BASE + 6, 2, 'H', _AIN, "AnalogIn6_V"),
+    CanSignal(EMU_ID_BASE + 6, 4, 'B', 1, "OutFlags1"),
+    CanSignal(EMU_ID_BASE + 6, 5, 'B', 1, "OutFlags2"),
+    CanSignal(EMU_ID_BASE + 6, 6, 'B', 1, "OutFlags3"),
+    CanSignal(EMU_ID_BASE + 6, 7, 'B', 1, "OutFlags4"),
+
+    CanSignal(EMU_ID_BASE + 7, 0, 'H', 1, "BoostTarget_kPa"),
+    CanSignal(EMU_ID_BASE + 7, 2, 'B', 1, "PWM1_DC_percent"),
+    CanSignal(EMU_ID_BASE + 7, 3, 'B', 1, "DSG_Mode"),
+    CanSignal(EMU_ID_BASE + 7, 4, 'B', 0.01, "LambdaTarget"),
+    CanSignal(EMU_ID_BASE + 7, 5, 'B', 1, "PWM2_DC_percent"),
+    CanSignal(EMU_ID_BASE + 7, 6, 'H', 0.01, "FuelUsed_L"),
+
+    # ADU 커스텀 프레임 (Byte 0: diffOilTemp -> EOT_OUT, Byte 1: powersteerTemp -> fuelPumpTemp)
+    CanSignal(0x500, 0, 'B', 1, "EOT_OUT"),
+    CanSignal(0x500, 1, 'B', 1, "fuelPumpTemp"),
+]
+
+# 기본값은 프레임 전체 길이. 짧은 프레임도 허용하는 ID만 최소 DLC를 지정합니다.
+EMU_MIN_DLC: Dict[int, int] = {EMU_ID_BASE + 7: 4}
+
+
+# ======== 시그널 테이블 컴파일 ========
+def _compile_layout(signals: List[CanSignal]) -> Callable[[bytes], Dict[str, Any]]:
+    """오프셋 순으로 정렬된 시그널 목록을 하나의 struct.Struct 언패커로 컴파일합니다."""
+    fmt = '<'
+    pos = 0
+    for sig in signals:
+        if sig.offset < pos:
+            raise ValueError(f"시그널 {sig.name} 이(가) 다른 시그널과 겹칩니다 (ID 0x{sig.frame_id:X}).")
+        fmt += 'x' * (sig.offset - pos) + sig.fmt
+        pos = sig.offset + struct.calcsize('<' + sig.fmt)
+    # 시그널별 배율/오프셋을 상수로 넣은 디코드 함수를 한 번 생성합니다 (프레임당 dict 1회 생성).
+    args = [f"v{i}" for i in range(len(signals))]
+    items = []
+    for arg, sig in zip(args, signals):
+        expr = arg
+        if sig.scale != 1:
+            expr += f" * {sig.scale!r}"
+        if sig.bias:
+            expr += f" + {sig.bias!r}"
+        items.append(f"{sig.name!r}: {expr}")
+    src = (
+        "def decode(data):\n"
+        f"    {', '.join(args)}, = unpack_from(data)\n"
+        f"    return {{{', '.join(items)}}}\n"
+    )
+    namespace = {"unpack_from": struct.Struct(fmt).unpack_from}
+    exec(src, namespace)
+    return namespace["decode"]
+
+
+class SignalDecoder:
+    """시그널 테이블을 시작 시 한 번 컴파일하여 프레임 ID별 언패커로 디코딩합니다."""
+
+    def __init__(self, signals: Iterable[CanSignal], min_dlc: Optional[Dict[int, int]] = None):
+        self.signals: List[CanSignal] = list(signals)
+        min_dlc = min_dlc or {}
+
+        by_id: Dict[int, List[CanSignal]] = {}
+        for sig in self.signals:
+            by_id.setdefault(sig.frame_id, []).append(sig)
+
+        # 프레임 ID -> DLC별 디코더 리스트 (인덱스 = 수신 데이터 길이)
+        self._layouts: Dict[int, List[Optional[Callable[[bytes], Dict[str, Any]]]]] = {}
+        self._frames: Dict[int, Tuple[List[CanSignal], int]] = {}
+        for frame_id, sigs in by_id.items():
+            sigs.sort(key=lambda s: s.offset)
+            ends = [s.offset + struct.calcsize('<' + s.fmt) for s in sigs]
+            full = max(ends)
+            required = min_dlc.get(frame_id, full)
+            layouts: List[Optional[Callable[[bytes], Dict[str, Any]]]] = [None] * (full + 1)
+            for dlc in range(required, full + 1):
+                fitting = [s for s, end in zip(sigs, ends) if end <= dlc]
+                if fitting:
+                    layouts[dlc] = _compile_layout(fitting)
+            self._layouts[frame_id] = layouts
+            self._frames[frame_id] = (sigs, required)
+
+    @property
+    def frame_ids(self) -> frozenset:
+        return frozenset(self._layouts)
+
+    def frame_signals(self, frame_id: int) -> Tuple[List[CanSignal], int]:
+        """프레임의 (오프셋 순 시그널 목록, 최소 DLC)를 반환합니다. 오프라인 일괄 디코딩에서 사용합니다."""
+        return self._frames[frame_id]
+
+    def decode(self, frame_id: int, data: bytes) -> Optional[Dict[str, Any]]:
+        """프레임을 디코딩합니다. 모르는 ID이거나 길이가 부족하면 None을 반환합니다."""
+        layouts = self._layouts.get(frame_id)
+        if layouts is None:
+            return None
+        n = len(data)
+        if n >= len(layouts):
+            n = len(layouts) - 1
+        decode = layouts[n]
+        if decode is None:
+            return None
+        return decode(data)
+
+
+# ======== DBC 가져오기 ========
+_DBC_MSG_RE = re.compile(r'^BO_\s+(\d+)\s+(\w+)\s*:\s*(\d+)')
+_DBC_SIG_RE = re.compile(
+    r'^SG_\s+(\w+)\s*(?:\w+\s*)?:\s*(\d+)\|(\d+)@([01])([+-])\s*\(([^,]+),([^)]+)\)'
+)
+_DBC_TYPES = {(8, False): 'B', (8, True): 'b', (16, False): 'H', (16, True): 'h',
+              (32, False): 'I', (32, True): 'i', (64, False): 'Q', (64, True): 'q'}
+
+
+def load_dbc(path: str) -> List[CanSignal]:
+    """
+    DBC 파일에서 시그널 테이블을 읽어옵니다.
+    바이트 정렬된 Little Endian(@1) 8/16/32/64비트 시그널만 지원합니다.
+    """
+    signals: List[CanSignal] = []
+    frame_id: Optional[int] = None
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        for raw in f:
+            line = raw.strip()
+            m = _DBC_MSG_RE.match(line)
+            if m:
+                frame_id = int(m.group(1)) & 0x1FFFFFFF
+                continue
+            m = _DBC_SIG_RE.match(line)
+            if not m or frame_id is None:
+                continue
+            name, start, length, order, sign, scale, bias = m.groups()
+            start, length = int(start), int(length)
+            fmt = _DBC_TYPES.get((length, sign == '-'))
+            if order != '1' or start % 8 or fmt is None:
+                raise ValueError(f"지원하지 않는 DBC 시그널 형식: {name} ({start}|{length}@{order}{sign})")
+            scale, bias = float(scale), float(bias)
+            signals.append(CanSignal(
+                frame_id, start // 8, fmt,
+                int(scale) if scale.is_integer() else scale, name,
+                int(bias) if bias.is_integer() else bias,
+            ))
+    return signals
+
+
+def build_decoder(dbc_path: Optional[str] = None) -> SignalDecoder:
+    """DBC 경로가 주어지면 해당 시그널로, 아니면 내장 EMU 테이블로 디코더를 만듭니다."""
+    if dbc_path:
+        return SignalDecoder(load_dbc(dbc_path))
+    return SignalDecoder(EMU_SIGNALS, EMU_MIN_DLC)
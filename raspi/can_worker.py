@@ -1,9 +1,16 @@
 import os
 import struct
+import asyncio
+import threading
 import can
 from typing import Callable, Dict, Any, Optional
 
-from .config import CAN_CHANNEL, CAN_BITRATE, EMU_ID_BASE
+from .config import (
+    CAN_CHANNEL, CAN_BITRATE, EMU_ID_BASE, CAN_DBC_PATH, CAN_KERNEL_FILTER, CAN_MAX_BATCH,
+    CAN_CAPTURE_PREALLOC_MB
+)
+from .can_decoder import SignalDecoder, build_decoder
+from .can_capture import CaptureWriter
 
 # ======== EMU 파서 함수들 (emuLogger.py와 동일) ========
 def parse_emu_frame_0(data: bytes) -> Dict[str, Any]:
@@ -107,7 +114,7 @@ def parse_custom_frame_500(data: bytes) -> Dict[str, Any]:
         "fuelPumpTemp": powersteer_temp
     }
 
-# 파서 딕셔너리
+# 파서 딕셔너리 (CanWorker는 can_decoder의 시그널 테이블을 사용하며, 이 파서들은 검증/벤치마크 기준으로 유지)
 _PARSERS = {
     EMU_ID_BASE + 0: parse_emu_frame_0, EMU_ID_BASE + 1: parse_emu_frame_1,
     EMU_ID_BASE + 2: parse_emu_frame_2, EMU_ID_BASE + 3: parse_emu_frame_3,
@@ -123,20 +130,46 @@ class CanWorker:
         channel: str = CAN_CHANNEL,
         bitrate: int = CAN_BITRATE,
         on_message: Optional[Callable[[int, Dict[str, Any]], None]] = None,
+        decoder: Optional[SignalDecoder] = None,
+        kernel_filter: bool = CAN_KERNEL_FILTER,
+        decode: bool = True,
     ):
         self.channel = channel
         self.bitrate = bitrate
         self.on_message = on_message
+        self.decoder = decoder or build_decoder(CAN_DBC_PATH)
+        self.kernel_filter = kernel_filter
+        self.decode = decode
         self.bus: Optional[can.BusABC] = None
 
+        # 원시 캡처 (start_capture/stop_capture는 다른 스레드에서 호출되므로 lock으로 보호)
+        self._capture: Optional[CaptureWriter] = None
+        self._capture_lock = threading.Lock()
+
+        # 수신 통계 (received: 소켓에서 읽은 프레임, filtered: 디코딩하지 않고 버린 프레임,
+        # overruns: 드라이버/커널 큐에서 유실된 프레임)
+        self.rx_received = 0
+        self.rx_decoded = 0
+        self.rx_filtered = 0
+        self._overrun_base = 0
+
     def start(self):
         #CAN 인터페이스를 활성화하고 버스를 초기화
         print(f"CAN 인터페이스({self.channel}) 활성화 시도...")
         os.system(f'sudo ip link set {self.channel} down')
         if os.system(f'sudo ip link set {self.channel} up type can bitrate {self.bitrate}') != 0:
             raise IOError(f"{self.channel} 인터페이스 활성화 실패.")
-        self.bus = can.interface.Bus(channel=self.channel, bustype='socketcan')
-        print("CAN 버스 초기화 성공.")
+        can_filters = None
+        if self.kernel_filter:
+            # load_dbc 는 29비트 ID를 그대로 두므로 0x7FF 보다 큰 ID는 확장 프레임으로 거른다
+            can_filters = [
+                {"can_id": arb_id, "can_mask": 0x1FFFFFFF, "extended": True} if arb_id > 0x7FF else
+                {"can_id": arb_id, "can_mask": 0x7FF, "extended": False}
+                for arb_id in sorted(self.decoder.frame_ids)
+            ]
+        self.bus = can.interface.Bus(channel=self.channel, bustype='socketcan', can_filters=can_filters)
+        self._overrun_base = self._read_overrun_counter()
+        print(f"CAN 버스 초기화 성공. (필터 ID: {len(can_filters) if can_filters else '없음'})")
 
     def recv_once(self, timeout: float = 0.02):
         """CAN 메시지를 한 번 수신하고 파싱하여 콜백을 호출합니다."""
@@ -145,18 +178,97 @@ class CanWorker:
         msg = self.bus.recv(timeout=timeout)
         if msg is None:
             return
-        
-        parser = _PARSERS.get(msg.arbitration_id)
-        if not parser:
+        self._handle(msg)
+
+    def recv_batch(self, timeout: float = 0.02, max_frames: int = CAN_MAX_BATCH) -> int:
+        """
+        첫 프레임을 timeout까지 기다린 뒤, 소켓 큐에 쌓인 프레임을 대기 없이 모두 비웁니다.
+        처리한 프레임 수를 반환합니다.
+        """
+        if not self.bus:
+            return 0
+        recv = self.bus.recv
+        msg = recv(timeout=timeout)
+        count = 0
+        while msg is not None:
+            self._handle(msg)
+            count += 1
+            if count >= max_frames:
+                break
+            msg = recv(timeout=0)
+        return count
+
+    async def run_async(self):
+        """
+        이벤트 루프에 소켓을 등록(can.Notifier)하고, 깨어날 때마다 버퍼에 쌓인 프레임을 모두 처리합니다.
+        """
+        if not self.bus:
             return
-            
-        parsed_data = parser(msg.data)
+        reader = can.AsyncBufferedReader()
+        notifier = can.Notifier(self.bus, [reader], loop=asyncio.get_running_loop())
+        queue = reader.buffer
+        try:
+            while True:
+                self._handle(await reader.get_message())
+                while not queue.empty():
+                    self._handle(queue.get_nowait())
+        finally:
+            notifier.stop()
+
+    def _handle(self, msg: can.Message):
+        self.rx_received += 1
+        if self._capture is not None:
+            with self._capture_lock:
+                if self._capture is not None:
+                    self._capture.write(msg.timestamp, msg.arbitration_id, msg.data, msg.is_extended_id)
+            if not self.decode:
+                return
+        parsed_data = self.decoder.decode(msg.arbitration_id, msg.data)
         if not parsed_data:
+            self.rx_filtered += 1
             return
+        self.rx_decoded += 1
 
         if self.on_message:
             self.on_message(msg.arbitration_id, parsed_data)
 
+    def start_capture(self, path: str, prealloc_mb: int = CAN_CAPTURE_PREALLOC_MB):
+        """수신하는 모든 프레임을 원시 바이너리 레코드로 path에 기록하기 시작합니다."""
+        writer = CaptureWriter(path, prealloc_mb=prealloc_mb)
+        with self._capture_lock:
+            old, self._capture = self._capture, writer
+        if old:
+            old.close()
+        print(f"[CanWorker] 원시 캡처 시작 -> {path}")
+
+    def stop_capture(self):
+        with self._capture_lock:
+            writer, self._capture = self._capture, None
+        if writer:
+            writer.close()
+            print(f"[CanWorker] 원시 캡처 종료 ({writer.records} frames): {writer.path}")
+
+    def _read_overrun_counter(self) -> int:
+        """인터페이스 통계(sysfs)에서 수신 유실 카운터 합계를 읽습니다."""
+        total = 0
+        base = f"/sys/class/net/{self.channel}/statistics"
+        for name in ("rx_dropped", "rx_over_errors", "rx_fifo_errors"):
+            try:
+                with open(f"{base}/{name}") as f:
+                    total += int(f.read().strip() or 0)
+            except (OSError, ValueError):
+                pass
+        return total
+
+    def get_stats(self) -> Dict[str, int]:
+        """수신/디코딩/필터링/오버런 프레임 카운터를 반환합니다."""
+        return {
+            "received": self.rx_received,
+            "decoded": self.rx_decoded,
+            "filtered": self.rx_filtered,
+            "overruns": self._read_overrun_counter() - self._overrun_base,
+        }
+
     def send_message(self, arb_id: int, data: bytes, is_extended: bool = False):
         """주어진 ID와 데이터로 CAN 메시지를 전송합니다."""
         if not self.bus:
@@ -175,6 +287,7 @@ class CanWorker:
             print(f"[CanWorker] Failed to send CAN message: {e}")
     
     def shutdown(self):
+        self.stop_capture()
         if self.bus:
             self.bus.shutdown()
             print("CAN 버스 종료.")
@@ -3,28 +3,138 @@ import os
 # ===================== 공통 =====================
 LOG_DIR = "/home/pi/logs/"
 os.makedirs(LOG_DIR, exist_ok=True)
+RUNTIME = "threaded" # "threaded": Worker별 스레드, "asyncio": 단일 이벤트 루프
+
+LOG_FORMAT = "csv" # "csv": 기존 CSV, "binary": 소스별 고유 주기 컬럼형 세션 로그(.emulog), "both"
+SESSION_CHUNK_ROWS = 512 # 세션 로그 그룹별 청크 최대 행 수
+SESSION_CHUNK_SEC = 1.0 # 세션 로그 그룹별 청크 최대 시간 (비정상 종료 시 유실 범위)
+
+# CSV 로깅 (별도 writer 스레드가 링 버퍼에서 모아서 기록)
+CSV_LOG_RATE_HZ = 50 # 로그 행 샘플링 주기
+CSV_RING_CAPACITY = 2048 # 링 버퍼 크기 (가득 차면 새 행은 유실로 집계)
+CSV_FLUSH_INTERVAL_SEC = 0.5 # writer 스레드가 모아서 기록하는 주기
 
 # ===================== CAN =====================
 CAN_CHANNEL = "can0"
 CAN_BITRATE = 1_000_000
 EMU_ID_BASE = 0x600
 EMU_IDS = {f"FRAME_{i}": EMU_ID_BASE + i for i in range(8)}
+CAN_DBC_PATH = None # DBC 파일 경로를 지정하면 내장 EMU 시그널 테이블 대신 사용
+CAN_KERNEL_FILTER = True # 디코딩하는 ID만 커널(SocketCAN)에서 수신하도록 필터 설치
+CAN_MAX_BATCH = 256 # 한 번 깨어날 때 큐에서 비우는 최대 프레임 수
+CAN_CAPTURE_ENABLE = False # 로깅 중 전체 버스를 원시 바이너리(.can)로 함께 기록 (커널 필터 해제)
+CAN_CAPTURE_DECODE = True # 캡처 중에도 실시간 디코딩 수행 (False면 대시보드용 CAN 값 없음)
+CAN_CAPTURE_PREALLOC_MB = 64 # 캡처 파일 사전 할당 크기
 
 # ===================== GPS =====================
 SERIAL_PORT = "/dev/serial0"
 BAUD_RATE = 9600
+GPS_USE_UBX = False # u-blox UBX NAV-PVT 바이너리 모드 (실패 시 NMEA로 자동 복귀)
+GPS_UBX_BAUD = 115200 # UBX 모드 전환 시 올릴 보드레이트
+GPS_UBX_RATE_HZ = 10 # NAV-PVT 출력 주기 (1~25Hz, 수신기/GNSS 조합에 따라 최대치 다름)
+GPS_DEBUG_RAW = False # True면 수신한 NMEA 문장을 [GPS RAW]로 모두 출력 (진단용, 출력 비용 큼)
+
+# ===================== ACCEL =====================
+ACCEL_POLL_INTERVAL_SEC = 0.01 # asyncio 런타임의 ADXL345 읽기 주기 (BW_RATE 100Hz와 동일)
+ACCEL_FIFO_ENABLE = False # FIFO 스트림 모드 (고속 샘플링 + 워터마크 단위 묶음 읽기)
+ACCEL_FIFO_RATE_CODE = 0x0D # BW_RATE 코드 (0x0C: 400Hz, 0x0D: 800Hz)
+ACCEL_FIFO_WATERMARK = 16 # 이 샘플 수가 쌓이면 INT1 발생 (1~31)
+ACCEL_USE_INT = True # INT1 -> ACCEL_INT_PIN 배선 시 인터럽트로 깨어남 (False면 폴링)
+ACCEL_FILTER_ENABLE = True # 업링크용 저역통과/decimation/윈도우 통계 (numpy 필요, 로그는 원본 유지)
+ACCEL_LPF_CUTOFF_HZ = 10.0 # FIR 저역통과 차단 주파수
+ACCEL_LPF_TAPS = 31 # FIR 탭 수 (홀수)
+ACCEL_DECIMATION = 4 # 필터 출력에서 N개 중 1개만 통계에 사용
+
+# ===================== FUSION =====================
+FUSION_ENABLE = False # GPS + 가속도 칼만 필터로 고속 위치/속도/진행 방향 출력
+FUSION_RATE_HZ = 50 # 융합 결과 출력 주기
+FUSION_FORWARD_AXIS = ("ax_g", 1.0) # 차량 전방 가속도 축과 부호 (장착 방향에 맞게 수정)
+FUSION_LEFT_AXIS = ("ay_g", 1.0) # 차량 좌측 가속도 축과 부호
+FUSION_ACCEL_NOISE = 0.5 # 가속도 입력 잡음 (m/s^2)
+FUSION_GPS_POS_STD_M = 2.5 # HDOP 1 기준 GPS 위치 표준편차 (m)
+FUSION_GPS_VEL_STD_MS = 0.3 # GPS 속도 표준편차 (m/s)
 
 # ===================== GPIO (BCM) =================
 BUTTON_PIN = 17
 LOGGING_LED_PIN = 27
 ERROR_LED_PIN = 22
 WIFI_LED_PIN = 5
+ACCEL_INT_PIN = 6 # ADXL345 INT1
 
 # ===================== MQTT =====================
 MQTT_BROKER = "test.mosquitto.org"
 MQTT_PORT = 1883
 MQTT_ENABLE = True
 MQTT_UPLOAD_INTERVAL_SEC = 0.2 # 0.2초 (5Hz) 간격으로 데이터 발행
+MQTT_PAYLOAD_FORMAT = "json" # "json": 기존 JSON, "binary": 스키마 기반 패킹 (telemetry_codec, 서버도 지원해야 함)
+MQTT_ZSTD_LEVEL = 0 # 0이면 압축 안 함, 1~22: zstd 압축 레벨 (zstandard 필요, 줄어들 때만 적용)
+MQTT_DELTA_ENABLE = False # 데드밴드 이상 바뀐 시그널만 전송 (서버가 전체 상태를 복원)
+MQTT_KEYFRAME_INTERVAL_SEC = 5.0 # 이 간격마다(또는 서버 요청 시) 전체 시그널을 보내는 키프레임
+MQTT_DELTA_DEADBANDS = { # 시그널별 데드밴드 (여기 없는 시그널은 값이 조금이라도 바뀌면 전송)
+    "IAT_C": 1, "CLT_C": 1, "OilTemp_C": 1, "EmuTemp_C": 1, "EOT_OUT": 1, "fuelPumpTemp": 1,
+    "EGT1_C": 5, "EGT2_C": 5, "Baro_kPa": 1, "Batt_V": 0.1, "FuelUsed_L": 0.05,
+    "AnalogIn1_V": 0.02, "AnalogIn2_V": 0.02, "AnalogIn3_V": 0.02,
+    "AnalogIn4_V": 0.02, "AnalogIn5_V": 0.02, "AnalogIn6_V": 0.02,
+    "Altitude_m": 1.0, "HDOP": 0.2, "Fused_PosStd_m": 0.2,
+}
+MQTT_QUEUE_ENABLE = False # 브로커 연결이 끊긴 동안의 업링크를 디스크 큐에 저장했다가 재연결 후 재전송
+MQTT_QUEUE_PATH = os.path.join(LOG_DIR, "uplink_queue.db") # SQLite(WAL) 큐 파일
+MQTT_QUEUE_MAX_MB = 64 # 큐 최대 크기 (넘으면 가장 오래된 메시지부터 버림)
+MQTT_BACKFILL_RATE_HZ = 10.0 # 재전송 최대 메시지/초 (HISTORY 토픽, 실시간 업링크가 우선)
+
+# 업링크 속도 제어: 실시간 업링크를 QoS 1로 보내 PUBACK 지연/미확인 메시지 수로 링크 상태를 판단
+MQTT_RATE_CONTROL_ENABLE = False # False면 MQTT_UPLOAD_INTERVAL_SEC 고정 주기, 모든 시그널 전송
+MQTT_PRIORITY_TIERS = { # 시그널 계층 (여기 없는 시그널은 "low")
+    "critical": (
+        "RPM", "OilPressure_bar", "CLT_C", "WBO_Lambda", "OilTemp_C", "FuelPressure_bar", "TPS_percent",
+        "VSS_kmh", "Gear", "CEL_Error", "Latitude", "Longitude", "GPS_Speed_KPH", "Heading_deg", "gps_fix",
+    ),
+    "normal": (
+        "MAP_kPa", "IAT_C", "Batt_V", "EGT1_C", "EGT2_C", "IgnAngle_deg", "LambdaTarget", "LambdaCorrection_percent",
+        "TC_TorqueReduction_percent", "PitLimit_TorqueReduction_percent", "FuelUsed_L", "EOT_OUT", "fuelPumpTemp",
+        "Satellites", "ax_g", "ay_g", "az_g", "g_mean", "g_peak",
+        "Fused_Latitude", "Fused_Longitude", "Fused_Speed_KPH", "Fused_Heading_deg",
+    ),
+}
+MQTT_RATE_LEVELS = ( # (업링크 주기 s, {계층: n번째 프레임마다 포함, 0이면 제외}). 0단계가 가장 좋은 링크
+    (0.1, {"critical": 1, "normal": 1, "low": 2}),
+    (0.2, {"critical": 1, "normal": 1, "low": 5}),
+    (0.2, {"critical": 1, "normal": 5, "low": 0}),
+    (0.33, {"critical": 1, "normal": 0, "low": 0}),
+)
+MQTT_RATE_DEGRADE_LATENCY_MS = 800 # PUBACK 지연이 이보다 크면 한 단계 내림
+MQTT_RATE_RECOVER_LATENCY_MS = 250 # 이보다 작고 미확인 1개 이하가 MQTT_RATE_RECOVER_SEC 동안 유지되면 한 단계 올림
+MQTT_RATE_MAX_INFLIGHT = 10 # 미확인 메시지가 이보다 많으면 한 단계 내림
+MQTT_RATE_RECOVER_SEC = 5.0
+
+# 컬럼형 시계열 업링크: 업링크 주기 사이의 값을 고정 주기로 샘플링해 메시지마다 'series' 블록으로 함께 전송
+MQTT_BATCH_ENABLE = False
+MQTT_BATCH_RATE_HZ = 25 # 시계열 샘플링 주기 (업링크 메시지 수는 그대로)
+MQTT_BATCH_SIGNALS = ( # 대시보드 그래프용 시그널 (속도 제어 계층에서 빠지는 시그널은 시계열에서도 빠짐)
+    "RPM", "TPS_percent", "VSS_kmh", "MAP_kPa", "WBO_Lambda", "OilPressure_bar",
+    "CLT_C", "OilTemp_C", "EOT_OUT", "IAT_C", "fuelPumpTemp", "ax_g", "ay_g", "az_g",
+)
+
+# 소스별 토픽: CAN/GPS/ACCEL을 각자의 토픽과 주기로 발행 (False면 전체를 TELEMETRY 토픽 하나로 발행)
+MQTT_SOURCE_TOPICS_ENABLE = False # 켜면 TELEMETRY 통합 토픽은 발행하지 않음 (기존 구독자 확인 후 사용)
+MQTT_SOURCE_GROUPS = { # 소스 토픽 키 -> 업링크 그룹 (web_server/config.py 와 같게 유지)
+    "CAN": ("can",),
+    "GPS": ("gps", "fusion"),
+    "ACCEL": ("accel",),
+}
+MQTT_SOURCE_RATES_HZ = { # 속도 제어 0단계 기준 발행 주기 (단계가 내려가면 같은 비율로 늘림)
+    "CAN": 10, # 시계열(series) 블록은 CAN 토픽에 실림
+    "GPS": GPS_UBX_RATE_HZ, # 새 측위가 있을 때만 발행
+    "ACCEL": 10, # 가속도 필터 통계가 발행 사이 구간 전체를 요약
+}
+MQTT_STATUS_INTERVAL_SEC = 2.0 # STATUS(retained JSON: 로깅/CAN 통계/링크/큐 상태) 발행 주기
+
+# LAN 직접 경로: 같은 Wi-Fi의 피트 서버로 UDP 멀티캐스트 전송 (MQTT와 병행, 서버가 seq 로 중복 제거)
+LAN_UDP_ENABLE = False # 피트 노트북이 같은 Wi-Fi에 있을 때만 켬 (접속한 네트워크에 멀티캐스트 송신)
+LAN_UDP_GROUP = "239.255.42.99" # 관리 범위(239/8) 멀티캐스트 그룹 (web_server/config.py 와 같게)
+LAN_UDP_PORT = 47999
+LAN_UDP_TTL = 1 # 라우터를 넘지 않도록 같은 서브넷으로 제한
+LAN_RETAIN_INTERVAL_SEC = 5.0 # 스키마/STATUS 를 LAN으로 다시 보내는 주기
 # MQTT 토픽 정의
 # 각 데이터 소스별로 토픽을 분리하여 수신 측에서 유연하게 처리하도록 함
 TOPIC_PREFIX = "car/emu"
@@ -32,6 +142,9 @@ MQTT_TOPICS = {
     "CAN": f"{TOPIC_PREFIX}/can",
     "GPS": f"{TOPIC_PREFIX}/gps",
     "ACCEL": f"{TOPIC_PREFIX}/accel",
-    "STATUS": f"{TOPIC_PREFIX}/status",
-    "TELEMETRY": f"{TOPIC_PREFIX}/telemetry" # 통합 데이터를 보낼 토픽
+    "STATUS": f"{TOPIC_PREFIX}/status", # 저주기 상태 (retained, 비정상 종료 시 last will 로 online=false)
+    "TELEMETRY": f"{TOPIC_PREFIX}/telemetry", # 통합 데이터를 보낼 토픽 (MQTT_SOURCE_TOPICS_ENABLE=False)
+    "SCHEMA": f"{TOPIC_PREFIX}/schema", # 바이너리 페이로드 스키마 (retained)
+    "COMMAND_KEYFRAME": f"{TOPIC_PREFIX}/command/keyframe", # 서버의 키프레임 요청
+    "HISTORY": f"{TOPIC_PREFIX}/history" # 연결 끊김 동안 쌓인 메시지 재전송 (HISTORY/<원래 토픽 이름>)
 }
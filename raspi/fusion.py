@@ -0,0 +1,189 @@
+import math
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+EARTH_RADIUS_M = 6378137.0
+G = 9.80665
+
+
+class GpsImuFusion:
+    """
+    GPS 측위(10Hz 내외)와 가속도(수백 Hz)를 합쳐 50~100Hz로 위치/속도/진행 방향을 내는 칼만 필터.
+
+    상태는 첫 측위 기준 로컬 ENU 평면의 [위치, 속도]이며 가속도는 제어 입력으로 사용합니다.
+    가속도 잡음이 축에 무관하고 GPS 위치/속도 측정도 축별로 독립이므로 동쪽/북쪽 축이 분리되고,
+    두 축의 공분산도 항상 같아서 2x2 공분산 하나와 스칼라 연산만으로 갱신합니다.
+    차체 가속도(전방/좌측)는 현재 진행 방향으로 회전해 ENU로 바꾸며, 정지 중에는 센서 바이어스를 추정합니다.
+    """
+
+    def __init__(
+        self,
+        forward_axis: Tuple[str, float] = ("ax_g", 1.0),
+        left_axis: Tuple[str, float] = ("ay_g", 1.0),
+        accel_noise: float = 0.5,
+        gps_pos_std: float = 2.5,
+        gps_vel_std: float = 0.3,
+        min_heading_speed: float = 2.0,
+    ):
+        self.forward_axis = forward_axis
+        self.left_axis = left_axis
+        self.q = accel_noise ** 2
+        self.gps_pos_std = gps_pos_std
+        self.gps_vel_var = gps_vel_std ** 2
+        self.min_heading_speed = min_heading_speed
+
+        self._lock = threading.Lock()
+        self._origin: Optional[Tuple[float, float, float]] = None  # lat0, lon0, cos(lat0)
+        self._t = 0.0
+        self._pe = self._pn = self._ve = self._vn = 0.0
+        self._P = [100.0, 0.0, 100.0]  # [p_pp, p_pv, p_vv]
+        self._heading = 0.0  # rad, 북쪽 기준 시계 방향
+        self._acc_sum = [0.0, 0.0]
+        self._acc_n = 0
+        self._bias = [0.0, 0.0]
+        self._stationary = False
+        self.gps_updates = 0
+        self.steps = 0
+
+    # ======== 입력 ========
+    def push_accel(self, parsed: Dict[str, Any]):
+        """가속도 샘플 하나를 다음 step까지 누적합니다 (수신 스레드에서 호출)."""
+        fwd = parsed.get(self.forward_axis[0])
+        left = parsed.get(self.left_axis[0])
+        if fwd is None or left is None:
+            return
+        with self._lock:
+            self._acc_sum[0] += fwd * self.forward_axis[1]
+            self._acc_sum[1] += left * self.left_axis[1]
+            self._acc_n += 1
+
+    def push_accel_block(self, xs, ys, zs):
+        """FIFO 블록을 한 번에 누적합니다."""
+        cols = {"ax_g": xs, "ay_g": ys, "az_g": zs}
+        fwd = cols.get(self.forward_axis[0])
+        left = cols.get(self.left_axis[0])
+        if not fwd:
+            return
+        with self._lock:
+            self._acc_sum[0] += sum(fwd) * self.forward_axis[1]
+            self._acc_sum[1] += sum(left) * self.left_axis[1]
+            self._acc_n += len(fwd)
+
+    def update_gps(self, parsed: Dict[str, Any], ts: Optional[float] = None):
+        """GPS 측위 하나로 상태를 보정합니다. 측위가 없으면 무시합니다."""
+        if not parsed.get("gps_fix"):
+            return
+        lat, lon = parsed.get("Latitude"), parsed.get("Longitude")
+        if lat is None or lon is None:
+            return
+        if ts is None:
+            ts = time.monotonic()
+        speed = (parsed.get("GPS_Speed_KPH") or 0.0) / 3.6
+        course = parsed.get("Heading_deg")
+        hdop = parsed.get("HDOP")
+        pos_var = (self.gps_pos_std * (hdop if hdop else 1.0)) ** 2
+
+        with self._lock:
+            if self._origin is None:
+                self._origin = (lat, lon, math.cos(math.radians(lat)))
+                self._t = ts
+            e, n = self._to_local(lat, lon)
+            self._predict(ts)
+            self._update(e, n, pos_var, 0)
+            if course is not None or speed < 0.5:
+                heading = math.radians(course or 0.0)
+                self._update(speed * math.sin(heading), speed * math.cos(heading), self.gps_vel_var, 1)
+            self._stationary = speed < 0.5
+            if speed >= self.min_heading_speed and course is not None:
+                self._heading = math.radians(course)
+            self.gps_updates += 1
+
+    # ======== 출력 ========
+    def step(self, ts: Optional[float] = None) -> Optional[Dict[str, float]]:
+        """ts까지 예측하고 융합 결과를 반환합니다. 첫 측위 전에는 None."""
+        if ts is None:
+            ts = time.monotonic()
+        with self._lock:
+            if self._origin is None:
+                self._acc_sum = [0.0, 0.0]
+                self._acc_n = 0
+                return None
+            self._predict(ts)
+            self.steps += 1
+            lat0, lon0, coslat = self._origin
+            speed = math.hypot(self._ve, self._vn)
+            if speed >= self.min_heading_speed:
+                self._heading = math.atan2(self._ve, self._vn)
+            return {
+                "Fused_Latitude": lat0 + math.degrees(self._pn / EARTH_RADIUS_M),
+                "Fused_Longitude": lon0 + math.degrees(self._pe / (EARTH_RADIUS_M * coslat)),
+                "Fused_Speed_KPH": speed * 3.6,
+                "Fused_Heading_deg": math.degrees(self._heading) % 360.0,
+                "Fused_PosStd_m": math.sqrt(self._P[0]),
+            }
+
+    # ======== 내부 (self._lock 보유 상태에서 호출) ========
+    def _to_local(self, lat: float, lon: float) -> Tuple[float, float]:
+        lat0, lon0, coslat = self._origin
+        return (math.radians(lon - lon0) * EARTH_RADIUS_M * coslat,
+                math.radians(lat - lat0) * EARTH_RADIUS_M)
+
+    def _accel_enu(self) -> Tuple[float, float]:
+        """누적한 차체 가속도 평균을 m/s^2 ENU로 변환하고 누적을 비웁니다."""
+        n = self._acc_n
+        if not n:
+            return 0.0, 0.0
+        fwd = self._acc_sum[0] / n
+        left = self._acc_sum[1] / n
+        self._acc_sum = [0.0, 0.0]
+        self._acc_n = 0
+        if self._stationary:
+            # 정지 중에는 기울기/오프셋을 바이어스로 추정하고 입력은 0으로 둔다
+            self._bias[0] += 0.02 * (fwd - self._bias[0])
+            self._bias[1] += 0.02 * (left - self._bias[1])
+            return 0.0, 0.0
+        fwd = (fwd - self._bias[0]) * G
+        left = (left - self._bias[1]) * G
+        sin_h, cos_h = math.sin(self._heading), math.cos(self._heading)
+        # 전방 = (sin h, cos h), 좌측 = (-cos h, sin h) (ENU)
+        return fwd * sin_h - left * cos_h, fwd * cos_h + left * sin_h
+
+    def _predict(self, ts: float):
+        dt = ts - self._t
+        if dt <= 0:
+            return
+        self._t = ts
+        ae, an = self._accel_enu()
+        half_dt2 = 0.5 * dt * dt
+        self._pe += self._ve * dt + ae * half_dt2
+        self._pn += self._vn * dt + an * half_dt2
+        self._ve += ae * dt
+        self._vn += an * dt
+
+        # P = F P F' + Q,  F = [[1, dt], [0, 1]],  Q = q * [[dt^4/4, dt^3/2], [dt^3/2, dt^2]]
+        pp, pv, vv = self._P
+        q = self.q
+        pp = pp + 2 * dt * pv + dt * dt * vv + q * half_dt2 * half_dt2
+        pv = pv + dt * vv + q * half_dt2 * dt
+        vv = vv + q * dt * dt
+        self._P = [pp, pv, vv]
+
+    def _update(self, ze: float, zn: float, r: float, index: int):
+        """위치(index=0) 또는 속도(index=1) 측정으로 두 축을 같은 이득으로 보정합니다."""
+        pp, pv, vv = self._P
+        s = (pp if index == 0 else vv) + r
+        k_p = (pp if index == 0 else pv) / s
+        k_v = (pv if index == 0 else vv) / s
+        if index == 0:
+            ie, in_ = ze - self._pe, zn - self._pn
+        else:
+            ie, in_ = ze - self._ve, zn - self._vn
+        self._pe += k_p * ie
+        self._pn += k_p * in_
+        self._ve += k_v * ie
+        self._vn += k_v * in_
+        if index == 0:
+            self._P = [pp - k_p * pp, pv - k_p * pv, vv - k_v * pv]
+        else:
+            self._P = [pp - k_p * pv, pv - k_p * vv, vv - k_v * vv]
@@ -6,7 +6,7 @@ try:
 except (ImportError, RuntimeError):
     IS_RASPI = False
 
-from .config import BUTTON_PIN, LOGGING_LED_PIN, ERROR_LED_PIN, WIFI_LED_PIN
+from .config import BUTTON_PIN, LOGGING_LED_PIN, ERROR_LED_PIN, WIFI_LED_PIN, ACCEL_INT_PIN
 
 class GpioController:
     def __init__(self):
@@ -17,6 +17,8 @@ class GpioController:
             GPIO.setup(LOGGING_LED_PIN, GPIO.OUT, initial=GPIO.LOW)
             GPIO.setup(ERROR_LED_PIN, GPIO.OUT, initial=GPIO.LOW)
             GPIO.setup(WIFI_LED_PIN, GPIO.OUT, initial=GPIO.LOW)
+            # ADXL345 INT1 (워터마크 인터럽트, active-high)
+            GPIO.setup(ACCEL_INT_PIN, GPIO.IN, pull_up_down=GPIO.PUD_DOWN)
 
     def read_button_pressed(self) -> bool:
         """눌림 시 True (풀업 기준 active-low)"""
@@ -42,6 +44,22 @@ class GpioController:
         if not self.is_raspi: return
         GPIO.output(WIFI_LED_PIN, GPIO.HIGH if state else GPIO.LOW)
 
+    def wait_accel_interrupt(self, timeout_ms: int) -> bool:
+        """ADXL345 INT1 상승 에지(또는 이미 high 상태)를 timeout_ms까지 기다립니다."""
+        if not self.is_raspi:
+            time.sleep(timeout_ms / 1000.0)
+            return False
+        if GPIO.input(ACCEL_INT_PIN) == GPIO.HIGH:
+            return True
+        return GPIO.wait_for_edge(ACCEL_INT_PIN, GPIO.RISING, timeout=max(1, timeout_ms)) is not None
+
+    def on_accel_interrupt(self, callback):
+        """INT1 상승 에지마다 callback()을 GPIO 스레드에서 호출합니다. None이면 해제합니다."""
+        if not self.is_raspi: return
+        GPIO.remove_event_detect(ACCEL_INT_PIN)
+        if callback:
+            GPIO.add_event_detect(ACCEL_INT_PIN, GPIO.RISING, callback=lambda _pin: callback())
+
     def cleanup(self):
         if self.is_raspi:
             GPIO.cleanup()
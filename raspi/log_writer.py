@@ -0,0 +1,116 @@
+import csv
+import io
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from .signal_store import SignalStore, StoreSnapshot
+
+# CSV 컬럼 순서 (기존 로그 분석 스크립트와 호환되도록 유지)
+CSV_FIELDNAMES: List[str] = [
+    "Timestamp", "Latitude", "Longitude", "GPS_Speed_KPH", "Satellites", "Altitude_m", "Heading_deg",
+    "RPM","TPS_percent","IAT_C","MAP_kPa","PulseWidth_ms","AnalogIn1_V","AnalogIn2_V","AnalogIn3_V","AnalogIn4_V",
+    "VSS_kmh","Baro_kPa","OilTemp_C","OilPressure_bar","FuelPressure_bar","CLT_C","EOT_OUT", "fuelPumpTemp","IgnAngle_deg","DwellTime_ms",
+    "WBO_Lambda","LambdaCorrection_percent","EGT1_C","EGT2_C","Gear","EmuTemp_C","Batt_V","CEL_Error","Flags1",
+    "Ethanol_percent","DBW_Pos_percent","DBW_Target_percent","TC_drpm_raw","TC_drpm","TC_TorqueReduction_percent",
+    "PitLimit_TorqueReduction_percent","AnalogIn5_V","AnalogIn6_V","OutFlags1","OutFlags2","OutFlags3","OutFlags4",
+    "BoostTarget_kPa","PWM1_DC_percent","DSG_Mode","LambdaTarget","PWM2_DC_percent","FuelUsed_L",
+    "ax_g", "ay_g", "az_g", "gx_dps", "gy_dps", "gz_dps"
+]
+# 센서 융합 출력 컬럼: FUSION_ENABLE 일 때만 기존 컬럼 뒤에 붙임 (기존 레이아웃은 그대로)
+FUSION_CSV_FIELDNAMES: List[str] = ["Fused_Latitude", "Fused_Longitude", "Fused_Speed_KPH", "Fused_Heading_deg"]
+
+
+class CsvLogWriter:
+    """
+    CSV 기록 전용 스레드. 생산자는 push()로 (시각, 스냅샷)을 고정 크기 링 버퍼에 넣고,
+    writer 스레드가 주기적으로 모아서 미리 계산한 컬럼 순서로 인코딩해 한 번에 기록합니다.
+    버퍼가 가득 차면 새 행은 버리고 rows_dropped를 증가시킵니다.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        store: SignalStore,
+        fieldnames: Sequence[str] = CSV_FIELDNAMES,
+        capacity: int = 2048,
+        flush_interval: float = 0.5,
+        buffer_bytes: int = 1024 * 1024,
+        on_flush: Optional[Callable[[], None]] = None,
+    ):
+        self.path = path
+        self.fieldnames = list(fieldnames)
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.on_flush = on_flush
+
+        # 첫 컬럼(Timestamp)을 제외한 각 컬럼의 스토어 슬롯 인덱스 (-1: 스토어에 없는 컬럼)
+        self._columns: Tuple[int, ...] = tuple(store.index.get(name, -1) for name in self.fieldnames[1:])
+        self._ring: deque = deque()
+        self._closed = False
+
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self._rate_rows = 0
+        self._rate_time = time.monotonic()
+        self.rows_per_sec = 0.0
+
+        self._file = open(path, 'w', newline='', encoding='utf-8', buffering=buffer_bytes)
+        csv.writer(self._file).writerow(self.fieldnames)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def push(self, wall_time: float, snapshot: StoreSnapshot) -> bool:
+        """행 하나를 링 버퍼에 넣습니다. 가득 찼거나 닫힌 경우 False를 반환합니다."""
+        if self._closed or len(self._ring) >= self.capacity:
+            self.rows_dropped += 1
+            return False
+        self._ring.append((wall_time, snapshot.values))
+        return True
+
+    def _encode(self, rows: List[Tuple[float, List[Any]]]) -> str:
+        out = io.StringIO()
+        writer = csv.writer(out)
+        columns = self._columns
+        fromtimestamp = datetime.fromtimestamp
+        for wall_time, values in rows:
+            line = [fromtimestamp(wall_time).strftime("%Y-%m-%d %H:%M:%S.%f")]
+            line.extend([values[i] if i >= 0 else None for i in columns])
+            writer.writerow(line)
+        return out.getvalue()
+
+    def _drain(self):
+        ring = self._ring
+        count = len(ring)
+        if not count:
+            return
+        rows = [ring.popleft() for _ in range(count)]
+        self._file.write(self._encode(rows))
+        self.rows_written += count
+        self._rate_rows += count
+        if self.on_flush:
+            self.on_flush()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self._drain()
+            now = time.monotonic()
+            elapsed = now - self._rate_time
+            if elapsed >= 1.0:
+                self.rows_per_sec = self._rate_rows / elapsed
+                self._rate_rows = 0
+                self._rate_time = now
+        self._drain()
+
+    def close(self):
+        """남은 행을 모두 기록하고 파일을 닫습니다."""
+        if self._closed:
+            return
+        self._closed = True
+        self._stop.set()
+        self._thread.join()
+        self._file.close()
+        print(f"[INFO] 로그 파일 저장 완료: {self.path} (기록 {self.rows_written}행, 유실 {self.rows_dropped}행)")
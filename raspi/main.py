@@ -2,9 +2,9 @@
 
 import os
 import sys
-import csv
 import signal
 import time
+import asyncio
 import threading
 from datetime import datetime
 import json
@@ -12,116 +12,382 @@ import struct
 
 # 상대 경로 임포트를 유지합니다 (패키지 실행 방식)
 from .config import (
-    LOG_DIR, SERIAL_PORT, BAUD_RATE,
-    MQTT_BROKER, MQTT_PORT, MQTT_TOPICS, MQTT_UPLOAD_INTERVAL_SEC
+    RUNTIME, LOG_DIR, LOG_FORMAT, SESSION_CHUNK_ROWS, SESSION_CHUNK_SEC,
+    CSV_LOG_RATE_HZ, CSV_RING_CAPACITY, CSV_FLUSH_INTERVAL_SEC,
+    SERIAL_PORT, BAUD_RATE, GPS_DEBUG_RAW, GPS_USE_UBX, GPS_UBX_BAUD, GPS_UBX_RATE_HZ, ACCEL_POLL_INTERVAL_SEC,
+    ACCEL_FIFO_ENABLE, ACCEL_FIFO_RATE_CODE, ACCEL_FIFO_WATERMARK, ACCEL_USE_INT,
+    ACCEL_FILTER_ENABLE, ACCEL_LPF_CUTOFF_HZ, ACCEL_LPF_TAPS, ACCEL_DECIMATION,
+    FUSION_ENABLE, FUSION_RATE_HZ, FUSION_FORWARD_AXIS, FUSION_LEFT_AXIS,
+    FUSION_ACCEL_NOISE, FUSION_GPS_POS_STD_M, FUSION_GPS_VEL_STD_MS,
+    CAN_KERNEL_FILTER, CAN_CAPTURE_ENABLE, CAN_CAPTURE_DECODE,
+    MQTT_BROKER, MQTT_PORT, MQTT_TOPICS, MQTT_UPLOAD_INTERVAL_SEC, MQTT_PAYLOAD_FORMAT, MQTT_ZSTD_LEVEL,
+    MQTT_DELTA_ENABLE, MQTT_KEYFRAME_INTERVAL_SEC, MQTT_DELTA_DEADBANDS,
+    MQTT_QUEUE_ENABLE, MQTT_QUEUE_PATH, MQTT_QUEUE_MAX_MB, MQTT_BACKFILL_RATE_HZ,
+    MQTT_RATE_CONTROL_ENABLE, MQTT_PRIORITY_TIERS, MQTT_RATE_LEVELS, MQTT_RATE_DEGRADE_LATENCY_MS,
+    MQTT_RATE_RECOVER_LATENCY_MS, MQTT_RATE_MAX_INFLIGHT, MQTT_RATE_RECOVER_SEC,
+    MQTT_BATCH_ENABLE, MQTT_BATCH_RATE_HZ, MQTT_BATCH_SIGNALS,
+    MQTT_SOURCE_TOPICS_ENABLE, MQTT_SOURCE_GROUPS, MQTT_SOURCE_RATES_HZ, MQTT_STATUS_INTERVAL_SEC,
+    LAN_UDP_ENABLE, LAN_UDP_GROUP, LAN_UDP_PORT, LAN_UDP_TTL, LAN_RETAIN_INTERVAL_SEC
 )
 from .mqtt_client import MqttClient
+from .transport import UdpMulticastTransport
 from .gpio_ctl import GpioController
 from .can_worker import CanWorker
 from .gps_worker import GpsWorker
 from .wifi_monitor import start_wifi_monitor
 from .accel_worker import AccelWorker
+from .accel_filter import AccelFilter
+from .fusion import GpsImuFusion
+from .signal_store import SignalStore, SlotWriter, GPS_FIELDS, ACCEL_FIELDS, FUSION_FIELDS
+from .log_writer import CsvLogWriter, CSV_FIELDNAMES, FUSION_CSV_FIELDNAMES
+from .telemetry_codec import TelemetryCodec, TelemetrySchema
+from .uplink_delta import DeltaFramer, DELTA_GROUPS
+from .uplink_rate import UplinkRateController, drop_signals
+from .uplink_batch import SeriesBatcher
+from .uplink_queue import UplinkQueue
+from .session_log import SessionLogWriter, build_session_groups, build_uplink_groups, can_group_name
 
 # ======== 전역 변수 ========
 exit_event = threading.Event()
 logging_active = False
 last_button_press_time = 0.0
 last_sent_lap = 0
+cpu_sample = (time.monotonic(), time.process_time()) # 상태 표시줄 CPU 사용률 계산용
 
-# 데이터 저장소
-latest_can_data = {}
-latest_gps_data = {}
-latest_acc_data = {}
+# 데이터 저장소 (main()에서 CAN 시그널 테이블로 슬롯을 구성)
+signal_store: SignalStore = None
+can_slots: SlotWriter = None
+gps_slots: SlotWriter = None
+acc_slots: SlotWriter = None
+fusion_slots: SlotWriter = None
 
-# CSV 로깅 관련
-csv_file = None
-csv_writer = None
+# 로깅 관련
+csv_logger: CsvLogWriter = None
+session_log: SessionLogWriter = None
+session_groups = {} # CAN 프레임 ID / "gps" / "accel" -> GroupAppender
+accel_filter: AccelFilter = None # 업링크용 가속도 필터 (비활성 시 None)
+fusion: GpsImuFusion = None # GPS/가속도 융합 필터 (비활성 시 None)
+uplink_codec: TelemetryCodec = None # 바이너리 업링크 인코더 (JSON 모드면 None)
+delta_framers = {} # 업링크 토픽 키("TELEMETRY" 또는 소스) -> 델타 프레이머 (비활성 시 비어 있음)
+uplink_queue: UplinkQueue = None # 연결 끊김 동안의 업링크 디스크 큐 (비활성 시 None)
+rate_controller: UplinkRateController = None # 링크 상태에 따른 업링크 주기/계층 조절 (비활성 시 None)
+series_batcher: SeriesBatcher = None # 업링크 사이 그래프용 시계열 샘플 (비활성 시 None)
+lan_transport: UdpMulticastTransport = None # 같은 LAN의 서버로 직접 보내는 경로 (비활성 시 None)
+last_gps_stamp = 0.0 # GPS 토픽으로 마지막에 보낸 측위의 수신 시각 (새 측위가 있을 때만 발행)
+BACKFILL_TICK_SEC = 0.1
 
 # ======== 콜백 함수들 ========
 def on_can_message(arbitration_id: int, parsed: dict):
-    global latest_can_data
-    latest_can_data.update(parsed)
+    can_slots.update(parsed)
+    group = session_groups.get(arbitration_id)
+    if group:
+        group.append(parsed)
 
 def on_gps_update(parsed: dict):
-    global latest_gps_data
-    latest_gps_data.update(parsed)
+    now = time.monotonic()
+    gps_slots.update(parsed, now)
+    if fusion:
+        fusion.update_gps(parsed, now)
+    group = session_groups.get("gps")
+    if group:
+        group.append(parsed)
 
 def on_accel_update(parsed: dict):
-    global latest_acc_data
-    latest_acc_data.update(parsed)
+    now = time.monotonic()
+    acc_slots.update(parsed, now)
+    if accel_filter:
+        accel_filter.push_sample(now, parsed)
+    if fusion:
+        fusion.push_accel(parsed)
+    group = session_groups.get("accel")
+    if group:
+        group.append(parsed)
+
+def on_accel_block(ts: list, xs: list, ys: list, zs: list):
+    # FIFO 모드: 스토어에는 최신 샘플만, 세션 로그에는 모든 샘플을 각자의 시각으로 기록
+    acc_slots.update({"ax_g": xs[-1], "ay_g": ys[-1], "az_g": zs[-1]}, ts[-1])
+    if accel_filter:
+        accel_filter.push(ts, xs, ys, zs)
+    if fusion:
+        fusion.push_accel_block(xs, ys, zs)
+    group = session_groups.get("accel")
+    if group:
+        for t, x, y, z in zip(ts, xs, ys, zs):
+            group.append({"ax_g": x, "ay_g": y, "az_g": z}, t)
 
 # ======== 핵심 로직 ========
-def toggle_logging_state(gpio: GpioController):
-    global logging_active, csv_file, csv_writer
+def toggle_logging_state(gpio: GpioController, can_worker: CanWorker):
+    global logging_active, csv_logger, session_log, session_groups
     logging_active = not logging_active
     if logging_active:
         gpio.set_logging_led(True)
         os.makedirs(LOG_DIR, exist_ok=True)
-        filename = f"{LOG_DIR}/datalog_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        print(f"\n[INFO] 로깅 시작 -> {filename}")
-        csv_file = open(filename, 'w', newline='', encoding='utf-8')
-        fieldnames = [
-            "Timestamp", "Latitude", "Longitude", "GPS_Speed_KPH", "Satellites", "Altitude_m", "Heading_deg",
-            "RPM","TPS_percent","IAT_C","MAP_kPa","PulseWidth_ms","AnalogIn1_V","AnalogIn2_V","AnalogIn3_V","AnalogIn4_V",
-            "VSS_kmh","Baro_kPa","OilTemp_C","OilPressure_bar","FuelPressure_bar","CLT_C","EOT_OUT", "fuelPumpTemp","IgnAngle_deg","DwellTime_ms",
-            "WBO_Lambda","LambdaCorrection_percent","EGT1_C","EGT2_C","Gear","EmuTemp_C","Batt_V","CEL_Error","Flags1",
-            "Ethanol_percent","DBW_Pos_percent","DBW_Target_percent","TC_drpm_raw","TC_drpm","TC_TorqueReduction_percent",
-            "PitLimit_TorqueReduction_percent","AnalogIn5_V","AnalogIn6_V","OutFlags1","OutFlags2","OutFlags3","OutFlags4",
-            "BoostTarget_kPa","PWM1_DC_percent","DSG_Mode","LambdaTarget","PWM2_DC_percent","FuelUsed_L",
-            "ax_g", "ay_g", "az_g", "gx_dps", "gy_dps", "gz_dps"
-        ]
-        csv_writer = csv.DictWriter(csv_file, fieldnames=fieldnames, extrasaction='ignore')
-        csv_writer.writeheader()
+        session_name = f"{LOG_DIR}/datalog_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        if CAN_CAPTURE_ENABLE:
+            can_worker.start_capture(f"{session_name}.can")
+        if LOG_FORMAT in ("binary", "both"):
+            filename = f"{session_name}.emulog"
+            print(f"\n[INFO] 로깅 시작 -> {filename}")
+            session_log = SessionLogWriter(
+                filename, build_session_groups(can_worker.decoder.signals),
+                chunk_rows=SESSION_CHUNK_ROWS, chunk_sec=SESSION_CHUNK_SEC,
+            )
+            groups = {frame_id: session_log.group(can_group_name(frame_id)) for frame_id in can_worker.decoder.frame_ids}
+            groups["gps"] = session_log.group("gps")
+            groups["accel"] = session_log.group("accel")
+            groups["fusion"] = session_log.group("fusion")
+            session_groups = groups
+        if LOG_FORMAT in ("csv", "both"):
+            filename = f"{session_name}.csv"
+            print(f"\n[INFO] 로깅 시작 -> {filename}")
+            csv_logger = CsvLogWriter(
+                filename, signal_store,
+                fieldnames=CSV_FIELDNAMES + FUSION_CSV_FIELDNAMES if FUSION_ENABLE else CSV_FIELDNAMES,
+                capacity=CSV_RING_CAPACITY,
+                flush_interval=CSV_FLUSH_INTERVAL_SEC,
+                on_flush=gpio.blink_logging_led_once,
+            )
     else:
         print("\n[INFO] 로깅 중지.")
         gpio.set_logging_led(False)
-        if csv_file:
-            name = csv_file.name
-            csv_file.close()
-            print(f"[INFO] 로그 파일 저장 완료: {name}")
-        csv_file = None
-        csv_writer = None
-
-def write_csv_log_entry(gpio: GpioController):
-    if not logging_active or not csv_writer:
-        return
-    full_row = { "Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")}
-    full_row.update(latest_gps_data)
-    full_row.update(latest_can_data)
-    full_row.update(latest_acc_data)
-    csv_writer.writerow(full_row)
-    gpio.blink_logging_led_once()
-
-def print_status_line():
-    global last_sent_lap
-    gps_status = "OK" if latest_gps_data.get("gps_fix") else "No Fix"
-    rpm = latest_can_data.get('RPM', 0)
-    vss = latest_can_data.get('VSS_kmh', 0.0)
+        can_worker.stop_capture()
+        session_groups = {}
+        log, session_log = session_log, None
+        if log:
+            log.close()
+        logger, csv_logger = csv_logger, None
+        if logger:
+            logger.close()
+
+def push_csv_row():
+    logger = csv_logger
+    if logger:
+        logger.push(time.time(), signal_store.snapshot())
+
+def fusion_tick():
+    out = fusion.step()
+    if out:
+        fusion_slots.update(out)
+        group = session_groups.get("fusion")
+        if group:
+            group.append(out)
+
+def periodic_thread(func, period: float, stop_event: threading.Event):
+    """stop_event가 설정될 때까지 누적 지연 없이 period 간격으로 func()를 호출합니다."""
+    next_time = time.monotonic()
+    while not stop_event.is_set():
+        func()
+        next_time += period
+        delay = next_time - time.monotonic()
+        if delay > 0:
+            stop_event.wait(delay)
+        else:
+            next_time = time.monotonic()
+
+def poll_button(gpio: GpioController, can_worker: CanWorker):
+    global last_button_press_time
+    now = time.time()
+    if gpio.read_button_pressed() and (now - last_button_press_time > 0.3):
+        last_button_press_time = now
+        toggle_logging_state(gpio, can_worker)
+
+def print_status_line(can_worker: CanWorker):
+    global last_sent_lap, cpu_sample
+    now, cpu = time.monotonic(), time.process_time()
+    cpu_percent = (cpu - cpu_sample[1]) / max(now - cpu_sample[0], 1e-6) * 100
+    cpu_sample = (now, cpu)
+    gps_status = "OK" if signal_store.get("gps_fix") else "No Fix"
+    rpm = signal_store.get('RPM', 0)
+    vss = signal_store.get('VSS_kmh', 0.0)
     logging_status = "ON" if logging_active else "OFF"
+    logger = csv_logger
+    if logger:
+        logging_status += f" {logger.rows_per_sec:.0f}r/s drop:{logger.rows_dropped}"
+    can_stats = can_worker.get_stats()
     status_text = (
         f"RPM:{rpm:>5} | VSS:{vss:>5.1f}km/h | GPS:{gps_status} | Logging:{logging_status} | Lap Sent:{last_sent_lap}"
+        f" | CAN rx:{can_stats['received']} flt:{can_stats['filtered']} ovr:{can_stats['overruns']}"
+        f" | CPU:{cpu_percent:>4.0f}%"
     )
+    if rate_controller and rate_controller.level:
+        status_text += f" | UL:L{rate_controller.level} {rate_controller.latency * 1000:.0f}ms"
+    if uplink_queue and uplink_queue.depth:
+        q = uplink_queue.stats()
+        status_text += f" | Q:{q['queue_depth']} {q['backlog_age_s']:.0f}s {q['replay_rate']:.0f}/s"
     sys.stdout.write("\r" + status_text + "    ")
     sys.stdout.flush()
 
+def build_trace(snap, seq: int, groups=("can", "gps", "accel")) -> dict:
+    """지연 시간 추적용 타임스탬프 (벽시계 기준, 서버와 NTP로 동기화되어 있다고 가정)."""
+    now_wall = time.time()
+    offset = now_wall - time.monotonic()
+    rx = {}
+    for group in ("can", "gps", "accel"):
+        if group not in groups:
+            continue
+        stamp = snap.group_stamp(group)
+        if stamp:
+            rx[group] = stamp + offset
+    return {'seq': seq, 'rx': rx, 'pub': now_wall}
+
+def encode_uplink(data: dict):
+    """바이너리 모드면 스키마로 패킹하고, 패킹할 수 없는 값이 있으면 그 메시지만 JSON으로 보냅니다."""
+    if uplink_codec is not None:
+        try:
+            return uplink_codec.encode(data)
+        except struct.error as e:
+            print(f"\n[MQTT] 바이너리 인코딩 실패, JSON으로 전송: {e}")
+    return json.dumps(data)
+
+def uplink_sources() -> tuple:
+    """발행할 업링크 토픽 키: 소스별 토픽 모드면 CAN/GPS/ACCEL, 아니면 통합 TELEMETRY 하나"""
+    return tuple(MQTT_SOURCE_GROUPS) if MQTT_SOURCE_TOPICS_ENABLE else ("TELEMETRY",)
+
+def publish_uplink(mqtt: MqttClient, topic: str, payload, retain: bool = False, qos: int = 0) -> bool:
+    """LAN 경로가 있으면 먼저 보내고(지연이 짧은 쪽) MQTT로도 보냅니다. 반환값은 MQTT 발행 결과 (큐/속도 제어 기준)."""
+    if lan_transport:
+        lan_transport.publish(topic, payload, retain=retain)
+    return mqtt.publish(topic, payload, retain=retain, qos=qos)
+
+def publish_telemetry(mqtt: MqttClient, seq: int, source: str = "TELEMETRY") -> bool:
+    """
+    source 토픽에 해당하는 그룹만 모아 발행합니다 (seq 는 토픽별 일련번호).
+    보낼 것이 없어 건너뛰면 False: 호출하는 쪽은 seq 를 쓰지 않고 다음에 재사용합니다
+    (빈 번호가 생기면 서버가 델타 유실로 보고 키프레임을 요청하므로).
+    """
+    global last_gps_stamp
+    groups = MQTT_SOURCE_GROUPS.get(source, DELTA_GROUPS)
+    topic = MQTT_TOPICS[source]
+    snap = signal_store.snapshot()
+    if not snap.has_data():
+        return False
+    if source == "GPS":
+        stamp = snap.group_stamp("gps")
+        if not stamp or stamp == last_gps_stamp:
+            return False
+        last_gps_stamp = stamp
+    data_to_publish = {'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]}
+    for group in groups:
+        if group == "accel":
+            # 필터가 있으면 지난 업링크 이후 구간의 통계(평균/피크/RMS/합성 g)를, 없으면 최신 샘플을 보낸다
+            accel = accel_filter.drain_stats() if accel_filter else None
+            data_to_publish[group] = accel or snap.group_dict(group)
+        else:
+            data_to_publish[group] = snap.group_dict(group)
+    data_to_publish['trace'] = build_trace(snap, seq, groups)
+    if not any(data_to_publish[group] for group in groups):
+        return False
+    series = series_batcher.drain() if series_batcher and "can" in groups else None
+    if series:
+        data_to_publish['series'] = series
+    framer = delta_framers.get(source)
+    if uplink_queue:
+        q = uplink_queue.stats()
+        if source == "TELEMETRY" and (q["queue_depth"] or q["replay_rate"] >= 0.5):
+            data_to_publish['backlog'] = q # 소스별 토픽 모드에서는 STATUS 로
+        if not mqtt.is_connected():
+            # 끊긴 동안은 델타가 아닌 전체 프레임을 저장하고, 재연결 후 첫 실시간 프레임은 키프레임으로
+            # (LAN 경로에는 같은 전체 프레임을 그대로 보냄)
+            payload = encode_uplink(data_to_publish)
+            uplink_queue.push(topic, payload)
+            if lan_transport:
+                lan_transport.publish(topic, payload)
+            if framer:
+                framer.request_keyframe()
+            return True
+    omit, qos = frozenset(), 0
+    if rate_controller:
+        # 실시간 업링크를 QoS 1로 보내 PUBACK 지연과 미확인 수로 단계를 정하고, 낮은 계층부터 뺀다
+        rate_controller.update(max(mqtt.ack_latency, mqtt.oldest_inflight_age()), mqtt.inflight)
+        if source == "TELEMETRY" and rate_controller.level:
+            data_to_publish['link'] = rate_controller.stats()
+        omit, qos = rate_controller.omitted(data_to_publish, groups, key=source), 1
+        if series and omit:
+            data_to_publish['series'] = dict(series, values={k: v for k, v in series['values'].items() if k not in omit})
+    if framer:
+        framed = framer.frame(data_to_publish, omit=omit)
+    else:
+        framed = drop_signals(data_to_publish, groups, omit)
+    if not publish_uplink(mqtt, topic, encode_uplink(framed), qos=qos) and uplink_queue:
+        uplink_queue.push(topic, encode_uplink(data_to_publish))
+        if framer:
+            framer.request_keyframe()
+    return True
+
+def source_interval(source: str) -> float:
+    """업링크 토픽별 발행 주기. 속도 제어 단계가 내려가면 모든 소스 주기를 같은 비율로 늘립니다."""
+    if source not in MQTT_SOURCE_RATES_HZ:
+        return uplink_interval()
+    period = 1.0 / MQTT_SOURCE_RATES_HZ[source]
+    return period * rate_controller.scale if rate_controller else period
+
+def build_status(can_worker: CanWorker, online: bool = True) -> dict:
+    """STATUS 토픽 (retained) 내용: 새 구독자가 바로 받는 Pi 상태 요약"""
+    status = {
+        'online': online,
+        'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
+        'pub': time.time(),
+    }
+    if not online:
+        return status
+    status.update({
+        'logging': logging_active,
+        'lap_sent': last_sent_lap,
+        'gps_fix': bool(signal_store.get("gps_fix")),
+        'can': can_worker.get_stats(),
+        'sources': {source: round(1.0 / source_interval(source), 2) for source in uplink_sources()},
+    })
+    if rate_controller:
+        status['link'] = rate_controller.stats()
+    if uplink_queue:
+        status['backlog'] = uplink_queue.stats()
+    if lan_transport:
+        status['lan'] = {'sent': lan_transport.sent, 'errors': lan_transport.errors}
+    return status
+
+def publish_status(mqtt: MqttClient, can_worker: CanWorker):
+    publish_uplink(mqtt, MQTT_TOPICS["STATUS"], build_status(can_worker), retain=True)
+
+def history_topic(topic: str) -> str:
+    return f"{MQTT_TOPICS['HISTORY']}/{topic.rsplit('/', 1)[-1]}"
+
+def backfill_tick(mqtt: MqttClient):
+    """연결되어 있으면 큐에 쌓인 메시지를 HISTORY 토픽으로 MQTT_BACKFILL_RATE_HZ 이하로 재전송 (실시간 업링크 우선)"""
+    if not uplink_queue.depth or not mqtt.is_connected():
+        return
+    if rate_controller and rate_controller.level:
+        return # 링크가 혼잡하면 실시간 업링크에 양보
+    batch = max(1, round(MQTT_BACKFILL_RATE_HZ * BACKFILL_TICK_SEC))
+    # 행은 PUBACK 을 받은 뒤에 지움 (paho 큐에 들어간 것만으로는 전달 보장이 없음)
+    uplink_queue.drain(lambda topic, payload, on_ack: mqtt.publish(history_topic(topic), payload, qos=1, on_ack=on_ack), batch)
+
 def mqtt_uploader(mqtt: MqttClient, stop_event: threading.Event):
+    """업링크 토픽마다 자기 주기로 발행 (한 스레드에서 다음 발행 시각이 된 토픽부터 처리)"""
+    seqs = dict.fromkeys(uplink_sources(), 0)
+    next_times = dict.fromkeys(seqs, time.monotonic())
     while not stop_event.is_set():
-        data_to_publish = {
-            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
-            'can': latest_can_data,
-            'gps': latest_gps_data,
-            'accel': latest_acc_data
-        }
-        if latest_can_data or latest_gps_data or latest_acc_data:
-            mqtt.publish(MQTT_TOPICS["TELEMETRY"], json.dumps(data_to_publish))
-        stop_event.wait(MQTT_UPLOAD_INTERVAL_SEC)
+        now = time.monotonic()
+        for source, next_time in next_times.items():
+            if next_time > now:
+                continue
+            if publish_telemetry(mqtt, seqs[source] + 1, source):
+                seqs[source] += 1
+            next_time += source_interval(source)
+            next_times[source] = next_time if next_time > now else now
+        stop_event.wait(max(0.0, min(next_times.values()) - time.monotonic()))
+
+def uplink_interval() -> float:
+    return rate_controller.interval if rate_controller else MQTT_UPLOAD_INTERVAL_SEC
 
 def handle_exit(signum, frame):
     print("\n[INFO] 종료 신호 수신. 리소스를 정리합니다...")
     exit_event.set()
 
-def worker_loop(worker, stop_event: threading.Event):
-    method_name = "recv_once" if hasattr(worker, "recv_once") else "read_once"
+def worker_loop(worker, stop_event: threading.Event, idle_sec: float = 0.001):
+    # recv_batch가 있는 Worker는 수신 대기 후 큐를 한 번에 비우므로 idle_sec=0으로 실행
+    for method_name in ("recv_batch", "recv_once", "read_once"):
+        if hasattr(worker, method_name):
+            break
     read_method = getattr(worker, method_name)
     while not stop_event.is_set():
         try:
@@ -130,11 +396,14 @@ def worker_loop(worker, stop_event: threading.Event):
             print(f"\n[ERROR] {type(worker).__name__} 스레드에서 오류 발생: {e}", file=sys.stderr)
             if isinstance(e, (IOError, OSError)):
                 break
-        time.sleep(0.001)
+        if idle_sec:
+            time.sleep(idle_sec)
 
 def main():
     """메인 실행 함수"""
     global last_button_press_time, last_sent_lap
+    global signal_store, can_slots, gps_slots, acc_slots, fusion_slots, accel_filter, fusion, uplink_codec
+    global uplink_queue, rate_controller, series_batcher, lan_transport
 
     if os.geteuid() != 0:
         print("오류: 이 스크립트는 sudo 권한으로 실행해야 합니다.")
@@ -146,9 +415,74 @@ def main():
     # --- 초기화 ---
     gpio = GpioController()
     mqtt_client = MqttClient(broker_address=MQTT_BROKER, port=MQTT_PORT)
-    can_worker = CanWorker(on_message=on_can_message)
-    gps_worker = GpsWorker(port=SERIAL_PORT, baudrate=BAUD_RATE, on_update=on_gps_update)
-    accel_worker = AccelWorker(on_update=on_accel_update)
+    can_worker = CanWorker(
+        on_message=on_can_message,
+        kernel_filter=CAN_KERNEL_FILTER and not CAN_CAPTURE_ENABLE,
+        decode=CAN_CAPTURE_DECODE or not CAN_CAPTURE_ENABLE,
+    )
+    gps_worker = GpsWorker(
+        port=SERIAL_PORT, baudrate=BAUD_RATE, on_update=on_gps_update, debug_raw=GPS_DEBUG_RAW,
+        use_ubx=GPS_USE_UBX, ubx_baud=GPS_UBX_BAUD, ubx_rate_hz=GPS_UBX_RATE_HZ,
+    )
+    if ACCEL_FIFO_ENABLE:
+        accel_worker = AccelWorker(
+            fifo=True, rate_code=ACCEL_FIFO_RATE_CODE, watermark=ACCEL_FIFO_WATERMARK,
+            gpio=gpio if ACCEL_USE_INT else None, on_block=on_accel_block,
+        )
+    else:
+        accel_worker = AccelWorker(on_update=on_accel_update)
+
+    signal_store = SignalStore({
+        "can": [sig.name for sig in can_worker.decoder.signals],
+        "gps": GPS_FIELDS,
+        "accel": ACCEL_FIELDS,
+        "fusion": FUSION_FIELDS,
+    })
+    can_slots = signal_store.writer("can")
+    gps_slots = signal_store.writer("gps")
+    acc_slots = signal_store.writer("accel")
+    fusion_slots = signal_store.writer("fusion")
+    if FUSION_ENABLE:
+        fusion = GpsImuFusion(
+            forward_axis=FUSION_FORWARD_AXIS, left_axis=FUSION_LEFT_AXIS,
+            accel_noise=FUSION_ACCEL_NOISE,
+            gps_pos_std=FUSION_GPS_POS_STD_M, gps_vel_std=FUSION_GPS_VEL_STD_MS,
+        )
+    if LAN_UDP_ENABLE:
+        try:
+            lan_transport = UdpMulticastTransport(LAN_UDP_GROUP, LAN_UDP_PORT, ttl=LAN_UDP_TTL,
+                                                  retain_interval=LAN_RETAIN_INTERVAL_SEC)
+            print(f"[INFO] LAN 직접 업링크: udp://{LAN_UDP_GROUP}:{LAN_UDP_PORT} (MQTT와 병행)")
+        except OSError as e:
+            print(f"[WARNING] LAN 업링크 소켓을 열 수 없습니다. MQTT만 사용합니다: {e}")
+    if MQTT_PAYLOAD_FORMAT == "binary":
+        schema = TelemetrySchema(build_uplink_groups(can_worker.decoder.signals))
+        try:
+            uplink_codec = TelemetryCodec(schema, zstd_level=MQTT_ZSTD_LEVEL)
+        except RuntimeError as e:
+            print(f"[WARNING] {e} (압축 없이 전송)")
+            uplink_codec = TelemetryCodec(schema)
+        # 서버가 메시지 헤더의 스키마 ID로 디코딩할 수 있도록 retained 로 발행 (재연결 시 자동 재발행)
+        publish_uplink(mqtt_client, MQTT_TOPICS["SCHEMA"], schema.json, retain=True)
+        print(f"[MQTT] 바이너리 업링크 스키마 {schema.id:08x} ({sum(len(c) for _, c in schema.groups)}개 시그널)")
+    if MQTT_DELTA_ENABLE:
+        # 토픽마다 따로 (한 토픽의 키프레임이 다른 토픽의 기준 값을 바꾸지 않도록)
+        for source in uplink_sources():
+            delta_framers[source] = DeltaFramer(
+                MQTT_DELTA_DEADBANDS, keyframe_interval=MQTT_KEYFRAME_INTERVAL_SEC,
+                groups=MQTT_SOURCE_GROUPS.get(source, DELTA_GROUPS),
+            )
+    if MQTT_QUEUE_ENABLE:
+        uplink_queue = UplinkQueue(MQTT_QUEUE_PATH, max_bytes=MQTT_QUEUE_MAX_MB * 1024 * 1024)
+    if MQTT_RATE_CONTROL_ENABLE:
+        rate_controller = UplinkRateController(
+            MQTT_PRIORITY_TIERS, MQTT_RATE_LEVELS,
+            degrade_latency=MQTT_RATE_DEGRADE_LATENCY_MS / 1000, recover_latency=MQTT_RATE_RECOVER_LATENCY_MS / 1000,
+            max_inflight=MQTT_RATE_MAX_INFLIGHT, recover_sec=MQTT_RATE_RECOVER_SEC,
+        )
+    if MQTT_BATCH_ENABLE:
+        # 업링크가 늦어져도 최근 10초만 유지
+        series_batcher = SeriesBatcher(MQTT_BATCH_SIGNALS, signal_store.get, max_rows=int(MQTT_BATCH_RATE_HZ * 10))
 
     # --- main 함수 내부에 관련 함수들을 정의하여 can_worker에 쉽게 접근 ---
     def send_lap_to_adu(lap: int):
@@ -174,13 +508,25 @@ def main():
                     send_lap_to_adu(lap_count)
             except Exception as e:
                 print(f"\n[MQTT] 랩 카운트 메시지 처리 오류: {e}")
+        elif topic == MQTT_TOPICS["COMMAND_KEYFRAME"] and delta_framers:
+            # 서버가 상태를 잃었음 (재시작, 델타 유실) -> 다음 업링크를 키프레임으로 (source 가 없으면 모든 토픽)
+            try:
+                source = json.loads(payload).get("source")
+            except (ValueError, AttributeError):
+                source = None
+            for key, framer in delta_framers.items():
+                if source in (None, key):
+                    framer.request_keyframe()
 
     # MQTT 클라이언트 콜백 및 구독 설정
     mqtt_client.client.on_message = on_mqtt_message
+    mqtt_client.set_will(MQTT_TOPICS["STATUS"], build_status(can_worker, online=False))
     mqtt_client.connect()
     command_topic = MQTT_TOPICS.get("COMMAND_LAP", "vehicle/command/lap")
     mqtt_client.client.subscribe(command_topic)
     print(f"[MQTT] 랩 카운트 명령 구독 시작. Topic: {command_topic}")
+    if delta_framers:
+        mqtt_client.client.subscribe(MQTT_TOPICS["COMMAND_KEYFRAME"])
 
     # --- Worker 시작 ---
     try:
@@ -192,64 +538,201 @@ def main():
         gpio.set_error_led(True)
         exit_event.set()
         return
+    if ACCEL_FILTER_ENABLE:
+        # 필터는 부가 기능이므로 numpy 가 없으면 경고만 하고 최신 샘플을 그대로 보낸다
+        rate_hz = accel_worker.rate_hz if accel_worker.fifo else 1.0 / ACCEL_POLL_INTERVAL_SEC
+        try:
+            accel_filter = AccelFilter(rate_hz, ACCEL_LPF_CUTOFF_HZ, ACCEL_DECIMATION, ACCEL_LPF_TAPS)
+        except RuntimeError as e:
+            print(f"[WARNING] 가속도 필터 비활성: {e}")
+            accel_filter = None
+
+    # --- 스크립트 실행 시 로깅 자동 시작 ---
+    print("\n[INFO] 데이터 로깅을 자동으로 시작합니다.")
+    toggle_logging_state(gpio, can_worker)
+
+    try:
+        if RUNTIME == "asyncio":
+            asyncio.run(run_async(gpio, mqtt_client, can_worker, gps_worker, accel_worker))
+        else:
+            run_threaded(gpio, mqtt_client, can_worker, gps_worker, accel_worker)
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    except Exception as e:
+        print(f"\n[FATAL] 메인 루프에서 심각한 오류 발생: {e}", file=sys.stderr)
+        gpio.set_error_led(True)
+    finally:
+        exit_event.set()
+        print("\n[INFO] 모든 스레드와 Worker를 종료합니다.")
+        can_worker.shutdown()
+        gps_worker.shutdown()
+        accel_worker.shutdown()
+        mqtt_client.publish(MQTT_TOPICS["STATUS"], build_status(can_worker, online=False), retain=True)
+        mqtt_client.disconnect()
+        if lan_transport:
+            lan_transport.disconnect()
+        if uplink_queue:
+            uplink_queue.close()
+        if csv_logger:
+            csv_logger.close()
+        if session_log:
+            session_log.close()
+        gpio.cleanup()
+        print("[INFO] 프로그램이 완전히 종료되었습니다.")
 
+def run_threaded(gpio, mqtt_client, can_worker, gps_worker, accel_worker):
+    """Worker마다 스레드를 두고 메인 스레드가 버튼/상태 표시를 폴링하는 기존 실행 방식"""
     # --- 스레드 생성 ---
     wifi_monitor_thread = threading.Thread(target=start_wifi_monitor, args=(gpio, exit_event), daemon=True)
     mqtt_thread = threading.Thread(target=mqtt_uploader, args=(mqtt_client, exit_event), daemon=True)
-    can_thread = threading.Thread(target=worker_loop, args=(can_worker, exit_event), daemon=True)
+    status_thread = threading.Thread(
+        target=periodic_thread, args=(lambda: publish_status(mqtt_client, can_worker), MQTT_STATUS_INTERVAL_SEC, exit_event),
+        daemon=True)
+    can_thread = threading.Thread(target=worker_loop, args=(can_worker, exit_event, 0), daemon=True)
     gps_thread = threading.Thread(target=worker_loop, args=(gps_worker, exit_event), daemon=True)
-    accel_thread = threading.Thread(target=worker_loop, args=(accel_worker, exit_event), daemon=True)
+    # FIFO 모드: 인터럽트 사용 시 read_once가 INT1을 기다리므로 0, 폴링이면 워터마크 절반 주기로
+    # 단일 샘플 모드는 필터의 샘플링 주기와 맞도록 ACCEL_POLL_INTERVAL_SEC 간격으로 읽는다
+    accel_idle = 0 if accel_worker.gpio else accel_worker.poll_interval if accel_worker.fifo else ACCEL_POLL_INTERVAL_SEC
+    accel_thread = threading.Thread(target=worker_loop, args=(accel_worker, exit_event, accel_idle), daemon=True)
+    csv_thread = threading.Thread(target=periodic_thread, args=(push_csv_row, 1.0 / CSV_LOG_RATE_HZ, exit_event), daemon=True)
+    fusion_thread = threading.Thread(target=periodic_thread, args=(fusion_tick, 1.0 / FUSION_RATE_HZ, exit_event), daemon=True)
+    batch_thread = threading.Thread(
+        target=periodic_thread, args=(lambda: series_batcher.sample(), 1.0 / MQTT_BATCH_RATE_HZ, exit_event), daemon=True)
+    backfill_thread = threading.Thread(
+        target=periodic_thread, args=(lambda: backfill_tick(mqtt_client), BACKFILL_TICK_SEC, exit_event), daemon=True)
 
     # --- 스레드 시작 ---
     wifi_monitor_thread.start()
     mqtt_thread.start()
-    print(f"MQTT 업로드 스레드 시작 (Interval: {MQTT_UPLOAD_INTERVAL_SEC}s)")
+    intervals = ", ".join(f"{source} {source_interval(source):.2f}s" for source in uplink_sources())
+    print(f"MQTT 업로드 스레드 시작 ({intervals}{', 링크 상태에 따라 조절' if rate_controller else ''})")
+    status_thread.start()
     can_thread.start()
     gps_thread.start()
     accel_thread.start()
     print("데이터 수집 스레드 시작 (CAN, GPS, ACCEL)")
-
-    # --- 스크립트 실행 시 로깅 자동 시작 ---
-    print("\n[INFO] 데이터 로깅을 자동으로 시작합니다.")
-    toggle_logging_state(gpio)
+    csv_thread.start()
+    print(f"CSV 로깅 스레드 시작 ({CSV_LOG_RATE_HZ}Hz)")
+    if fusion:
+        fusion_thread.start()
+        print(f"GPS/가속도 융합 스레드 시작 ({FUSION_RATE_HZ}Hz)")
+    if series_batcher:
+        batch_thread.start()
+        print(f"업링크 시계열 샘플링 스레드 시작 ({MQTT_BATCH_RATE_HZ}Hz)")
+    if uplink_queue:
+        backfill_thread.start()
+        print(f"업링크 재전송 스레드 시작 (최대 {MQTT_BACKFILL_RATE_HZ} msg/s)")
 
     if not exit_event.is_set():
         print("\n[INFO] 데이터 수집이 시작되었습니다. 버튼을 눌러 로깅을 중지/재시작할 수 있습니다. (종료: Ctrl+C)")
 
     # --- 메인 루프 ---
-    last_csv_write_time = 0.0
     try:
         while not exit_event.is_set():
-            now = time.time()
-            if gpio.read_button_pressed() and (now - last_button_press_time > 0.3):
-                last_button_press_time = now
-                toggle_logging_state(gpio)
-            if logging_active and (now - last_csv_write_time > 0.05):
-                write_csv_log_entry(gpio)
-                last_csv_write_time = now
-            print_status_line()
+            poll_button(gpio, can_worker)
+            print_status_line(can_worker)
             time.sleep(0.05)
-    except (KeyboardInterrupt, SystemExit):
-        pass
-    except Exception as e:
-        print(f"\n[FATAL] 메인 루프에서 심각한 오류 발생: {e}", file=sys.stderr)
-        gpio.set_error_led(True)
     finally:
         exit_event.set()
-        print("\n[INFO] 모든 스레드와 Worker를 종료합니다.")
         can_thread.join(timeout=0.5)
         gps_thread.join(timeout=0.5)
         accel_thread.join(timeout=0.5)
         mqtt_thread.join(timeout=0.5)
-        can_worker.shutdown()
-        gps_worker.shutdown()
-        accel_worker.shutdown()
-        mqtt_client.disconnect()
-        if csv_file and not csv_file.closed:
-            csv_file.close()
-            print(f"[INFO] 로그 파일 저장 완료: {csv_file.name}")
-        gpio.cleanup()
-        print("[INFO] 프로그램이 완전히 종료되었습니다.")
+        status_thread.join(timeout=0.5)
+        csv_thread.join(timeout=0.5)
+        if fusion_thread.is_alive():
+            fusion_thread.join(timeout=0.5)
+        if backfill_thread.is_alive():
+            backfill_thread.join(timeout=0.5)
+        if batch_thread.is_alive():
+            batch_thread.join(timeout=0.5)
+
+# ======== asyncio 런타임 ========
+async def periodic(func, period: float, *args):
+    """누적 지연 없이 period 간격으로 func(*args)를 호출합니다."""
+    loop = asyncio.get_running_loop()
+    next_time = loop.time()
+    while True:
+        func(*args)
+        next_time += period
+        delay = next_time - loop.time()
+        if delay <= 0:
+            next_time = loop.time()
+            delay = 0
+        await asyncio.sleep(delay)
+
+async def uplink_task(mqtt: MqttClient, source: str = "TELEMETRY"):
+    """periodic()과 같지만 주기가 속도 제어 단계에 따라 바뀝니다 (업링크 토픽마다 하나씩)."""
+    loop = asyncio.get_running_loop()
+    next_time = loop.time()
+    seq = 1
+    while True:
+        if publish_telemetry(mqtt, seq, source):
+            seq += 1
+        next_time += source_interval(source)
+        delay = next_time - loop.time()
+        if delay <= 0:
+            next_time = loop.time()
+            delay = 0
+        await asyncio.sleep(delay)
+
+async def wifi_monitor_task(gpio: GpioController, interval: float = 10.0):
+    while True:
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection("8.8.8.8", 53), timeout=2)
+            writer.close()
+            gpio.set_wifi_led(True)
+        except (OSError, asyncio.TimeoutError):
+            gpio.set_wifi_led(False)
+        await asyncio.sleep(interval)
+
+def _report_task_error(task: asyncio.Task):
+    if not task.cancelled() and task.exception():
+        print(f"\n[ERROR] 비동기 작업 {task.get_name()} 오류: {task.exception()}", file=sys.stderr)
+
+async def run_async(gpio, mqtt_client, can_worker, gps_worker, accel_worker):
+    """하나의 이벤트 루프에서 CAN/GPS/가속도 수신과 로깅, 업링크, 상태 표시를 모두 스케줄링합니다."""
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+
+    def request_stop():
+        exit_event.set()
+        stop.set()
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, request_stop)
+
+    def main_tick():
+        poll_button(gpio, can_worker)
+        print_status_line(can_worker)
+
+    tasks = [
+        asyncio.create_task(can_worker.run_async(), name="can"),
+        asyncio.create_task(gps_worker.run_async(), name="gps"),
+        asyncio.create_task(accel_worker.run_async(ACCEL_POLL_INTERVAL_SEC), name="accel"),
+        asyncio.create_task(periodic(publish_status, MQTT_STATUS_INTERVAL_SEC, mqtt_client, can_worker), name="status"),
+        asyncio.create_task(periodic(push_csv_row, 1.0 / CSV_LOG_RATE_HZ), name="csv"),
+        asyncio.create_task(periodic(main_tick, 0.05), name="main"),
+        asyncio.create_task(wifi_monitor_task(gpio), name="wifi"),
+    ]
+    for source in uplink_sources():
+        tasks.append(asyncio.create_task(uplink_task(mqtt_client, source), name=f"uplink_{source.lower()}"))
+    if fusion:
+        tasks.append(asyncio.create_task(periodic(fusion_tick, 1.0 / FUSION_RATE_HZ), name="fusion"))
+    if series_batcher:
+        tasks.append(asyncio.create_task(periodic(series_batcher.sample, 1.0 / MQTT_BATCH_RATE_HZ), name="batch"))
+    if uplink_queue:
+        tasks.append(asyncio.create_task(periodic(backfill_tick, BACKFILL_TICK_SEC, mqtt_client), name="backfill"))
+    for task in tasks:
+        task.add_done_callback(_report_task_error)
+    print("[INFO] asyncio 런타임 시작 (CAN, GPS, ACCEL, 업링크, 로깅). (종료: Ctrl+C)")
+
+    try:
+        await stop.wait()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
 
 if __name__ == "__main__":
     main()
@@ -1,23 +1,82 @@
 import paho.mqtt.client as mqtt
 import json
+import time
+import threading
 
-class MqttClient:
-    """MQTT 통신을 관리하는 클라이언트 클래스"""
+from .transport import Transport
+
+EARLY_ACK_TTL_SEC = 5.0 # 짝이 없는 on_publish 기록 보관 시간 (QoS 0 발행, 재연결 시 retained 재발행 등)
+
+class MqttClient(Transport):
+    """MQTT 통신을 관리하는 클라이언트 클래스 (브로커 경유 업링크 경로, LAN 경로가 없을 때의 기본/대체 경로)"""
+    name = "mqtt"
     def __init__(self, broker_address="localhost", port=1883):
         self.broker_address = broker_address
         self.port = port
         self.client = mqtt.Client()
         self.client.on_connect = self._on_connect
         self.client.on_disconnect = self._on_disconnect
+        self.client.on_publish = self._on_publish
+        self._retained = {} # 토픽 -> 마지막 retained 페이로드 (재연결 시 다시 발행)
+        # QoS 1 발행의 PUBACK 지연 추적 (업링크 속도 제어용)
+        self._ack_lock = threading.Lock()
+        self._pending = {} # mid -> 발행 시각
+        self._early_acks = {} # publish()가 mid를 돌려주기 전에 도착한 PUBACK
+        self._ack_callbacks = {} # mid -> PUBACK 수신 시 호출할 함수 (publish(on_ack=...))
+        self.ack_latency = 0.0 # PUBACK 지연 지수 평균 (s)
+        self.ack_count = 0
 
     def _on_connect(self, client, userdata, flags, rc):
         if rc == 0:
             print("[INFO] MQTT 브로커에 연결되었습니다.")
+            for topic, payload in list(self._retained.items()):
+                client.publish(topic, payload, retain=True)
         else:
             print(f"[ERROR] MQTT 연결 실패 (Code: {rc})")
 
     def _on_disconnect(self, client, userdata, rc):
         print("[INFO] MQTT 브로커와의 연결이 끊어졌습니다.")
+        with self._ack_lock:
+            self._pending.clear() # clean session: 미확인 메시지는 다시 오지 않음
+            self._early_acks.clear()
+            self._ack_callbacks.clear() # 확인되지 않은 채 남음 (호출한 쪽이 시간 초과로 다시 보냄)
+
+    def _on_publish(self, client, userdata, mid):
+        # paho가 내부 락을 쥔 채 호출하므로 publish() 호출 중에는 _ack_lock 을 잡지 않는다 (교착 방지)
+        now = time.monotonic()
+        with self._ack_lock:
+            sent = self._pending.pop(mid, None)
+            callback = self._ack_callbacks.pop(mid, None)
+            if sent is not None:
+                self._record_ack(now - sent)
+            else:
+                # QoS 0 발행도 on_publish 가 오므로, 오래된 기록은 버려 mid 가 한 바퀴 돈 뒤 잘못 짝지어지지 않게 함
+                if len(self._early_acks) > 64:
+                    self._early_acks = {m: t for m, t in self._early_acks.items() if now - t < EARLY_ACK_TTL_SEC}
+                self._early_acks[mid] = now
+        if callback:
+            callback()
+
+    def _record_ack(self, latency: float):
+        self.ack_count += 1
+        self.ack_latency += 0.2 * (latency - self.ack_latency) if self.ack_count > 1 else latency
+
+    @property
+    def inflight(self) -> int:
+        """PUBACK을 기다리는 QoS 1 메시지 수"""
+        return len(self._pending)
+
+    def oldest_inflight_age(self) -> float:
+        """가장 오래 기다리는 미확인 메시지의 경과 시간 (s). 링크가 멈추면 PUBACK 평균보다 먼저 늘어난다."""
+        with self._ack_lock:
+            oldest = min(self._pending.values(), default=None)
+        return time.monotonic() - oldest if oldest is not None else 0.0
+
+    def set_will(self, topic, payload, retain=True):
+        """비정상 종료 시 브로커가 대신 발행할 메시지 (connect() 전에 호출)"""
+        if isinstance(payload, dict):
+            payload = json.dumps(payload)
+        self.client.will_set(topic, payload, qos=1, retain=retain)
 
     def connect(self):
         """브로커에 연결을 시도합니다."""
@@ -27,16 +86,42 @@ class MqttClient:
         except Exception as e:
             print(f"[ERROR] MQTT 브로커에 연결할 수 없습니다: {e}")
 
-    def publish(self, topic, payload):
-        """지정된 토픽으로 데이터를 발행합니다."""
-        if not self.client.is_connected():
-            # print("[WARNING] MQTT가 연결되지 않아 데이터를 발행할 수 없습니다.")
-            return
+    def is_connected(self) -> bool:
+        return self.client.is_connected()
 
+    def publish(self, topic, payload, retain=False, qos=0, on_ack=None) -> bool:
+        """
+        지정된 토픽으로 데이터를 발행합니다. retain 메시지는 기억해 두었다가 (재)연결 시 다시 발행합니다.
+        연결되어 있지 않거나 paho가 발행을 거부하면 False를 반환합니다.
+        on_ack: QoS 1 이상에서 브로커가 수신을 확인(PUBACK)하면 호출 (True 반환은 paho 큐에 들어갔다는 뜻일 뿐).
+        """
         if isinstance(payload, dict):
             payload = json.dumps(payload) # dict를 JSON 문자열로 변환
+        if retain:
+            self._retained[topic] = payload
+
+        if not self.client.is_connected():
+            # print("[WARNING] MQTT가 연결되지 않아 데이터를 발행할 수 없습니다.")
+            return False
 
-        self.client.publish(topic, payload)
+        sent = time.monotonic()
+        info = self.client.publish(topic, payload, qos=qos, retain=retain)
+        if info.rc != mqtt.MQTT_ERR_SUCCESS:
+            return False
+        acked_early = False
+        with self._ack_lock:
+            acked = self._early_acks.pop(info.mid, None) # QoS 0 이어도 꺼내 둔다 (남으면 같은 mid 의 QoS 1 과 섞임)
+            if qos > 0:
+                if acked is None or acked < sent: # 발행 전 시각의 기록은 이전 메시지의 것
+                    self._pending[info.mid] = sent
+                    if on_ack:
+                        self._ack_callbacks[info.mid] = on_ack
+                else:
+                    self._record_ack(acked - sent)
+                    acked_early = True
+        if acked_early and on_ack:
+            on_ack()
+        return True
 
     def disconnect(self):
         """브로커와의 연결을 종료합니다."""
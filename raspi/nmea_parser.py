@@ -0,0 +1,131 @@
+from typing import Any, Dict, List, Optional
+
+# 처리하는 토커 (GPS, 복합 GNSS, GLONASS, Galileo, BeiDou)
+TALKERS = (b"GP", b"GN", b"GL", b"GA", b"BD", b"GB")
+
+KNOTS_TO_KPH = 1.852
+
+# XOR 접기용 마스크 (최대 128바이트 문장까지 한 번의 int 변환으로 체크섬 계산)
+_FOLD_MASKS = [(1 << w) - 1 for w in (512, 256, 128, 64, 32, 16, 8)]
+
+
+def _xor_fold(data: bytes) -> int:
+    """바이트열 전체의 XOR. 큰 정수로 변환한 뒤 절반씩 접어 파이썬 루프 없이 계산합니다."""
+    x = int.from_bytes(data, 'little')
+    for mask in _FOLD_MASKS:
+        w = mask.bit_length()
+        if x >> w:
+            x = (x >> w) ^ (x & mask)
+    return x
+
+
+def checksum_ok(line: bytes, star: int) -> bool:
+    """'$'와 '*' 사이의 XOR이 '*' 뒤 두 자리 16진수와 같은지 확인합니다."""
+    try:
+        expected = int(line[star + 1:star + 3], 16)
+    except ValueError:
+        return False
+    body = line[1:star]
+    if len(body) > 128:
+        x = 0
+        for b in body:
+            x ^= b
+        return x == expected
+    return _xor_fold(body) == expected
+
+
+def _float(field: bytes) -> Optional[float]:
+    return float(field) if field else None
+
+
+def _degrees(value: bytes, hemi: bytes) -> float:
+    """ddmm.mmmm / dddmm.mmmm -> 부호 있는 도 단위 (pynmea2와 같이 빈 값은 0.0)."""
+    if not value:
+        return 0.0
+    dm = float(value)
+    deg = int(dm // 100)
+    sd = deg + (dm - deg * 100) / 60.0
+    return -sd if hemi in (b"S", b"W") else sd
+
+
+class NmeaParser:
+    """
+    RMC/GGA/VTG/GSA만 처리하는 NMEA 0183 고속 파서.
+    토커와 문장 종류는 슬라이스 없이 startswith(offset)로 먼저 거르고, 체크섬이 맞는 문장만
+    필드를 분리합니다. 처리 결과는 state dict에 누적하며 parse()는 처리한 문장 종류를 반환합니다.
+    """
+
+    def __init__(self, require_checksum: bool = True):
+        self.require_checksum = require_checksum
+        self.state: Dict[str, Any] = {}
+        self.sentences = 0
+        self.ignored = 0
+        self.bad_checksum = 0
+
+    def parse(self, line: bytes) -> Optional[bytes]:
+        if len(line) < 7 or line[0] != 0x24:  # '$'
+            return None
+        if not line.startswith(TALKERS, 1):
+            self.ignored += 1
+            return None
+        if line.startswith(b"RMC", 3):
+            handler = self._rmc
+        elif line.startswith(b"GGA", 3):
+            handler = self._gga
+        elif line.startswith(b"VTG", 3):
+            handler = self._vtg
+        elif line.startswith(b"GSA", 3):
+            handler = self._gsa
+        else:
+            self.ignored += 1
+            return None
+
+        star = line.rfind(b"*")
+        if star < 0:
+            if self.require_checksum:
+                self.bad_checksum += 1
+                return None
+            star = len(line.rstrip())
+        elif not checksum_ok(line, star):
+            self.bad_checksum += 1
+            return None
+
+        try:
+            handler(line[7:star].split(b","))
+        except (ValueError, IndexError):
+            return None
+        self.sentences += 1
+        return line[3:6]
+
+    def _rmc(self, f: List[bytes]):
+        # 0 시각, 1 상태, 2 위도, 3 N/S, 4 경도, 5 E/W, 6 속도(knot), 7 진행 방향
+        st = self.state
+        st['lat'] = _degrees(f[2], f[3])
+        st['lon'] = _degrees(f[4], f[5])
+        st['GPS_Speed_KPH'] = float(f[6]) * KNOTS_TO_KPH if f[6] else 0.0
+        st['heading'] = _float(f[7])
+        st['gps_fix'] = f[1] == b"A"
+
+    def _gga(self, f: List[bytes]):
+        # 5 품질, 6 위성 수, 7 HDOP, 8 고도
+        st = self.state
+        st['altitude'] = _float(f[8])
+        st['satellites'] = int(f[6] or 0)
+        st['gps_fix_type'] = int(f[5]) if f[5] else None
+        if f[7]:
+            st['hdop'] = float(f[7])
+
+    def _vtg(self, f: List[bytes]):
+        # 0 진행 방향(true), 6 속도(km/h)
+        st = self.state
+        if f[6]:
+            st['GPS_Speed_KPH'] = float(f[6])
+        if f[0]:
+            st['heading'] = float(f[0])
+
+    def _gsa(self, f: List[bytes]):
+        # 1 측위 모드(1: 없음, 2: 2D, 3: 3D), 2~13 위성 PRN, 14 PDOP, 15 HDOP
+        st = self.state
+        st['fix_mode'] = int(f[1]) if f[1] else None
+        if len(f) > 15 and f[15]:
+            st['hdop'] = float(f[15])
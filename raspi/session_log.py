@@ -0,0 +1,348 @@
+# session_log.py (소스별 고유 주기를 유지하는 청크 단위 바이너리 컬럼형 세션 로그)
+# 정보 확인: python3 -m raspi.session_log info <session.emulog>
+# CSV 변환: python3 -m raspi.session_log export <session.emulog> [-o out.csv] [--rate 20]
+
+import os
+import sys
+import json
+import time
+import queue
+import struct
+import argparse
+import threading
+from array import array
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .can_decoder import CanSignal
+from .accel_filter import STATS_FIELDS
+from .signal_store import GPS_FIELDS, ACCEL_FIELDS, FUSION_FIELDS
+
+# ======== 파일 형식 ========
+# 파일 헤더: magic(8) + JSON 길이(u32) + JSON(그룹/컬럼/타입 정의)
+# 청크: magic(4) + 그룹 번호(u16) + 예약(u16) + 행 수(u32) + 예약(4)
+#       + t(f8 x 행 수) + 각 컬럼(타입 x 행 수), 모든 배열은 8바이트 경계로 정렬
+# (version 1 파일은 청크 헤더가 12바이트라 배열이 4바이트 어긋나 있음, 읽기만 지원)
+SESSION_MAGIC = b"EMULOG\x00\x01"
+SESSION_VERSION = 2
+_FILE_HEADER = struct.Struct('<8sI')
+_CHUNK_HEADER = struct.Struct('<4sHHI4x')
+_CHUNK_HEADER_V1 = struct.Struct('<4sHHI')
+_CHUNK_MAGIC = b"CHNK"
+
+# array 타입코드 -> NumPy dtype (바이트 순서는 헤더의 byteorder로 결정)
+_NP_TYPES = {'b': 'i1', 'B': 'u1', 'h': 'i2', 'H': 'u2', 'i': 'i4', 'I': 'u4',
+             'q': 'i8', 'Q': 'u8', 'f': 'f4', 'd': 'f8'}
+_FLOAT_TYPES = ('f', 'd')
+EXPORT_BLOCK_ROWS = 10000 # CSV 변환 시 한 번에 처리하는 행 수
+
+GPS_COLUMN_TYPES = {
+    "Latitude": 'd', "Longitude": 'd', "GPS_Speed_KPH": 'f', "Satellites": 'B',
+    "Altitude_m": 'f', "Heading_deg": 'f', "gps_fix": 'B', "gps_fix_type": 'B',
+    "gps_fix_mode": 'B', "HDOP": 'f', "GPS_Time": 'd',
+}
+
+
+FUSION_COORDS = ("Fused_Latitude", "Fused_Longitude")
+
+
+def can_group_name(frame_id: int) -> str:
+    return f"can_0x{frame_id:X}"
+
+
+def build_session_groups(signals: Iterable[CanSignal]) -> List[Tuple[str, List[Tuple[str, str]]]]:
+    """CAN 프레임 ID별 그룹 + GPS + 가속도 + 융합 그룹의 (이름, [(컬럼, 타입코드)]) 목록을 만듭니다."""
+    by_id: Dict[int, List[CanSignal]] = {}
+    for sig in signals:
+        by_id.setdefault(sig.frame_id, []).append(sig)
+    groups = []
+    for frame_id in sorted(by_id):
+        columns = []
+        for sig in sorted(by_id[frame_id], key=lambda s: s.offset):
+            scaled = sig.scale != 1 or sig.bias
+            columns.append((sig.name, 'f' if scaled else sig.fmt))
+        groups.append((can_group_name(frame_id), columns))
+    groups.append(("gps", [(name, GPS_COLUMN_TYPES.get(name, 'f')) for name in GPS_FIELDS]))
+    groups.append(("accel", [(name, 'f') for name in ACCEL_FIELDS]))
+    groups.append(("fusion", [(name, 'd' if name in FUSION_COORDS else 'f') for name in FUSION_FIELDS]))
+    return groups
+
+
+def build_uplink_groups(signals: Iterable[CanSignal]) -> List[Tuple[str, List[Tuple[str, str]]]]:
+    """업링크 바이너리 스키마용 그룹: 세션 로그와 같은 타입을 쓰되 CAN 프레임 그룹은 "can" 하나로 합칩니다."""
+    can_columns, groups = [], []
+    for name, columns in build_session_groups(signals):
+        if name.startswith("can_0x"):
+            can_columns.extend(columns)
+        elif name == "accel":
+            # 필터 통계 키 (ax_g/ay_g/az_g 는 최신 샘플과 같은 이름)
+            groups.append((name, columns + [(f, 'H' if f == "samples" else 'f')
+                                            for f in STATS_FIELDS if f not in ACCEL_FIELDS]))
+        else:
+            groups.append((name, columns))
+    return [("can", can_columns)] + groups
+
+
+def _pad8(n: int) -> int:
+    return (-n) % 8
+
+
+class GroupAppender:
+    """한 그룹의 컬럼 버퍼. 그룹당 한 스레드(데이터 소스)에서만 append를 호출합니다."""
+
+    def __init__(self, log: "SessionLogWriter", index: int, columns: List[Tuple[str, str]]):
+        self._log = log
+        self._index = index
+        self._columns = [
+            (name, float if code in _FLOAT_TYPES else int, float('nan') if code in _FLOAT_TYPES else 0)
+            for name, code in columns
+        ]
+        self._typecodes = [code for _, code in columns]
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._t = array('d')
+        self._data = [array(code) for code in self._typecodes]
+        self._first_t = None
+
+    def append(self, parsed: Dict[str, Any], ts: Optional[float] = None):
+        if ts is None:
+            ts = time.monotonic()
+        with self._lock:
+            if self._first_t is None:
+                self._first_t = ts
+            self._t.append(ts)
+            for (name, conv, default), arr in zip(self._columns, self._data):
+                value = parsed.get(name)
+                arr.append(default if value is None else conv(value))
+            if len(self._t) >= self._log.chunk_rows or ts - self._first_t >= self._log.chunk_sec:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not len(self._t):
+            return
+        self._log._submit(self._index, self._t, self._data)
+        self._reset()
+
+
+class SessionLogWriter:
+    """
+    소스별 그룹을 고유 주기 그대로 컬럼 청크로 모아 기록합니다.
+    청크 인코딩/파일 쓰기는 별도 writer 스레드에서 수행합니다.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        groups: Sequence[Tuple[str, List[Tuple[str, str]]]],
+        chunk_rows: int = 512,
+        chunk_sec: float = 1.0,
+    ):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.chunk_sec = chunk_sec
+        self.rows_written = 0
+        self.chunks_written = 0
+        self._closed = False
+
+        header = {
+            "version": SESSION_VERSION,
+            "byteorder": sys.byteorder,
+            "t0_monotonic": time.monotonic(),
+            "t0_wall": time.time(),
+            "groups": [{"name": name, "columns": columns} for name, columns in groups],
+        }
+        meta = json.dumps(header).encode('utf-8')
+        meta += b' ' * _pad8(_FILE_HEADER.size + len(meta))
+
+        self._file = open(path, 'wb', buffering=256 * 1024)
+        self._file.write(_FILE_HEADER.pack(SESSION_MAGIC, len(meta)))
+        self._file.write(meta)
+
+        self._appenders = {name: GroupAppender(self, i, columns) for i, (name, columns) in enumerate(groups)}
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def group(self, name: str) -> GroupAppender:
+        return self._appenders[name]
+
+    def _submit(self, index: int, t: array, data: List[array]):
+        if not self._closed:
+            self._queue.put((index, t, data))
+
+    def _write_chunk(self, index: int, t: array, data: List[array]):
+        write = self._file.write
+        rows = len(t)
+        write(_CHUNK_HEADER.pack(_CHUNK_MAGIC, index, 0, rows))
+        for arr in [t] + data:
+            raw = arr.tobytes()
+            write(raw)
+            pad = _pad8(len(raw))
+            if pad:
+                write(b'\x00' * pad)
+        self.rows_written += rows
+        self.chunks_written += 1
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            self._write_chunk(*item)
+
+    def close(self):
+        """모든 그룹의 남은 행을 청크로 기록하고 파일을 닫습니다."""
+        if self._closed:
+            return
+        for appender in self._appenders.values():
+            appender.flush()
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+        print(f"[INFO] 세션 로그 저장 완료: {self.path} ({self.rows_written}행, {self.chunks_written}청크)")
+
+
+# ======== 읽기 (NumPy memmap) ========
+def read_session(path: str) -> Tuple[Dict[str, Any], Dict[str, Dict[str, "np.ndarray"]]]:
+    """
+    세션 로그를 메모리 매핑으로 읽어 (헤더, {그룹: {"t": ..., 컬럼: ...}})을 반환합니다.
+    비정상 종료로 잘린 마지막 청크는 무시합니다.
+    """
+    if np is None:
+        raise RuntimeError("numpy 가 설치되어 있지 않습니다. pip3 install numpy")
+    mm = np.memmap(path, dtype='u1', mode='r')
+    magic, meta_len = _FILE_HEADER.unpack(bytes(mm[:_FILE_HEADER.size]))
+    if magic != SESSION_MAGIC:
+        raise ValueError(f"세션 로그 형식이 아닙니다: {path}")
+    header = json.loads(bytes(mm[_FILE_HEADER.size:_FILE_HEADER.size + meta_len]).decode('utf-8'))
+    bo = '<' if header.get("byteorder", "little") == "little" else '>'
+    groups = header["groups"]
+    dtypes = [[np.dtype(bo + _NP_TYPES[code]) for _, code in g["columns"]] for g in groups]
+    chunk_header = _CHUNK_HEADER if header.get("version", 1) >= 2 else _CHUNK_HEADER_V1
+
+    parts: List[List[List["np.ndarray"]]] = [[[] for _ in range(len(g["columns"]) + 1)] for g in groups]
+    pos = _FILE_HEADER.size + meta_len
+    size = len(mm)
+    t_dtype = np.dtype(bo + 'f8')
+    while pos + chunk_header.size <= size:
+        cmagic, index, _, rows = chunk_header.unpack(bytes(mm[pos:pos + chunk_header.size]))
+        if cmagic != _CHUNK_MAGIC or index >= len(groups):
+            break
+        cur = pos + chunk_header.size
+        arrays = []
+        for dt in [t_dtype] + dtypes[index]:
+            nbytes = dt.itemsize * rows
+            if cur + nbytes > size:
+                arrays = None
+                break
+            arrays.append(np.frombuffer(mm, dtype=dt, count=rows, offset=cur))
+            cur += nbytes + _pad8(nbytes)
+        if arrays is None:
+            break
+        for col_parts, arr in zip(parts[index], arrays):
+            col_parts.append(arr)
+        pos = cur
+
+    out: Dict[str, Dict[str, np.ndarray]] = {}
+    for g, dts, col_parts in zip(groups, dtypes, parts):
+        names = ["t"] + [name for name, _ in g["columns"]]
+        all_dtypes = [t_dtype] + dts
+        out[g["name"]] = {
+            name: (np.concatenate(p) if len(p) > 1 else (p[0] if p else np.zeros(0, dtype=dt)))
+            for name, p, dt in zip(names, col_parts, all_dtypes)
+        }
+    return header, out
+
+
+def export_csv(path: str, out_path: str, rate_hz: float = 20.0, fieldnames: Optional[Sequence[str]] = None):
+    """
+    세션 로그를 기존 CSV 레이아웃(log_writer.CSV_FIELDNAMES)으로 변환합니다.
+    융합 데이터가 기록된 세션이면 실시간 CSV와 같이 FUSION_CSV_FIELDNAMES 를 뒤에 붙입니다.
+    rate_hz 간격의 시간축에 각 시그널의 직전 값을 채웁니다 (기존 실시간 로깅과 동일한 방식).
+    """
+    from .log_writer import CSV_FIELDNAMES, FUSION_CSV_FIELDNAMES
+    header, groups = read_session(path)
+    if fieldnames is None:
+        fused = "fusion" in groups and len(groups["fusion"]["t"])
+        fieldnames = CSV_FIELDNAMES + FUSION_CSV_FIELDNAMES if fused else CSV_FIELDNAMES
+    fieldnames = list(fieldnames)
+
+    starts = [g["t"][0] for g in groups.values() if len(g["t"])]
+    ends = [g["t"][-1] for g in groups.values() if len(g["t"])]
+    if not starts:
+        print("[SESSION] 기록된 데이터가 없습니다.")
+        return
+    t_start, step = min(starts), 1.0 / rate_hz
+    total = int(np.ceil((max(ends) + 1e-9 - t_start) / step))  # np.arange 와 같은 행 수
+
+    # 컬럼마다 값을 가져올 그룹 (없으면 빈 칸)
+    sources = []
+    for name in fieldnames[1:]:
+        g = next((g for g in groups.values() if name in g and len(g["t"])), None)
+        sources.append((g["t"], g[name]) if g is not None else None)
+
+    # 시각 열: 로컬 시간 (세션 시작 시점의 UTC 오프셋 사용)
+    offset = header["t0_wall"] - header["t0_monotonic"]
+    utc_offset = datetime.fromtimestamp(t_start + offset).astimezone().utcoffset().total_seconds()
+
+    # EXPORT_BLOCK_ROWS 행씩 나눠 변환/기록해 로그 길이와 관계없이 메모리 사용량을 일정하게 유지
+    with open(out_path, 'w', newline='', encoding='utf-8') as f:
+        f.write(','.join(fieldnames) + '\r\n') # csv.writer 와 같은 줄바꿈
+        for first in range(0, total, EXPORT_BLOCK_ROWS):
+            grid = t_start + np.arange(first, min(first + EXPORT_BLOCK_ROWS, total)) * step
+            stamps = np.datetime_as_string(np.round((grid + offset + utc_offset) * 1e6).astype('datetime64[us]'), unit='us')
+            rows = np.char.replace(stamps, 'T', ' ')
+            for source in sources:
+                if source is None:
+                    rows = np.char.add(rows, ',')
+                    continue
+                t, column = source
+                idx = np.searchsorted(t, grid, side='right') - 1
+                values = column[np.maximum(idx, 0)]
+                col = values.astype(str)
+                missing = idx < 0
+                if values.dtype.kind == 'f':
+                    missing |= np.isnan(values)
+                col[missing] = ''
+                rows = np.char.add(np.char.add(rows, ','), col)
+            f.write('\r\n'.join(rows.tolist()))
+            f.write('\r\n')
+    print(f"[SESSION] CSV 변환 완료: {out_path} ({total}행, {rate_hz:g}Hz)")
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="바이너리 세션 로그 도구")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_info = sub.add_parser("info", help="그룹별 샘플 수와 평균 주기 출력")
+    p_info.add_argument("session")
+    p_export = sub.add_parser("export", help="기존 CSV 레이아웃으로 변환")
+    p_export.add_argument("session")
+    p_export.add_argument("-o", "--output", help="출력 CSV 경로 (기본: 같은 이름 .csv)")
+    p_export.add_argument("--rate", type=float, default=20.0, help="CSV 행 주기 Hz (기본 20Hz = 기존 50ms)")
+    args = parser.parse_args(argv)
+
+    if args.command == "info":
+        header, groups = read_session(args.session)
+        for name, g in groups.items():
+            t = g["t"]
+            rate = (len(t) - 1) / (t[-1] - t[0]) if len(t) > 1 and t[-1] > t[0] else 0.0
+            print(f"  {name:<12} {len(t):>9} samples  {rate:8.1f} Hz  ({len(g) - 1} columns)")
+    else:
+        out_path = args.output or os.path.splitext(args.session)[0] + ".csv"
+        export_csv(args.session, out_path, args.rate)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
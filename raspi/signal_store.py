@@ -0,0 +1,130 @@
+import time
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# ======== 소스별 시그널 이름 (CAN은 SignalDecoder의 시그널 테이블에서 가져옴) ========
+GPS_FIELDS: Tuple[str, ...] = (
+    "Latitude", "Longitude", "GPS_Speed_KPH", "Satellites", "Altitude_m", "Heading_deg",
+    "gps_fix", "gps_fix_type", "gps_fix_mode", "HDOP", "GPS_Time",
+)
+ACCEL_FIELDS: Tuple[str, ...] = ("ax_g", "ay_g", "az_g")
+FUSION_FIELDS: Tuple[str, ...] = (
+    "Fused_Latitude", "Fused_Longitude", "Fused_Speed_KPH", "Fused_Heading_deg", "Fused_PosStd_m",
+)
+
+
+class SlotWriter:
+    """한 그룹(데이터 소스)의 슬롯만 갱신하는 단일 writer 핸들. 그룹당 한 스레드만 사용해야 합니다."""
+    __slots__ = ("_store", "_group", "_index")
+
+    def __init__(self, store: "SignalStore", group: int, index: Dict[str, int]):
+        self._store = store
+        self._group = group
+        self._index = index
+
+    def update(self, parsed: Dict[str, Any], ts: Optional[float] = None):
+        """parsed의 값을 해당 슬롯에 기록합니다. 그룹에 없는 이름은 무시합니다."""
+        if ts is None:
+            ts = time.monotonic()
+        store = self._store
+        index = self._index
+        values, stamps, seqs, gens = store._values, store._stamps, store._seqs, store._gens
+        g = self._group
+        gens[g] += 1  # 홀수: 기록 중
+        for name, value in parsed.items():
+            i = index.get(name)
+            if i is not None:
+                values[i] = value
+                stamps[i] = ts
+                seqs[i] += 1
+        gens[g] += 1  # 짝수: 기록 완료
+
+
+class StoreSnapshot:
+    """SignalStore의 한 시점 복사본. 슬롯 배열을 그대로 복사하므로 dict를 만들지 않습니다."""
+    __slots__ = ("store", "values", "stamps", "seqs")
+
+    def __init__(self, store: "SignalStore", values: List[Any], stamps: array, seqs: array):
+        self.store = store
+        self.values = values
+        self.stamps = stamps
+        self.seqs = seqs
+
+    def get(self, name: str, default: Any = None) -> Any:
+        i = self.store.index.get(name)
+        if i is None or not self.seqs[i]:
+            return default
+        return self.values[i]
+
+    def has_data(self) -> bool:
+        return any(self.seqs)
+
+    def group_dict(self, group: str) -> Dict[str, Any]:
+        """한 그룹에서 한 번이라도 수신된 값만 {이름: 값}으로 반환합니다 (업링크 JSON 용)."""
+        start, end = self.store.groups[group]
+        names, values, seqs = self.store.names, self.values, self.seqs
+        return {names[i]: values[i] for i in range(start, end) if seqs[i]}
+
+    def group_stamp(self, group: str) -> float:
+        """그룹에서 가장 최근에 갱신된 슬롯의 monotonic 타임스탬프 (없으면 0.0)."""
+        start, end = self.store.groups[group]
+        return max(self.stamps[start:end], default=0.0)
+
+    def as_dict(self) -> Dict[str, Any]:
+        names, values, seqs = self.store.names, self.values, self.seqs
+        return {names[i]: values[i] for i in range(len(names)) if seqs[i]}
+
+
+class SignalStore:
+    """
+    시그널마다 미리 인덱스된 슬롯(값, monotonic 타임스탬프, 시퀀스 번호)을 가진 최신값 저장소.
+    그룹별 writer는 하나씩이며, 읽는 쪽은 그룹 세대 번호(seqlock)로 일관된 스냅샷을 얻습니다.
+    """
+    SNAPSHOT_RETRIES = 50
+
+    def __init__(self, groups: Dict[str, Iterable[str]]):
+        names: List[str] = []
+        self.groups: Dict[str, Tuple[int, int]] = {}
+        for group, fields in groups.items():
+            start = len(names)
+            names.extend(f for f in fields if f not in names)
+            self.groups[group] = (start, len(names))
+        self.names: Tuple[str, ...] = tuple(names)
+        self.index: Dict[str, int] = {n: i for i, n in enumerate(self.names)}
+
+        n = len(self.names)
+        self._values: List[Any] = [None] * n
+        self._stamps = array('d', [0.0]) * n
+        self._seqs = array('Q', [0]) * n
+        self._gens: List[int] = [0] * len(self.groups)
+
+    def writer(self, group: str) -> SlotWriter:
+        start, end = self.groups[group]
+        g = list(self.groups).index(group)
+        return SlotWriter(self, g, {self.names[i]: i for i in range(start, end)})
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """슬롯 하나를 읽습니다 (상태 표시줄 등 단일 값 용)."""
+        i = self.index.get(name)
+        if i is None or not self._seqs[i]:
+            return default
+        return self._values[i]
+
+    def snapshot(self) -> StoreSnapshot:
+        """기록 중인 그룹이 없을 때의 슬롯 배열을 복사합니다. 계속 겹치면 마지막 복사본을 반환합니다."""
+        gens = self._gens
+        for _ in range(self.SNAPSHOT_RETRIES):
+            before = gens[:]
+            if any(g & 1 for g in before):
+                time.sleep(0)
+                continue
+            values = self._values[:]
+            stamps = self._stamps[:]
+            seqs = self._seqs[:]
+            if gens == before:
+                break
+        else:
+            values = self._values[:]
+            stamps = self._stamps[:]
+            seqs = self._seqs[:]
+        return StoreSnapshot(self, values, stamps, seqs)
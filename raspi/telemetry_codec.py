@@ -0,0 +1,271 @@
+# telemetry_codec.py (업링크 텔레메트리 바이너리 인코딩)
+# 구현은 이 파일 하나이고 web_server/telemetry_codec.py 는 이 파일을 그대로 불러옵니다.
+# Pi와 서버는 따로 업데이트되므로 스키마에 이 파일의 지문(CODEC_HASH)을 싣고, 지문이 다른 스키마는
+# 서버가 거부합니다 (코덱이 어긋난 채 잘못 디코딩하지 않도록). 이 파일을 고치면 Pi와 서버를 함께 업데이트하세요.
+#
+# 메시지 = 헤더 '<2sBBI' (b"MT", WIRE_VERSION, 플래그, 스키마 ID) + 본문 (FLAG_ZSTD 면 zstd 압축)
+# 본문   = trace 블록(+ keyframe 플래그) + 스키마 그룹 순서대로 [존재 비트맵 + 존재하는 값만 고정 타입으로 패킹]
+#          + series 블록 (행 수 u16, 있으면 t0 f64 + 열 수 u8 + dt_ms u32 x 행 + 열마다 [시그널 번호 u16 + f32 x 행])
+#          + 나머지 JSON
+# 스키마 = [(그룹, [(시그널, struct 타입코드), ...]), ...]. Pi가 SCHEMA 토픽에 retained 로 발행하고
+#          ID(CRC32)로 구분하므로 시그널 테이블이 바뀌어도 서버 코드를 바꿀 필요가 없습니다.
+
+import json
+import struct
+import zlib
+from typing import Any, Dict, List, Sequence, Tuple
+
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
+WIRE_MAGIC = b"MT"
+WIRE_VERSION = 2
+FLAG_ZSTD = 0x01
+
+_HEADER = struct.Struct('<2sBBI')
+_TRACE_HEAD = struct.Struct('<BId')  # 플래그(bit0~2 = rx 그룹, bit7 = trace 있음), seq, pub
+_TRACE_GROUPS = ("can", "gps", "accel")
+_TRACE_PRESENT = 0x80
+_KEYFRAME_SET = 0x40   # 최상위 "keyframe" 키가 있음 (델타 업링크)
+_KEYFRAME_TRUE = 0x20  # 그 값이 True
+_FLOAT_CODES = ('f',)  # float32 는 유효숫자 7자리로 돌려놓음 (JSON 표시값과 맞춤)
+_SERIES_HEAD = struct.Struct('<dB')
+_NO_SERIES = b"\x00\x00"
+_NAN = float('nan')
+
+
+def _source_fingerprint():
+    """이 파일 내용의 CRC32 (줄바꿈 차이는 무시). 소스를 읽을 수 없으면 None(검사 생략)."""
+    try:
+        with open(__file__, 'rb') as f:
+            source = f.read().replace(b'\r\n', b'\n')
+    except OSError:
+        return None
+    return f"{zlib.crc32(source):08x}"
+
+
+CODEC_HASH = _source_fingerprint()
+
+SchemaGroups = Sequence[Tuple[str, Sequence[Tuple[str, str]]]]
+
+
+class TelemetrySchema:
+    """그룹별 시그널 순서와 타입. 직렬화한 JSON의 CRC32가 스키마 ID입니다."""
+
+    def __init__(self, groups: SchemaGroups):
+        self.groups: List[Tuple[str, List[Tuple[str, str]]]] = [
+            (group, [(name, code) for name, code in columns]) for group, columns in groups
+        ]
+        self.json = json.dumps({"version": WIRE_VERSION, "codec": CODEC_HASH, "groups": self.groups},
+                               separators=(',', ':'))
+        self.id = zlib.crc32(self.json.encode())
+
+    @classmethod
+    def from_json(cls, text) -> "TelemetrySchema":
+        spec = json.loads(text)
+        if spec.get("version") != WIRE_VERSION:
+            raise ValueError(f"지원하지 않는 와이어 버전: {spec.get('version')}")
+        if CODEC_HASH and spec.get("codec") and spec["codec"] != CODEC_HASH:
+            raise ValueError(f"코덱이 다른 스키마입니다 (보낸 쪽 {spec['codec']}, 이쪽 {CODEC_HASH}): "
+                             "Pi와 서버의 telemetry_codec.py 를 같은 버전으로 맞추세요")
+        return cls(spec["groups"])
+
+
+class TelemetryCodec:
+    """하나의 스키마로 업링크 dict(timestamp/can/gps/accel/fusion/trace)를 인코딩/디코딩합니다."""
+
+    def __init__(self, schema: TelemetrySchema, zstd_level: int = 0):
+        if zstd_level and zstd is None:
+            raise RuntimeError("zstandard 가 설치되어 있지 않습니다. pip3 install zstandard")
+        self.schema = schema
+        self._compressor = zstd.ZstdCompressor(level=zstd_level) if zstd_level else None
+        self._decompressor = zstd.ZstdDecompressor() if zstd is not None else None
+        self._groups = [
+            (group, tuple(name for name, _ in columns), tuple(code for _, code in columns),
+             frozenset(name for name, _ in columns), (len(columns) + 7) // 8)
+            for group, columns in schema.groups
+        ]
+        self._group_names = frozenset(group for group, _ in schema.groups)
+        # series 열은 스키마 전체에서의 시그널 번호로 보냄
+        self._signal_names = [name for _, columns in schema.groups for name, _ in columns]
+        self._signal_index = {name: i for i, name in reversed(list(enumerate(self._signal_names)))}
+        self._structs: Dict[Tuple[int, bytes], Tuple[struct.Struct, Tuple[bool, ...]]] = {}
+
+    def _struct_for(self, gi: int, bitmap: bytes) -> Tuple[struct.Struct, Tuple[bool, ...]]:
+        """존재 비트맵에 해당하는 값 묶음의 Struct (같은 비트맵이 계속 반복되므로 캐시)."""
+        key = (gi, bitmap)
+        cached = self._structs.get(key)
+        if cached is None:
+            codes = self._groups[gi][2]
+            present = [codes[i] for i in range(len(codes)) if bitmap[i >> 3] >> (i & 7) & 1]
+            if len(self._structs) > 1024:
+                self._structs.clear()
+            cached = self._structs[key] = (struct.Struct('<' + ''.join(present)),
+                                           tuple(c in _FLOAT_CODES for c in present))
+        return cached
+
+    def encode(self, data: Dict[str, Any]) -> bytes:
+        """패킹할 수 없는 값(타입 범위 밖 등)이 있으면 struct.error 를 그대로 올립니다."""
+        parts = [self._encode_trace(data.get("trace"), data.get("keyframe"))]
+        extras: Dict[str, Any] = {}
+        for gi, (group, names, _, known, nbytes) in enumerate(self._groups):
+            values = data.get(group) or {}
+            bits = 0
+            packed = []
+            for i, name in enumerate(names):
+                v = values.get(name)
+                if v is not None:
+                    bits |= 1 << i
+                    packed.append(v)
+            bitmap = bits.to_bytes(nbytes, 'little')
+            parts.append(bitmap)
+            if packed:
+                parts.append(self._struct_for(gi, bitmap)[0].pack(*packed))
+            unknown = {k: v for k, v in values.items() if k not in known}
+            if unknown:
+                extras[group] = unknown
+        packed_series = self._encode_series(data.get("series"))
+        parts.append(packed_series)
+        for key, value in data.items():
+            if key in self._group_names or key in ("trace", "keyframe"):
+                continue
+            if key != "series" or packed_series == _NO_SERIES:
+                extras[key] = value
+        if extras:
+            parts.append(json.dumps(extras, separators=(',', ':')).encode())
+        body = b"".join(parts)
+        flags = 0
+        if self._compressor is not None:
+            compressed = self._compressor.compress(body)
+            if len(compressed) < len(body):
+                body, flags = compressed, FLAG_ZSTD
+        return _HEADER.pack(WIRE_MAGIC, WIRE_VERSION, flags, self.schema.id) + body
+
+    def _encode_trace(self, trace, keyframe) -> bytes:
+        flags = 0
+        if keyframe is not None:
+            flags = _KEYFRAME_SET | (_KEYFRAME_TRUE if keyframe else 0)
+        if not isinstance(trace, dict):
+            return bytes((flags,))
+        rx = trace.get("rx") or {}
+        stamps = [rx[g] for g in _TRACE_GROUPS if rx.get(g) is not None]
+        mask = _TRACE_PRESENT | flags
+        for i, g in enumerate(_TRACE_GROUPS):
+            if rx.get(g) is not None:
+                mask |= 1 << i
+        return _TRACE_HEAD.pack(mask, trace.get("seq") or 0, trace.get("pub") or 0.0) + \
+            struct.pack(f'<{len(stamps)}d', *stamps)
+
+    def _encode_series(self, series) -> bytes:
+        """스키마에 없는 열이 있거나 모양이 다르면 빈 블록을 내고 JSON 쪽으로 보냅니다."""
+        if not isinstance(series, dict) or not series.get("dt_ms"):
+            return _NO_SERIES
+        dt_ms = series["dt_ms"]
+        values = series.get("values") or {}
+        rows = len(dt_ms)
+        index = self._signal_index
+        if rows > 0xFFFF or len(values) > 0xFF or any(n not in index or len(c) != rows for n, c in values.items()):
+            return _NO_SERIES
+        parts = [struct.pack('<H', rows), _SERIES_HEAD.pack(series["t0"], len(values)),
+                 struct.pack(f'<{rows}I', *dt_ms)]
+        col = struct.Struct(f'<H{rows}f')
+        for name, column in values.items():
+            parts.append(col.pack(index[name], *(_NAN if v is None else v for v in column)))
+        return b"".join(parts)
+
+    def _decode_series(self, body, pos: int):
+        rows = struct.unpack_from('<H', body, pos)[0]
+        pos += 2
+        if not rows:
+            return None, pos
+        t0, ncols = _SERIES_HEAD.unpack_from(body, pos)
+        pos += _SERIES_HEAD.size
+        dt_ms = list(struct.unpack_from(f'<{rows}I', body, pos))
+        pos += 4 * rows
+        col = struct.Struct(f'<H{rows}f')
+        values = {}
+        for _ in range(ncols):
+            raw = col.unpack_from(body, pos)
+            pos += col.size
+            # NaN(미수신)은 None 으로 (브라우저 JSON에 NaN 을 넣지 않도록)
+            values[self._signal_names[raw[0]]] = [None if v != v else float(f"{v:.7g}") for v in raw[1:]]
+        return {"t0": t0, "dt_ms": dt_ms, "values": values}, pos
+
+    def decode(self, payload: bytes) -> Dict[str, Any]:
+        magic, version, flags, schema_id = _HEADER.unpack_from(payload)
+        if magic != WIRE_MAGIC or version != WIRE_VERSION or schema_id != self.schema.id:
+            raise ValueError("스키마가 다른 메시지입니다")
+        body = memoryview(payload)[_HEADER.size:]
+        if flags & FLAG_ZSTD:
+            if self._decompressor is None:
+                raise RuntimeError("zstandard 가 설치되어 있지 않습니다. pip3 install zstandard")
+            body = memoryview(self._decompressor.decompress(body))
+
+        out: Dict[str, Any] = {}
+        mask = body[0]
+        pos = 1
+        if mask & _KEYFRAME_SET:
+            out["keyframe"] = bool(mask & _KEYFRAME_TRUE)
+        if mask & _TRACE_PRESENT:
+            _, seq, pub = _TRACE_HEAD.unpack_from(body, 0)
+            pos = _TRACE_HEAD.size
+            rx = {}
+            for i, g in enumerate(_TRACE_GROUPS):
+                if mask >> i & 1:
+                    rx[g] = struct.unpack_from('<d', body, pos)[0]
+                    pos += 8
+            out["trace"] = {"seq": seq, "rx": rx, "pub": pub}
+
+        for gi, (group, names, _, _, nbytes) in enumerate(self._groups):
+            bitmap = bytes(body[pos:pos + nbytes])
+            pos += nbytes
+            st, is_float = self._struct_for(gi, bitmap)
+            values = st.unpack_from(body, pos)
+            pos += st.size
+            bits = int.from_bytes(bitmap, 'little')
+            group_out = {}
+            k = 0
+            for i, name in enumerate(names):
+                if bits >> i & 1:
+                    v = values[k]
+                    group_out[name] = float(f"{v:.7g}") if is_float[k] else v
+                    k += 1
+            out[group] = group_out
+
+        series, pos = self._decode_series(body, pos)
+        if series is not None:
+            out["series"] = series
+        if pos < len(body):
+            for key, value in json.loads(bytes(body[pos:])).items():
+                if key in self._group_names and isinstance(value, dict):
+                    out.setdefault(key, {}).update(value)
+                else:
+                    out[key] = value
+        return out
+
+
+class TelemetryDecoder:
+    """수신 측: SCHEMA 토픽으로 받은 스키마를 ID별로 보관하고 메시지 헤더의 스키마 ID로 디코딩합니다."""
+
+    def __init__(self):
+        self._codecs: Dict[int, TelemetryCodec] = {}
+
+    def add_schema(self, text) -> int:
+        schema = TelemetrySchema.from_json(text)
+        if schema.id not in self._codecs:
+            self._codecs[schema.id] = TelemetryCodec(schema)
+        return schema.id
+
+    def decode(self, payload: bytes) -> Dict[str, Any]:
+        """스키마를 아직 받지 못한 메시지면 KeyError."""
+        schema_id = _HEADER.unpack_from(payload)[3]
+        codec = self._codecs.get(schema_id)
+        if codec is None:
+            raise KeyError(f"알 수 없는 스키마 ID {schema_id:08x}")
+        return codec.decode(payload)
+
+
+def is_binary(payload: bytes) -> bool:
+    return payload[:2] == WIRE_MAGIC
@@ -0,0 +1,89 @@
+import json
+import time
+import socket
+import struct
+from abc import ABC, abstractmethod
+from typing import Dict, Union
+
+# LAN 데이터그램: 매직 + 토픽 길이(u8) + MQTT 토픽 + 페이로드 (web_server/lan_receiver.py 와 같게 유지)
+DATAGRAM_MAGIC = b"EU"
+MAX_DATAGRAM = 65507
+
+
+class Transport(ABC):
+    """
+    업링크 전송 경로 인터페이스. MqttClient(브로커 경유)와 UdpMulticastTransport(같은 LAN 직접)가 구현합니다.
+    publish 는 보내지 못하면 False 를 반환하고, retain 메시지는 늦게 붙은 수신 측도 받을 수 있게 다시 보냅니다.
+    """
+    name = "transport"
+
+    @abstractmethod
+    def publish(self, topic: str, payload, retain: bool = False, qos: int = 0) -> bool:
+        ...
+
+    @abstractmethod
+    def is_connected(self) -> bool:
+        ...
+
+    def disconnect(self):
+        pass
+
+
+def pack_datagram(topic: str, payload: bytes) -> bytes:
+    name = topic.encode()
+    return DATAGRAM_MAGIC + struct.pack('<B', len(name)) + name + payload
+
+
+class UdpMulticastTransport(Transport):
+    """
+    피트 노트북이 같은 Wi-Fi에 있을 때 브로커(인터넷)를 거치지 않고 UDP 멀티캐스트로 직접 보냅니다.
+    전달 보장이 없으므로 MQTT와 병행하고, 서버가 seq 로 중복을 걸러 먼저 도착한 쪽을 씁니다.
+    retain 메시지(스키마, STATUS)는 retain_interval 초마다 다시 보냅니다 (나중에 켠 서버도 디코딩 가능).
+    """
+    name = "lan"
+
+    def __init__(self, group: str, port: int, ttl: int = 1, retain_interval: float = 5.0):
+        self.addr = (group, port)
+        self.retain_interval = retain_interval
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+        self.sock.setblocking(False)  # 송신 버퍼가 차면 기다리지 않고 버림 (실시간 값은 다음 프레임이 대신함)
+        self._retained: Dict[str, bytes] = {}
+        self._last_retain = 0.0
+        self.sent = 0
+        self.errors = 0
+
+    def publish(self, topic: str, payload: Union[bytes, str, dict], retain: bool = False, qos: int = 0) -> bool:
+        if isinstance(payload, dict):
+            payload = json.dumps(payload)
+        if isinstance(payload, str):
+            payload = payload.encode()
+        if retain:
+            self._retained[topic] = payload
+        now = time.monotonic()
+        if self._retained and now - self._last_retain >= self.retain_interval:
+            self._last_retain = now
+            for retained_topic, retained in list(self._retained.items()):
+                if retained_topic != topic:
+                    self._send(retained_topic, retained)
+        return self._send(topic, payload)
+
+    def _send(self, topic: str, payload: bytes) -> bool:
+        datagram = pack_datagram(topic, payload)
+        if len(datagram) > MAX_DATAGRAM:
+            self.errors += 1
+            return False
+        try:
+            self.sock.sendto(datagram, self.addr)
+        except OSError:
+            # Wi-Fi 미연결(네트워크 없음), 송신 버퍼 가득 참 등
+            self.errors += 1
+            return False
+        self.sent += 1
+        return True
+
+    def is_connected(self) -> bool:
+        return True
+
+    def disconnect(self):
+        self.sock.close()
@@ -0,0 +1,137 @@
+import struct
+import calendar
+from typing import Any, Dict, List, Optional, Tuple
+
+# ======== UBX 프레임 ========
+SYNC = b"\xb5\x62"
+_HEADER = struct.Struct('<2sBBH')  # sync, class, id, length
+
+CLS_NAV, CLS_ACK, CLS_CFG = 0x01, 0x05, 0x06
+ID_NAV_PVT = 0x07
+ID_ACK_NAK, ID_ACK_ACK = 0x00, 0x01
+ID_CFG_PRT, ID_CFG_MSG, ID_CFG_RATE = 0x00, 0x01, 0x08
+
+PROTO_UBX, PROTO_NMEA = 0x01, 0x02
+MAX_PAYLOAD = 1024
+
+
+def checksum(data: bytes) -> bytes:
+    """UBX 8비트 Fletcher 체크섬 (class부터 payload 끝까지)."""
+    a = b = 0
+    for byte in data:
+        a = (a + byte) & 0xFF
+        b = (b + a) & 0xFF
+    return bytes((a, b))
+
+
+def frame(cls: int, msg_id: int, payload: bytes = b"") -> bytes:
+    body = struct.pack('<BBH', cls, msg_id, len(payload)) + payload
+    return SYNC + body + checksum(body)
+
+
+def cfg_prt_uart(baud: int, in_proto: int = PROTO_UBX | PROTO_NMEA, out_proto: int = PROTO_UBX) -> bytes:
+    """CFG-PRT: UART1을 8N1/baud로 설정하고 출력 프로토콜을 out_proto로 제한합니다 (기본: NMEA 출력 끔)."""
+    payload = struct.pack('<BBHIIHHHH', 1, 0, 0, 0x08D0, baud, in_proto, out_proto, 0, 0)
+    return frame(CLS_CFG, ID_CFG_PRT, payload)
+
+
+def cfg_rate(rate_hz: float) -> bytes:
+    """CFG-RATE: 측위 주기 (timeRef=GPS time)."""
+    return frame(CLS_CFG, ID_CFG_RATE, struct.pack('<HHH', int(round(1000 / rate_hz)), 1, 1))
+
+
+def cfg_msg(cls: int, msg_id: int, rate: int = 1) -> bytes:
+    """CFG-MSG: 현재 포트에서 해당 메시지를 측위 rate회마다 1번 출력."""
+    return frame(CLS_CFG, ID_CFG_MSG, struct.pack('<BBB', cls, msg_id, rate))
+
+
+# ======== NAV-PVT ========
+NAV_PVT = struct.Struct('<IHBBBBBBIiBBBBiiiiIIiiiiiIIHB5xihH')  # 92바이트 (magDec 는 부호 있는 I2)
+assert NAV_PVT.size == 92
+
+FIX_NONE, FIX_DR, FIX_2D, FIX_3D, FIX_GNSS_DR, FIX_TIME = range(6)
+
+
+def parse_nav_pvt(payload: bytes) -> Optional[Dict[str, Any]]:
+    """
+    NAV-PVT 페이로드를 GpsWorker의 mapped_data 형식으로 변환합니다.
+    GPS_Time은 수신기가 계산한 측위 시각(UTC epoch 초, 나노초 보정 포함)이며 시각이 유효하지 않으면 None입니다.
+    """
+    if len(payload) < NAV_PVT.size:
+        return None
+    (itow, year, month, day, hour, minute, sec, valid, t_acc, nano,
+     fix_type, flags, flags2, num_sv, lon, lat, height, h_msl, h_acc, v_acc,
+     vel_n, vel_e, vel_d, g_speed, head_mot, s_acc, head_acc, p_dop, flags3,
+     head_veh, mag_dec, mag_acc) = NAV_PVT.unpack_from(payload)
+
+    fix_ok = bool(flags & 0x01)
+    gps_time = None
+    if valid & 0x03 == 0x03:  # validDate + validTime
+        gps_time = calendar.timegm((year, month, day, hour, minute, sec, 0, 0, 0)) + nano * 1e-9
+
+    # NMEA와 같은 의미로 맞춤: gps_fix_type = GGA 품질, gps_fix_mode = GSA 측위 모드
+    if not fix_ok or fix_type in (FIX_NONE, FIX_TIME):
+        quality = 0
+    elif flags >> 6:  # carrSoln (1: float, 2: fixed)
+        quality = 4 if (flags >> 6) == 2 else 5
+    elif flags & 0x02:  # diffSoln
+        quality = 2
+    elif fix_type == FIX_DR:
+        quality = 6
+    else:
+        quality = 1
+    mode = 3 if fix_type in (FIX_3D, FIX_GNSS_DR) else 2 if fix_type == FIX_2D else 1
+
+    return {
+        "Latitude": lat * 1e-7,
+        "Longitude": lon * 1e-7,
+        "GPS_Speed_KPH": g_speed * 0.0036,
+        "Satellites": num_sv,
+        "Altitude_m": h_msl / 1000.0,
+        "Heading_deg": head_mot * 1e-5,
+        "gps_fix": fix_ok,
+        "gps_fix_type": quality,
+        "gps_fix_mode": mode,
+        "GPS_Time": gps_time,
+    }
+
+
+class UbxStreamParser:
+    """바이트 스트림에서 체크섬이 맞는 UBX 프레임 (class, id, payload)을 뽑아냅니다."""
+
+    def __init__(self):
+        self._buf = bytearray()
+        self.frames = 0
+        self.bad_checksum = 0
+
+    def feed(self, data: bytes) -> List[Tuple[int, int, bytes]]:
+        buf = self._buf
+        buf += data
+        out: List[Tuple[int, int, bytes]] = []
+        pos = 0
+        while True:
+            start = buf.find(SYNC, pos)
+            if start < 0:
+                # 마지막 바이트가 0xB5면 다음 조각과 이어질 수 있으므로 남긴다
+                pos = len(buf) - 1 if buf.endswith(SYNC[:1]) else len(buf)
+                break
+            if len(buf) - start < _HEADER.size:
+                pos = start
+                break
+            _, cls, msg_id, length = _HEADER.unpack_from(buf, start)
+            if length > MAX_PAYLOAD:
+                pos = start + 2
+                continue
+            end = start + _HEADER.size + length + 2
+            if len(buf) < end:
+                pos = start
+                break
+            if checksum(buf[start + 2:end - 2]) != buf[end - 2:end]:
+                self.bad_checksum += 1
+                pos = start + 2
+                continue
+            self.frames += 1
+            out.append((cls, msg_id, bytes(buf[start + _HEADER.size:end - 2])))
+            pos = end
+        del buf[:pos]
+        return out
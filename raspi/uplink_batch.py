@@ -0,0 +1,49 @@
+import time
+import threading
+from array import array
+from typing import Any, Callable, Dict, Optional, Sequence
+
+
+class SeriesBatcher:
+    """
+    업링크 주기 사이의 시그널 값을 고정 주기로 샘플링해 컬럼형(시그널마다 배열 하나)으로 모읍니다.
+    drain()은 {"t0": 첫 샘플 벽시계 시각, "dt_ms": [t0 기준 ms], "values": {시그널: [값, ...]}}를 반환하며
+    아직 수신되지 않은 값은 None입니다. 업링크가 끊겨 drain이 늦어지면 max_rows를 넘는 오래된 행은 버립니다.
+    """
+
+    def __init__(self, names: Sequence[str], read: Callable[[str], Any], max_rows: int = 250):
+        self.names = tuple(names)
+        self._read = read
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._t = array('d')
+        self._cols = [[] for _ in self.names]
+
+    def sample(self, ts: Optional[float] = None):
+        if ts is None:
+            ts = time.time()
+        row = [self._read(name) for name in self.names]
+        with self._lock:
+            self._t.append(ts)
+            for col, value in zip(self._cols, row):
+                col.append(value)
+            if len(self._t) > self.max_rows:
+                del self._t[0]
+                for col in self._cols:
+                    del col[0]
+
+    def drain(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if not self._t:
+                return None
+            t, cols = self._t, self._cols
+            self._reset()
+        t0 = t[0]
+        return {
+            "t0": t0,
+            "dt_ms": [round((x - t0) * 1000) for x in t],
+            "values": dict(zip(self.names, cols)),
+        }
@@ -0,0 +1,78 @@
+import time
+from typing import AbstractSet, Any, Dict, Iterable, Mapping, Optional
+
+# 델타 대상 그룹 (trace/timestamp 등 나머지 키는 매번 그대로 전송)
+DELTA_GROUPS = ("can", "gps", "accel", "fusion")
+
+
+class DeltaFramer:
+    """
+    업링크 dict를 키프레임(전체) 또는 델타(데드밴드 이상 변한 시그널만) 프레임으로 바꿉니다.
+    비교 기준은 마지막으로 '보낸' 값이므로 데드밴드보다 느린 드리프트도 누적되면 결국 전송됩니다.
+    keyframe_interval 초마다, 또는 request_keyframe() 호출(서버 요청) 후 다음 프레임은 키프레임입니다.
+    """
+
+    def __init__(self, deadbands: Optional[Mapping[str, float]] = None, keyframe_interval: float = 5.0,
+                 groups: Iterable[str] = DELTA_GROUPS):
+        self.deadbands = dict(deadbands or {})
+        self.keyframe_interval = keyframe_interval
+        self.groups = tuple(groups)
+        self._sent: Dict[str, Dict[str, Any]] = {g: {} for g in self.groups}
+        self._last_key = 0.0
+        self._key_requested = True  # 첫 프레임은 항상 키프레임
+        self.stats = {"keyframes": 0, "deltas": 0, "signals_sent": 0, "signals_total": 0}
+
+    def request_keyframe(self):
+        """다음 프레임을 키프레임으로 보냅니다 (MQTT 스레드에서 호출해도 됨)."""
+        self._key_requested = True
+
+    def frame(self, data: Dict[str, Any], now: Optional[float] = None,
+              omit: AbstractSet[str] = frozenset()) -> Dict[str, Any]:
+        """omit: 이번 델타 프레임에서 뺄 시그널 (보낸 것으로 치지 않으므로 다음에 포함될 때 다시 비교). 키프레임은 무시."""
+        if now is None:
+            now = time.monotonic()
+        key = self._key_requested or now - self._last_key >= self.keyframe_interval
+        out = dict(data)
+        out["keyframe"] = key
+        stats = self.stats
+        if key:
+            self._key_requested = False
+            self._last_key = now
+            stats["keyframes"] += 1
+        else:
+            stats["deltas"] += 1
+        deadbands = self.deadbands
+        for group in self.groups:
+            values = data.get(group)
+            if not values:
+                continue
+            sent = self._sent[group]
+            stats["signals_total"] += len(values)
+            if key:
+                sent.clear()
+                sent.update(values)
+                stats["signals_sent"] += len(values)
+                continue
+            changed = {}
+            for name, value in values.items():
+                if name in omit:
+                    continue
+                last = sent.get(name, _MISSING)
+                if last is _MISSING or _changed(last, value, deadbands.get(name, 0.0)):
+                    changed[name] = value
+                    sent[name] = value
+            out[group] = changed
+            stats["signals_sent"] += len(changed)
+        return out
+
+
+_MISSING = object()
+
+
+def _changed(last: Any, value: Any, deadband: float) -> bool:
+    if value is None or last is None or isinstance(value, bool) or isinstance(last, bool):
+        return value != last
+    try:
+        return abs(value - last) >= deadband if deadband else value != last
+    except TypeError:
+        return value != last
@@ -0,0 +1,130 @@
+import time
+import sqlite3
+import threading
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+
+class UplinkQueue:
+    """
+    브로커에 보내지 못한 업링크 메시지를 SQLite(WAL)에 쌓아 두는 디스크 큐.
+    크기가 max_bytes를 넘으면 가장 오래된 메시지부터 버립니다. 재연결 후 drain()으로 오래된 순서대로
+    다시 보내고, 브로커가 수신을 확인(PUBACK)한 메시지만 지웁니다. ack_timeout 초 안에 확인이 없으면
+    (보내는 도중 끊김, 전원 차단 등) 다음 drain에서 다시 보냅니다 (적어도 한 번 전달, 중복은 서버가 거름).
+    """
+
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024, ack_timeout: float = 30.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ack_timeout = ack_timeout
+        self._inflight: Dict[int, Tuple[float, int]] = {}  # 보냈지만 확인 전인 행 id -> (보낸 시각, 크기)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")  # WAL: 전원 차단 시 마지막 몇 건만 잃을 수 있음
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, ts REAL NOT NULL, topic TEXT NOT NULL, payload BLOB NOT NULL)"
+        )
+        self.dropped = 0
+        self.replayed = 0
+        self.replay_rate = 0.0  # 재전송 처리량 (msg/s, 지수 평균)
+        self._last_drain: Optional[float] = None
+        self._refresh_counters()
+        if self.depth:
+            print(f"[INFO] 업링크 큐에 이전 실행의 메시지 {self.depth}건이 남아 있습니다. 재연결 후 재전송합니다.")
+
+    def _refresh_counters(self):
+        depth, size, oldest = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(payload)), 0), MIN(ts) FROM outbox").fetchone()
+        self.depth, self.bytes, self._oldest = depth, size, oldest
+
+    def push(self, topic: str, payload: Union[bytes, str], ts: Optional[float] = None):
+        if isinstance(payload, str):
+            payload = payload.encode()
+        if ts is None:
+            ts = time.time()
+        with self._lock:
+            self._db.execute("INSERT INTO outbox (ts, topic, payload) VALUES (?, ?, ?)", (ts, topic, payload))
+            self.depth += 1
+            self.bytes += len(payload)
+            if self._oldest is None:
+                self._oldest = ts
+            if self.bytes > self.max_bytes:
+                self._trim_locked()
+
+    def _trim_locked(self):
+        """용량의 90%까지 오래된 메시지를 버립니다."""
+        excess = self.bytes - self.max_bytes * 0.9
+        count = max(1, int(self.depth * excess / max(self.bytes, 1)) + 1)
+        self._db.execute("DELETE FROM outbox WHERE id IN (SELECT id FROM outbox ORDER BY id LIMIT ?)", (count,))
+        before = self.depth
+        self._refresh_counters()
+        self.dropped += before - self.depth
+
+    def drain(self, publish: Callable[[str, bytes, Callable[[], None]], bool], max_count: int) -> int:
+        """
+        확인 대기 중이 아닌 오래된 메시지부터 최대 max_count건을 publish(topic, payload, on_ack)로 보냅니다.
+        publish 는 브로커가 수신을 확인하면 on_ack()를 호출해야 하며, 그때 행을 지웁니다.
+        publish가 False를 반환하면(연결 끊김 등) 멈춥니다. 보낸 건수를 반환합니다.
+        """
+        if max_count <= 0 or not self.depth:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            for row_id, (sent_at, _) in list(self._inflight.items()):
+                if now - sent_at > self.ack_timeout:
+                    del self._inflight[row_id]  # 확인 유실: 다시 보냄
+            rows: List[Tuple[int, str, bytes]] = self._db.execute(
+                "SELECT id, topic, payload FROM outbox ORDER BY id LIMIT ?",
+                (max_count + len(self._inflight),)).fetchall()
+        sent = 0
+        for row_id, topic, payload in rows:
+            if sent >= max_count:
+                break
+            if row_id in self._inflight:
+                continue
+            with self._lock:
+                self._inflight[row_id] = (now, len(payload))
+            if not publish(topic, payload, lambda row_id=row_id: self._ack(row_id)):
+                with self._lock:
+                    self._inflight.pop(row_id, None)
+                break
+            sent += 1
+        with self._lock:
+            if self._last_drain is not None:
+                rate = sent / max(now - self._last_drain, 1e-3)
+                self.replay_rate += 0.2 * (rate - self.replay_rate)
+            self._last_drain = now
+        return sent
+
+    def _ack(self, row_id: int):
+        """브로커가 재전송 메시지를 확인함: 그 행만 지웁니다 (MQTT 네트워크 스레드에서 호출)."""
+        with self._lock:
+            entry = self._inflight.pop(row_id, None)
+            deleted = self._db.execute("DELETE FROM outbox WHERE id = ?", (row_id,)).rowcount
+            if not deleted:
+                return  # 이미 지워짐 (용량 초과로 버림, 시간 초과 후 재전송된 쪽이 먼저 확인됨 등)
+            self.depth -= 1
+            if entry is not None:
+                self.bytes -= entry[1]
+            else:
+                self._refresh_counters()
+            oldest = self._db.execute("SELECT ts FROM outbox ORDER BY id LIMIT 1").fetchone()
+            self._oldest = oldest[0] if oldest else None
+            self.replayed += 1
+
+    def stats(self) -> Dict[str, float]:
+        """큐 깊이, 가장 오래된 메시지의 나이, 재전송 처리량 (업링크/상태 표시용)"""
+        age = time.time() - self._oldest if self._oldest is not None else 0.0
+        return {
+            "queue_depth": self.depth,
+            "queue_kb": round(self.bytes / 1024, 1),
+            "backlog_age_s": round(age, 1),
+            "replayed": self.replayed,
+            "replay_rate": round(self.replay_rate, 1),
+            "dropped": self.dropped,
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,102 @@
+import time
+from typing import Any, Dict, FrozenSet, Iterable, Mapping, Optional, Sequence, Tuple
+
+# 단계: (업링크 주기 s, {계층: n번째 프레임마다 포함, 0이면 제외})
+RateLevel = Tuple[float, Mapping[str, int]]
+
+
+class UplinkRateController:
+    """
+    MQTT 링크 상태(QoS 1 PUBACK 지연, 미확인 메시지 수)에 따라 업링크 주기와 포함할 시그널 계층을 조절합니다.
+
+    levels[0]이 가장 좋은 링크용 설정이고 뒤로 갈수록 주기를 늘리고 낮은 계층부터 빈도를 줄이거나 뺍니다.
+    지연이나 미확인 수가 한계를 넘으면 곧바로(최소 degrade_hold 간격) 한 단계 내리고, 회복 조건이
+    recover_sec 동안 계속 유지되어야 한 단계 올립니다 (단계가 오르내리며 흔들리지 않도록).
+    tiers에 없는 시그널은 default_tier 계층입니다.
+    """
+
+    def __init__(self, tiers: Mapping[str, Iterable[str]], levels: Sequence[RateLevel],
+                 degrade_latency: float = 0.8, recover_latency: float = 0.25,
+                 max_inflight: int = 10, recover_sec: float = 5.0, degrade_hold: float = 1.0,
+                 default_tier: str = "low"):
+        self.tier_of: Dict[str, str] = {name: tier for tier, names in tiers.items() for name in names}
+        self.levels = list(levels)
+        self.default_tier = default_tier
+        self.degrade_latency = degrade_latency
+        self.recover_latency = recover_latency
+        self.max_inflight = max_inflight
+        self.recover_sec = recover_sec
+        self.degrade_hold = degrade_hold
+        self.level = 0
+        self.latency = 0.0
+        self.inflight = 0
+        self._frames: Dict[str, int] = {}
+        self._changed_at = 0.0
+        self._healthy_since: Optional[float] = None
+
+    @property
+    def interval(self) -> float:
+        return self.levels[self.level][0]
+
+    @property
+    def scale(self) -> float:
+        """현재 단계 주기 / 0단계 주기 (소스별 토픽의 주기를 같은 비율로 늘릴 때 사용)"""
+        return self.interval / self.levels[0][0]
+
+    def update(self, latency: float, inflight: int, now: Optional[float] = None) -> int:
+        """링크 측정값으로 단계를 갱신합니다. latency는 PUBACK 지연(또는 가장 오래된 미확인 메시지 대기 시간)."""
+        if now is None:
+            now = time.monotonic()
+        self.latency, self.inflight = latency, inflight
+        congested = latency > self.degrade_latency or inflight > self.max_inflight
+        if congested:
+            self._healthy_since = None
+            if self.level < len(self.levels) - 1 and now - self._changed_at >= self.degrade_hold:
+                self._set_level(self.level + 1, now, latency, inflight)
+        elif latency <= self.recover_latency and inflight <= 1:
+            if self._healthy_since is None:
+                self._healthy_since = now
+            elif self.level > 0 and now - self._healthy_since >= self.recover_sec:
+                self._set_level(self.level - 1, now, latency, inflight)
+                self._healthy_since = now
+        else:
+            self._healthy_since = None
+        return self.level
+
+    def _set_level(self, level: int, now: float, latency: float, inflight: int):
+        direction = "하향" if level > self.level else "상향"
+        self.level = level
+        self._changed_at = now
+        print(f"\n[MQTT] 업링크 단계 {direction}: {level} (주기 {self.interval}s, "
+              f"지연 {latency * 1000:.0f}ms, 미확인 {inflight})")
+
+    def omitted(self, data: Mapping[str, Any], groups: Iterable[str], key: str = "") -> FrozenSet[str]:
+        """
+        이번 프레임에서 뺄 시그널 이름. 호출할 때마다 key(업링크 토픽)별 프레임 번호가 하나 늘어납니다.
+        """
+        frame = self._frames[key] = self._frames.get(key, 0) + 1
+        every = self.levels[self.level][1]
+        skip = {tier for tier, n in every.items() if n <= 0 or frame % n}
+        if self.default_tier not in every:
+            skip.add(self.default_tier)
+        if not skip:
+            return frozenset()
+        tier_of, default = self.tier_of, self.default_tier
+        return frozenset(name for group in groups for name in (data.get(group) or ())
+                         if tier_of.get(name, default) in skip)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"level": self.level, "interval": self.interval,
+                "latency_ms": round(self.latency * 1000), "inflight": self.inflight}
+
+
+def drop_signals(data: Dict[str, Any], groups: Iterable[str], omit: FrozenSet[str]) -> Dict[str, Any]:
+    """data의 각 그룹에서 omit 에 든 시그널을 뺀 사본"""
+    if not omit:
+        return data
+    out = dict(data)
+    for group in groups:
+        values = data.get(group)
+        if values:
+            out[group] = {k: v for k, v in values.items() if k not in omit}
+    return out
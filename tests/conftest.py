@@ -0,0 +1,8 @@
+import os
+import sys
+
+# raspi 는 패키지(상대 import), web_server 는 실행 디렉터리 기준 평면 import 를 쓰므로 둘 다 경로에 추가
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "web_server")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
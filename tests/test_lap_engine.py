@@ -0,0 +1,55 @@
+import math
+
+import pytest
+
+from lap_engine import LapEngine, EARTH_RADIUS_M
+
+LAT0, LON0 = 37.2830, 127.0450
+# 원점에서 북쪽(y)으로 1m 에 해당하는 위도 차
+DLAT = math.degrees(1 / EARTH_RADIUS_M)
+DLON = math.degrees(1 / (EARTH_RADIUS_M * math.cos(math.radians(LAT0))))
+
+
+def at(x_m: float, y_m: float):
+    return LAT0 + y_m * DLAT, LON0 + x_m * DLON
+
+
+def make_engine(**kwargs):
+    # 동서 방향 20m 결승선 (y = 0), 북쪽 100m 에 섹터선
+    engine = LapEngine(**kwargs)
+    engine.set_lines([at(-10, 0), at(10, 0)], [[at(-10, 100), at(10, 100)]])
+    return engine
+
+
+def test_crossing_time_is_interpolated_between_fixes():
+    engine = make_engine()
+    assert engine.feed(0.0, *at(0, -4)) == []
+    # y=-4 -> y=+6 사이 0.4 지점에서 통과: 0.0 + 0.4 * 1.0
+    (event,) = engine.feed(1.0, *at(0, 6))
+    assert event["type"] == "lap_start"
+    assert event["time"] == pytest.approx(0.4, abs=1e-6)
+
+
+def test_lap_and_sector_times():
+    engine = make_engine(min_lap_sec=10.0, min_sector_sec=3.0)
+    events = []
+    # 북쪽으로 달려 섹터선 통과 후 되돌아와 결승선 재통과 (되돌아올 때의 섹터선 재통과는 순서가 맞지 않아 무시)
+    track = [(0.0, -5), (1.0, 5), (10.0, 95), (11.0, 105), (12.0, 110)]
+    track += [(t, y) for t, y in ((20.0, 20), (21.0, 5), (22.0, -5))]
+    for t, y in track:
+        events.extend(engine.feed(t, *at(0, y)))
+    kinds = [e["type"] for e in events]
+    assert kinds == ["lap_start", "sector", "lap"]
+    assert events[1]["sector_time"] == pytest.approx(10.0, abs=1e-3)  # 0.5 -> 10.5
+    lap = events[2]
+    assert lap["lap_time"] == pytest.approx(21.0, abs=1e-3)  # 0.5 -> 21.5
+    assert lap["sectors"] == pytest.approx([10.0, 11.0], abs=1e-3)
+    assert lap["best"] is True
+
+
+def test_repeated_fix_and_short_recross_are_ignored():
+    engine = make_engine(min_lap_sec=10.0)
+    engine.feed(0.0, *at(0, -5))
+    assert engine.feed(1.0, *at(0, 5))[0]["type"] == "lap_start"
+    assert engine.feed(1.1, *at(0, 5)) == []  # 같은 측위 반복
+    assert engine.feed(2.0, *at(0, -5)) == []  # min_lap_sec 안의 재통과
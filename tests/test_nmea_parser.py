@@ -0,0 +1,64 @@
+from functools import reduce
+
+import pytest
+
+from raspi.nmea_parser import NmeaParser, checksum_ok
+
+
+def sentence(body: str) -> bytes:
+    cs = reduce(lambda a, b: a ^ b, body.encode(), 0)
+    return f"${body}*{cs:02X}".encode()
+
+
+RMC = sentence("GNRMC,120000.00,A,3716.980,N,12702.700,E,10.0,90.5,010125,,,A")
+VTG = sentence("GNVTG,91.0,T,,M,10.0,N,18.6,K,A")
+GGA = sentence("GNGGA,120000.00,3716.980,N,12702.700,E,1,12,0.9,50.0,M,0,M,,")
+GSA = sentence("GNGSA,A,3,01,02,03,,,,,,,,,,1.5,0.8,1.2")
+
+
+@pytest.mark.parametrize("line", [RMC, VTG, GGA, GSA, sentence("GPGSV,1,1,01,01,40,083,46")])
+def test_checksum_matches_reference_xor(line):
+    assert checksum_ok(line, line.rfind(b"*"))
+
+
+def test_checksum_rejects_corruption():
+    bad = RMC.replace(b"3716.980", b"3716.981")
+    assert not checksum_ok(bad, bad.rfind(b"*"))
+    parser = NmeaParser()
+    assert parser.parse(bad) is None
+    assert parser.bad_checksum == 1 and parser.state == {}
+
+
+def test_epoch_sentences_fill_state():
+    parser = NmeaParser()
+    assert [parser.parse(line + b"\r") for line in (RMC, VTG, GGA, GSA)] == [b"RMC", b"VTG", b"GGA", b"GSA"]
+    st = parser.state
+    assert st["lat"] == pytest.approx(37 + 16.98 / 60)
+    assert st["lon"] == pytest.approx(127 + 2.7 / 60)
+    assert st["GPS_Speed_KPH"] == 18.6  # VTG 가 RMC(10 knot)를 덮어씀
+    assert st["heading"] == 91.0
+    assert st["gps_fix"] is True and st["satellites"] == 12 and st["gps_fix_type"] == 1
+    assert st["fix_mode"] == 3 and st["hdop"] == 0.8
+
+
+def test_unhandled_sentences_and_talkers_are_ignored():
+    parser = NmeaParser()
+    assert parser.parse(sentence("GPGSV,1,1,01,01,40,083,46")) is None
+    assert parser.parse(sentence("XXRMC,120000.00,A,3716.980,N,12702.700,E,10.0,90.5,010125,,,A")) is None
+    assert parser.parse(b"garbage") is None
+    assert parser.ignored == 2 and parser.state == {}
+
+
+def test_gps_worker_sends_once_per_epoch_with_vtg_and_gsa():
+    pytest.importorskip("serial")
+    from raspi.gps_worker import GpsWorker
+
+    sent = []
+    worker = GpsWorker("/dev/null", 9600, on_update=sent.append)
+    counts = []
+    for _ in range(3):
+        worker._feed(b"\r\n".join((RMC, VTG, GGA, GSA)) + b"\r\n")
+        counts.append(len(sent))
+    # 첫 에포크는 끝 문장을 아직 모르므로 다음 RMC 에서 보내고, 그 뒤로는 GSA(에포크 끝)에서 바로 보냄
+    assert counts == [0, 2, 3]
+    assert all(p["GPS_Speed_KPH"] == 18.6 and p["HDOP"] == 0.8 and p["gps_fix_mode"] == 3 for p in sent)
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from raspi import telemetry_codec as pi_codec
+import telemetry_codec as server_codec
+
+SCHEMA = [
+    ("can", [("RPM", "H"), ("TPS_percent", "f"), ("Gear", "b"), ("CEL_Error", "B")]),
+    ("gps", [("Latitude", "d"), ("Longitude", "d"), ("GPS_Speed_KPH", "f"), ("gps_fix", "?")]),
+    ("accel", [("ax_g", "f"), ("ay_g", "f")]),
+]
+
+
+def make_message():
+    return {
+        "timestamp": "2025-01-01 12:00:00.000",
+        "can": {"RPM": 7250, "TPS_percent": 42.5, "Gear": 3, "CEL_Error": 0, "NewSignal": 1.25},
+        "gps": {"Latitude": 37.283012345678, "Longitude": 127.045098765432, "GPS_Speed_KPH": 88.12, "gps_fix": True},
+        "accel": {"ax_g": -0.512, "ay_g": None},
+        "trace": {"seq": 17, "pub": 1735700000.25, "rx": {"can": 1735700000.125, "gps": 1735699999.9}},
+        "keyframe": True,
+        "series": {"t0": 1735700000.0, "dt_ms": [0, 40, 80], "values": {"RPM": [7000, None, 7250]}},
+    }
+
+
+def test_round_trip_through_server_decoder():
+    schema = pi_codec.TelemetrySchema(SCHEMA)
+    payload = pi_codec.TelemetryCodec(schema).encode(make_message())
+    assert server_codec.is_binary(payload)
+
+    decoder = server_codec.TelemetryDecoder()
+    assert decoder.add_schema(schema.json) == schema.id
+    out = decoder.decode(payload)
+
+    assert out["can"] == {"RPM": 7250, "TPS_percent": 42.5, "Gear": 3, "CEL_Error": 0, "NewSignal": 1.25}
+    assert out["gps"]["Latitude"] == 37.283012345678
+    assert out["gps"]["GPS_Speed_KPH"] == 88.12  # float32 -> 유효숫자 7자리
+    assert out["gps"]["gps_fix"] is True
+    assert out["accel"] == {"ax_g": -0.512}  # None 은 보내지 않음
+    assert out["trace"] == make_message()["trace"]
+    assert out["keyframe"] is True
+    assert out["series"] == make_message()["series"]
+    assert out["timestamp"] == "2025-01-01 12:00:00.000"
+
+
+def test_series_with_unknown_signal_falls_back_to_json():
+    schema = pi_codec.TelemetrySchema(SCHEMA)
+    codec = pi_codec.TelemetryCodec(schema)
+    message = {"can": {"RPM": 1}, "series": {"t0": 1.0, "dt_ms": [0, 40], "values": {"Unknown": [1.5, 2.5]}}}
+    assert codec.decode(codec.encode(message))["series"] == message["series"]
+
+
+def test_server_loads_the_same_codec_source():
+    assert server_codec.CODEC_HASH == pi_codec.CODEC_HASH
+    assert server_codec.WIRE_VERSION == pi_codec.WIRE_VERSION
+
+
+def test_schema_from_different_codec_is_rejected():
+    spec = json.loads(pi_codec.TelemetrySchema(SCHEMA).json)
+    spec["codec"] = "00000000"
+    with pytest.raises(ValueError):
+        server_codec.TelemetryDecoder().add_schema(json.dumps(spec))
+
+
+def test_message_for_other_schema_is_rejected():
+    codec_a = pi_codec.TelemetryCodec(pi_codec.TelemetrySchema(SCHEMA))
+    codec_b = pi_codec.TelemetryCodec(pi_codec.TelemetrySchema(SCHEMA[:1]))
+    with pytest.raises(ValueError):
+        codec_b.decode(codec_a.encode({"can": {"RPM": 1}}))
@@ -0,0 +1,39 @@
+import math
+import random
+
+from track_store import douglas_peucker
+
+
+def _distance_to_segment(p, a, b):
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    seg2 = dx * dx + dy * dy
+    u = 0.0 if seg2 == 0 else max(0.0, min(1.0, ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / seg2))
+    return math.hypot(p[0] - a[0] - u * dx, p[1] - a[1] - u * dy)
+
+
+def test_straight_line_keeps_only_endpoints():
+    xy = [(float(i), 0.0) for i in range(50)]
+    assert douglas_peucker(xy, 0.5) == [0, 49]
+
+
+def test_corner_is_kept():
+    xy = [(float(i), 0.0) for i in range(11)] + [(10.0, float(i)) for i in range(1, 11)]
+    assert douglas_peucker(xy, 0.5) == [0, 10, 20]
+
+
+def test_short_inputs_are_returned_as_is():
+    assert douglas_peucker([], 1.0) == []
+    assert douglas_peucker([(0.0, 0.0)], 1.0) == [0]
+    assert douglas_peucker([(0.0, 0.0), (1.0, 1.0)], 1.0) == [0, 1]
+
+
+def test_every_dropped_point_is_within_tolerance():
+    rng = random.Random(3)
+    xy = [(i * 2.0, 30 * math.sin(i / 15) + rng.uniform(-1, 1)) for i in range(500)]
+    tolerance = 1.5
+    keep = douglas_peucker(xy, tolerance)
+    assert keep[0] == 0 and keep[-1] == len(xy) - 1 and keep == sorted(keep)
+    assert len(keep) < len(xy) // 2
+    for a, b in zip(keep, keep[1:]):
+        for i in range(a + 1, b):
+            assert _distance_to_segment(xy[i], xy[a], xy[b]) <= tolerance + 1e-9
@@ -0,0 +1,58 @@
+import calendar
+
+import pytest
+
+from raspi import ubx
+
+
+def nav_pvt_payload(**overrides):
+    fields = dict(
+        itow=0, year=2025, month=1, day=2, hour=3, minute=4, sec=5, valid=0x07, t_acc=0, nano=250_000_000,
+        fix_type=ubx.FIX_3D, flags=0x01, flags2=0, num_sv=17, lon=1270450000, lat=372830000, height=0,
+        h_msl=52_500, h_acc=0, v_acc=0, vel_n=0, vel_e=0, vel_d=0, g_speed=25_000, head_mot=9_050_000,
+        s_acc=0, head_acc=0, p_dop=0, flags3=0, head_veh=0, mag_dec=-830, mag_acc=0,
+    )
+    fields.update(overrides)
+    return ubx.NAV_PVT.pack(*fields.values())
+
+
+def test_cfg_rate_frame_matches_u_blox_reference():
+    # u-center 가 만드는 10Hz CFG-RATE 프레임
+    assert ubx.cfg_rate(10) == bytes.fromhex("B5 62 06 08 06 00 64 00 01 00 01 00 7A 12")
+
+
+def test_parse_nav_pvt_maps_to_gps_fields():
+    out = ubx.parse_nav_pvt(nav_pvt_payload())
+    assert out["Latitude"] == pytest.approx(37.283)
+    assert out["Longitude"] == pytest.approx(127.045)
+    assert out["GPS_Speed_KPH"] == pytest.approx(90.0)  # 25 m/s
+    assert out["Heading_deg"] == pytest.approx(90.5)
+    assert out["Altitude_m"] == 52.5
+    assert out["Satellites"] == 17
+    assert out["gps_fix"] is True and out["gps_fix_type"] == 1 and out["gps_fix_mode"] == 3
+    assert out["GPS_Time"] == pytest.approx(calendar.timegm((2025, 1, 2, 3, 4, 5, 0, 0, 0)) + 0.25)
+
+
+def test_parse_nav_pvt_without_fix_or_time():
+    out = ubx.parse_nav_pvt(nav_pvt_payload(flags=0, fix_type=ubx.FIX_NONE, valid=0))
+    assert out["gps_fix"] is False and out["gps_fix_type"] == 0 and out["gps_fix_mode"] == 1
+    assert out["GPS_Time"] is None
+    assert ubx.parse_nav_pvt(b"\x00" * 10) is None
+
+
+def test_mag_dec_is_signed():
+    assert ubx.NAV_PVT.unpack(nav_pvt_payload(mag_dec=-830))[-2] == -830
+
+
+def test_stream_parser_resyncs_and_reassembles_split_frames():
+    pvt = ubx.frame(ubx.CLS_NAV, ubx.ID_NAV_PVT, nav_pvt_payload())
+    corrupt = bytearray(pvt)
+    corrupt[10] ^= 0xFF
+    stream = b"$GNRMC,junk\r\n" + bytes(corrupt) + b"\xb5" + pvt
+    parser = ubx.UbxStreamParser()
+    frames = []
+    for i in range(0, len(stream), 7):
+        frames.extend(parser.feed(stream[i:i + 7]))
+    assert [(c, m) for c, m, _ in frames] == [(ubx.CLS_NAV, ubx.ID_NAV_PVT)]
+    assert frames[0][2] == nav_pvt_payload()
+    assert parser.bad_checksum == 1
@@ -0,0 +1,49 @@
+from raspi.uplink_delta import DeltaFramer
+from uplink_state import UplinkState
+
+
+def test_first_frame_is_keyframe_then_only_changes_beyond_deadband():
+    framer = DeltaFramer({"RPM": 50}, keyframe_interval=5.0, groups=("can",))
+    key = framer.frame({"can": {"RPM": 3000, "Gear": 2}}, now=0.0)
+    assert key["keyframe"] is True and key["can"] == {"RPM": 3000, "Gear": 2}
+
+    delta = framer.frame({"can": {"RPM": 3020, "Gear": 3}}, now=0.1)
+    assert delta["keyframe"] is False and delta["can"] == {"Gear": 3}
+
+    # 데드밴드보다 느린 드리프트도 마지막으로 보낸 값 기준으로 누적되면 전송
+    delta = framer.frame({"can": {"RPM": 3060, "Gear": 3}}, now=0.2)
+    assert delta["can"] == {"RPM": 3060}
+
+
+def test_keyframe_on_interval_and_request():
+    framer = DeltaFramer(keyframe_interval=1.0, groups=("can",))
+    framer.frame({"can": {"RPM": 1}}, now=0.0)
+    assert framer.frame({"can": {"RPM": 1}}, now=0.5)["keyframe"] is False
+    assert framer.frame({"can": {"RPM": 1}}, now=1.0)["keyframe"] is True
+    framer.request_keyframe()
+    assert framer.frame({"can": {"RPM": 1}}, now=1.1)["keyframe"] is True
+
+
+def test_omitted_signal_is_compared_again_when_included():
+    framer = DeltaFramer(groups=("can",))
+    framer.frame({"can": {"RPM": 1000, "CLT_C": 80}}, now=0.0)
+    assert framer.frame({"can": {"RPM": 1000, "CLT_C": 81}}, now=0.1, omit={"CLT_C"})["can"] == {}
+    assert framer.frame({"can": {"RPM": 1000, "CLT_C": 81}}, now=0.2)["can"] == {"CLT_C": 81}
+
+
+def test_server_rebuilds_state_and_detects_gaps():
+    framer = DeltaFramer({"RPM": 50}, groups=("can", "gps"))
+    state = UplinkState(("can", "gps"))
+    frames = [
+        {"can": {"RPM": 3000, "Gear": 2}, "gps": {"Latitude": 37.1}},
+        {"can": {"RPM": 3010, "Gear": 3}, "gps": {"Latitude": 37.1}},
+        {"can": {"RPM": 3100, "Gear": 3}, "gps": {"Latitude": 37.2}},
+    ]
+    for seq, data in enumerate(frames, 1):
+        out, need_key = state.apply(dict(framer.frame(data, now=seq * 0.1), trace={"seq": seq}))
+        assert need_key is False
+    assert out["can"] == {"RPM": 3100, "Gear": 3} and out["gps"] == {"Latitude": 37.2}
+
+    # seq 가 건너뛰면 델타 유실로 보고 키프레임을 요청
+    _, need_key = state.apply(dict(framer.frame(frames[0], now=0.5), trace={"seq": 5}))
+    assert need_key is True
@@ -29,10 +29,49 @@ MQTT_UPLOAD_INTERVAL_SEC = 0.1 # 0.1초 (10Hz) 간격으로 데이터 발행
 # MQTT 토픽 정의
 # 각 데이터 소스별로 토픽을 분리하여 수신 측에서 유연하게 처리하도록 함
 TOPIC_PREFIX = "car/emu"
+KEYFRAME_REQUEST_MIN_SEC = 1.0 # 키프레임 요청 최소 간격
 MQTT_TOPICS = {
     "CAN": f"{TOPIC_PREFIX}/can",
     "GPS": f"{TOPIC_PREFIX}/gps",
     "ACCEL": f"{TOPIC_PREFIX}/accel",
-    "STATUS": f"{TOPIC_PREFIX}/status",
-    "TELEMETRY": f"{TOPIC_PREFIX}/telemetry" # 통합 데이터를 보낼 토픽
+    "STATUS": f"{TOPIC_PREFIX}/status", # Pi 상태 요약 (retained, 비정상 종료 시 online=false)
+    "TELEMETRY": f"{TOPIC_PREFIX}/telemetry", # 통합 데이터를 보낼 토픽
+    "SCHEMA": f"{TOPIC_PREFIX}/schema", # 바이너리 페이로드 스키마 (Pi가 retained 로 발행)
+    "COMMAND_KEYFRAME": f"{TOPIC_PREFIX}/command/keyframe", # 델타 업링크 상태가 어긋나면 Pi에 키프레임 요청
+    "HISTORY": f"{TOPIC_PREFIX}/history", # 연결 끊김 동안 Pi에 쌓인 메시지의 재전송 (HISTORY/<원래 토픽 이름>)
+    "COMMAND_LAP": "vehicle/command/lap" # 랩 엔진이 완료 랩 수를 Pi(ADU)로 전달
 }
+MQTT_SOURCE_GROUPS = { # 소스별 토픽 키 -> 그 토픽이 싣는 그룹 (raspi/config.py 와 같게 유지)
+    "CAN": ("can",),
+    "GPS": ("gps", "fusion"),
+    "ACCEL": ("accel",),
+}
+MQTT_SUBSCRIBE_SOURCES = ("CAN", "GPS", "ACCEL") # 구독할 소스 토픽 (예: 랩 타이머만 쓰면 ("GPS",))
+
+# ===================== LAN 직접 경로 =====================
+LAN_UDP_ENABLE = False # Pi가 같은 Wi-Fi에서 보내는 UDP 멀티캐스트도 함께 수신 (먼저 도착한 쪽 사용)
+LAN_UDP_GROUP = "239.255.42.99" # raspi/config.py 와 같게
+LAN_UDP_PORT = 47999
+LAN_UDP_INTERFACE = "0.0.0.0" # 멀티캐스트를 받을 인터페이스 주소 (여러 NIC가 있으면 Wi-Fi 주소로 지정)
+
+# ===================== 웹 서버 =====================
+SERVER_HOST = "0.0.0.0"
+SERVER_PORT = 5000
+SERVER_ASYNC_MODE = "auto" # "gevent" / "eventlet" / "threading"(개발용 Werkzeug). auto: gevent -> eventlet -> threading 순으로 설치된 것
+
+# ===================== 클라이언트 전송 =====================
+FANOUT_DEFAULT_MAX_HZ = 30.0 # 'subscribe' 를 보내지 않은 클라이언트의 최대 전송 주기 (모든 필드)
+FANOUT_MAX_HZ = 60.0 # 클라이언트가 요청할 수 있는 최대 주기
+FANOUT_MAX_INFLIGHT = 2 # render_ack 없이 이보다 많이 밀리면 새 프레임은 합쳐 두기만 함 (느린 클라이언트는 건너뜀)
+FANOUT_ACK_TIMEOUT_SEC = 2.0 # 이 시간 동안 render_ack 가 없으면 밀린 것으로 보지 않고 다시 보냄
+FANOUT_TICK_SEC = 0.01 # 주기 때문에 미뤄 둔 전송을 확인하는 간격
+
+# ===================== 랩 타이머 =====================
+LAP_LINES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lap_lines.json") # 결승선/섹터선 저장 위치
+LAP_MIN_LAP_SEC = 10.0 # 이보다 짧은 간격의 결승선 재통과는 무시
+LAP_COMMAND_ENABLE = False # True 면 랩 완료 시 COMMAND_LAP 으로 랩 수를 Pi에 보냄 (Pi가 CAN 0x700 으로 ADU에 전달)
+
+# ===================== 주행 궤적 =====================
+TRACK_TOLERANCES_M = (1.0, 3.0, 10.0, 30.0) # 줌 단계별 Douglas-Peucker 허용 오차 (가까운 줌 -> 먼 줌)
+TRACK_FLUSH_POINTS = 20 # 이 개수의 측위가 모이면 단순화해서 증분 세그먼트로 전송
+TRACK_MAX_POINTS = 5000 # 단계별 최대 점 수 (넘으면 허용 오차를 올려 다시 단순화)
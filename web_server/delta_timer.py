@@ -0,0 +1,122 @@
+import math
+import threading
+from typing import Any, Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+EARTH_RADIUS_M = 6378137.0
+
+
+class ReferenceLap:
+    """
+    베스트 랩 궤적을 누적 거리 기준으로 저장한 NumPy 배열 묶음.
+    dist[i]는 랩 시작 후 i번째 점까지의 누적 거리(m), t[i]는 그 점의 랩 경과 시간(s)입니다.
+    """
+
+    def __init__(self, t: "np.ndarray", x: "np.ndarray", y: "np.ndarray", lap_time: float):
+        self.t = t
+        self.x = x
+        self.y = y
+        seg = np.hypot(np.diff(x), np.diff(y))
+        self.dist = np.concatenate(([0.0], np.cumsum(seg)))
+        self.length = float(self.dist[-1])
+        self.lap_time = lap_time
+
+    def project(self, x: float, y: float, lo: int, hi: int):
+        """
+        점 (x, y)를 [lo, hi) 구간의 참조 선분에 투영해 가장 가까운 위치의 (누적 거리, 참조 시간, 거리 오차)를 반환합니다.
+        """
+        hi = min(max(hi, lo + 2), len(self.x))
+        lo = max(0, min(lo, hi - 2))
+        x0, y0 = self.x[lo:hi - 1], self.y[lo:hi - 1]
+        dx, dy = self.x[lo + 1:hi] - x0, self.y[lo + 1:hi] - y0
+        seg2 = dx * dx + dy * dy
+        u = np.clip(((x - x0) * dx + (y - y0) * dy) / np.where(seg2 > 0, seg2, 1.0), 0.0, 1.0)
+        err2 = (x0 + u * dx - x) ** 2 + (y0 + u * dy - y) ** 2
+        k = int(np.argmin(err2))
+        i, frac = lo + k, float(u[k])
+        s = self.dist[i] + frac * (self.dist[i + 1] - self.dist[i])
+        ref_t = self.t[i] + frac * (self.t[i + 1] - self.t[i])
+        return float(s), float(ref_t), math.sqrt(float(err2[k]))
+
+
+class DeltaTimer:
+    """
+    현재 랩의 각 측위를 베스트 랩 참조 궤적에 투영해 실시간 델타(현재 경과 - 같은 지점의 베스트 경과)를 계산합니다.
+
+    직전 투영 거리에 GPS_Speed_KPH x 경과 시간을 더해 예상 거리를 구하고, 누적 거리 배열에서
+    searchsorted(이분 탐색)로 그 앞뒤 window_m 구간만 잘라 선분 투영합니다. 투영 구간 크기는 트랙 길이와
+    무관하므로 측위당 비용은 O(log n)입니다. 참조에서 recover_m 이상 벗어나면(코스 이탈 등) 전체 구간을
+    한 번 다시 찾습니다.
+    """
+
+    def __init__(self, window_m: float = 50.0, recover_m: float = 30.0):
+        if np is None:
+            raise RuntimeError("numpy 가 설치되어 있지 않습니다. pip install numpy")
+        self.window_m = window_m
+        self.recover_m = recover_m
+        self._lock = threading.Lock()
+        self._origin = None
+        self.reference: Optional[ReferenceLap] = None
+        self.reset()
+
+    def reset(self):
+        """참조 랩과 현재 랩 기록을 모두 지웁니다 (선 설정/랩 기록 초기화 시)."""
+        with self._lock:
+            self.reference = None
+            self._lap_start: Optional[float] = None
+            self._trace: List[tuple] = []
+            self._s = 0.0
+            self._last_t: Optional[float] = None
+            self.delta: Optional[float] = None
+
+    def start_lap(self, t: float):
+        with self._lock:
+            self._lap_start = t
+            self._trace = []
+            self._s = 0.0
+            self._last_t = t
+            self.delta = None
+
+    def finish_lap(self, lap_time: float, best: bool):
+        """랩 완료 시 호출. 베스트 랩이면 지금까지 기록한 궤적으로 참조를 교체합니다."""
+        with self._lock:
+            if best and len(self._trace) >= 2:
+                arr = np.asarray(self._trace, dtype=np.float64)
+                self.reference = ReferenceLap(arr[:, 0], arr[:, 1], arr[:, 2], lap_time)
+
+    def add_fix(self, t: float, lat: float, lon: float, speed_kph: Optional[float]) -> Optional[Dict[str, Any]]:
+        """측위 하나를 현재 랩에 추가하고, 참조가 있으면 델타 정보를 반환합니다."""
+        with self._lock:
+            if self._lap_start is None or lat is None or lon is None:
+                return None
+            if self._origin is None:
+                self._origin = (lat, lon, math.cos(math.radians(lat)))
+            lat0, lon0, coslat = self._origin
+            x = math.radians(lon - lon0) * EARTH_RADIUS_M * coslat
+            y = math.radians(lat - lat0) * EARTH_RADIUS_M
+            elapsed = t - self._lap_start
+            self._trace.append((elapsed, x, y))
+
+            ref = self.reference
+            if ref is None:
+                return None
+            dt = t - self._last_t if self._last_t is not None else 0.0
+            self._last_t = t
+            s_est = self._s + max(dt, 0.0) * (speed_kph or 0.0) / 3.6
+            lo, hi = np.searchsorted(ref.dist, (s_est - self.window_m, s_est + self.window_m))
+            s, ref_t, err = ref.project(x, y, int(lo) - 1, int(hi) + 1)
+            if err > self.recover_m:
+                s, ref_t, err = ref.project(x, y, 0, len(ref.dist))
+            self._s = s
+            self.delta = elapsed - ref_t
+            return {
+                "delta": round(self.delta, 3),
+                "elapsed": round(elapsed, 3),
+                "distance_m": round(s, 1),
+                "ref_lap_time": round(ref.lap_time, 3),
+                "ref_offset_m": round(err, 1),
+            }
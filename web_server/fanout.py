@@ -0,0 +1,199 @@
+import time
+import threading
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from uplink_state import DELTA_GROUPS
+
+# 그룹 -> 받을 시그널 이름 (None 이면 그룹 전체). 구독 전체가 None 이면 모든 그룹
+FieldSet = Optional[Dict[str, Optional[FrozenSet[str]]]]
+
+
+def merge_series(a: Optional[Dict[str, Any]], b: Dict[str, Any]) -> Dict[str, Any]:
+    """두 시계열 블록을 a.t0 기준 하나로 이어 붙입니다 (한쪽에만 있는 시그널은 None 으로 채움)."""
+    if not a:
+        return b
+    shift = round((b["t0"] - a["t0"]) * 1000)
+    rows_a, rows_b = len(a["dt_ms"]), len(b["dt_ms"])
+    values = {}
+    for name in set(a["values"]) | set(b["values"]):
+        col_a = a["values"].get(name) or [None] * rows_a
+        col_b = b["values"].get(name) or [None] * rows_b
+        values[name] = list(col_a) + list(col_b)
+    return {"t0": a["t0"], "dt_ms": list(a["dt_ms"]) + [shift + d for d in b["dt_ms"]], "values": values}
+
+
+class ClientFeed:
+    """클라이언트(socket.io 세션) 하나의 구독 설정과, 아직 보내지 않은 최신 값(세션별 깊이 1 큐)"""
+
+    def __init__(self, fields: FieldSet, max_hz: float):
+        self.fields = fields
+        self.max_hz = max_hz
+        self.pending: Dict[str, Any] = {}
+        self.frame = 0  # 보낸 프레임 번호 (trace.frame)
+        self.acked = 0  # render_ack 로 확인된 마지막 프레임 번호
+        self.acks_seen = False  # render_ack 를 보내지 않는 클라이언트에는 백프레셔를 걸지 않음
+        self.last_sent = float("-inf")
+        self.sent = 0
+        self.coalesced = 0  # 보내기 전에 더 새 값으로 덮여 건너뛴 메시지 수
+
+    def wants_series(self) -> bool:
+        # 시계열은 CAN/가속도 시그널이므로 그 그룹을 통째로 받거나 이름을 골라 받는 경우에만
+        return self.fields is None or any(g in self.fields for g in ("can", "accel"))
+
+    def series_names(self) -> Optional[FrozenSet[str]]:
+        """시계열에서 남길 시그널 이름 (None 이면 전부)"""
+        if self.fields is None or any(self.fields.get(g, ()) is None for g in ("can", "accel") if g in self.fields):
+            return None
+        return frozenset().union(*(names for names in self.fields.values() if names))
+
+
+class FanoutHub:
+    """
+    텔레메트리를 클라이언트마다 구독한 필드만, 구독한 최대 주기로 보냅니다.
+    publish()는 세션별 pending 에 최신 값을 덮어써 합치고(coalesce), 주기가 된 세션에만 바로 보냅니다.
+    주기가 안 된 세션은 flush()(백그라운드 틱)가 나중에 보냅니다. 렌더링 확인(render_ack)이 max_inflight 프레임
+    이상 밀린 느린 클라이언트에는 보내지 않고 계속 덮어쓰므로, 버퍼가 쌓이지 않고 중간 프레임을 건너뜁니다.
+    ack_timeout 초 동안 확인이 없으면(확인 유실) 다시 보냅니다.
+    """
+
+    def __init__(self, send: Callable[[str, Dict[str, Any]], None], groups=DELTA_GROUPS,
+                 default_hz: float = 30.0, max_hz: float = 60.0, max_inflight: int = 2, ack_timeout: float = 2.0):
+        self.send = send
+        self.groups = tuple(groups)
+        self.default_hz = default_hz
+        self.max_hz = max_hz
+        self.max_inflight = max_inflight
+        self.ack_timeout = ack_timeout
+        self._lock = threading.Lock()
+        self._clients: Dict[str, ClientFeed] = {}
+
+    def add(self, sid: str):
+        with self._lock:
+            self._clients[sid] = ClientFeed(None, self.default_hz)
+
+    def remove(self, sid: str):
+        with self._lock:
+            self._clients.pop(sid, None)
+
+    def subscribe(self, sid: str, fields: Any = None, max_hz: Any = None) -> Dict[str, Any]:
+        """
+        fields: {그룹: [시그널 이름, ...] 또는 null(그룹 전체)}, 생략하면 모든 그룹.
+        max_hz: 최대 전송 주기 (생략하면 default_hz, max_hz 로 제한). 정리된 구독 설정을 반환합니다.
+        """
+        field_set = self._parse_fields(fields)
+        try:
+            hz = float(max_hz) if max_hz is not None else self.default_hz
+        except (TypeError, ValueError):
+            hz = self.default_hz
+        hz = min(max(hz, 0.1), self.max_hz)
+        with self._lock:
+            feed = self._clients.get(sid)
+            if feed is None:
+                feed = self._clients[sid] = ClientFeed(field_set, hz)
+            feed.fields, feed.max_hz = field_set, hz
+            feed.pending = {}
+        return {"fields": None if field_set is None else
+                {g: None if names is None else sorted(names) for g, names in field_set.items()},
+                "max_hz": hz}
+
+    def _parse_fields(self, fields: Any) -> FieldSet:
+        if not isinstance(fields, dict):
+            return None
+        out: Dict[str, Optional[FrozenSet[str]]] = {}
+        for group, names in fields.items():
+            if group not in self.groups:
+                continue
+            if names is None or names is True:
+                out[group] = None
+            elif isinstance(names, (list, tuple)):
+                out[group] = frozenset(str(n) for n in names)
+        return out
+
+    def ack(self, sid: str, frame: Any):
+        """클라이언트가 frame 번호까지 렌더링했음 (render_ack)"""
+        with self._lock:
+            feed = self._clients.get(sid)
+            if feed is None:
+                return
+            feed.acks_seen = True
+            if isinstance(frame, int) and feed.acked < frame <= feed.frame:
+                feed.acked = frame
+
+    def publish(self, data: Dict[str, Any], now: Optional[float] = None):
+        """메시지를 모든 세션의 pending 에 합치고 주기가 된 세션에 보냅니다."""
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            for feed in self._clients.values():
+                self._merge(feed, data)
+            ready = self._take_ready(now)
+        self._send_all(ready)
+
+    def flush(self, now: Optional[float] = None):
+        """주기 때문에 미뤄 둔 세션을 보냅니다 (백그라운드 틱에서 호출)."""
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            ready = self._take_ready(now)
+        self._send_all(ready)
+
+    def _merge(self, feed: ClientFeed, data: Dict[str, Any]):
+        pending = feed.pending
+        had_pending = bool(pending)
+        relevant = False
+        fields = feed.fields
+        for group in self.groups:
+            values = data.get(group)
+            if not values or (fields is not None and group not in fields):
+                continue
+            names = None if fields is None else fields[group]
+            if names is not None:
+                values = {k: v for k, v in values.items() if k in names}
+                if not values:
+                    continue
+            pending.setdefault(group, {}).update(values)
+            relevant = True
+        series = data.get("series")
+        if series and feed.wants_series():
+            names = feed.series_names()
+            if names is not None:
+                series = dict(series, values={k: v for k, v in series["values"].items() if k in names})
+            if series["values"]:
+                pending["series"] = merge_series(pending.get("series"), series)
+                relevant = True
+        if "lap_delta" in data and (fields is None or "gps" in fields):
+            relevant = True
+        if not relevant:
+            return
+        if had_pending:
+            feed.coalesced += 1
+        for key, value in data.items():
+            if key not in self.groups and key != "series":
+                pending[key] = value
+
+    def _take_ready(self, now: float) -> List[Tuple[str, Dict[str, Any]]]:
+        ready = []
+        for sid, feed in self._clients.items():
+            if not feed.pending or now - feed.last_sent < 1.0 / feed.max_hz - 1e-3:  # 1ms: 틱/타이머 오차 허용
+                continue
+            blocked = feed.acks_seen and feed.frame - feed.acked >= self.max_inflight
+            if blocked and now - feed.last_sent < self.ack_timeout:
+                continue
+            payload, feed.pending = feed.pending, {}
+            feed.frame += 1
+            feed.sent += 1
+            feed.last_sent = now
+            trace = payload.get("trace")
+            payload["trace"] = dict(trace, frame=feed.frame) if isinstance(trace, dict) else {"frame": feed.frame}
+            ready.append((sid, payload))
+        return ready
+
+    def _send_all(self, ready: List[Tuple[str, Dict[str, Any]]]):
+        for sid, payload in ready:
+            self.send(sid, payload)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {sid: {"fields": None if f.fields is None else sorted(f.fields), "max_hz": f.max_hz,
+                          "sent": f.sent, "coalesced": f.coalesced, "inflight": f.frame - f.acked if f.acks_seen else None}
+                    for sid, f in self._clients.items()}
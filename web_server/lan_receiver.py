@@ -0,0 +1,75 @@
+import socket
+import struct
+import threading
+from typing import Callable, Optional, Tuple
+
+# Pi의 raspi/transport.py 와 같게 유지: 매직 + 토픽 길이(u8) + MQTT 토픽 + 페이로드
+DATAGRAM_MAGIC = b"EU"
+
+
+def unpack_datagram(datagram: bytes) -> Optional[Tuple[str, bytes]]:
+    """(토픽, 페이로드). 형식이 맞지 않으면 None"""
+    if len(datagram) < 3 or datagram[:2] != DATAGRAM_MAGIC:
+        return None
+    n = datagram[2]
+    if len(datagram) < 3 + n:
+        return None
+    try:
+        topic = datagram[3:3 + n].decode()
+    except UnicodeDecodeError:
+        return None
+    return topic, datagram[3 + n:]
+
+
+class UdpMulticastReceiver:
+    """
+    Pi가 같은 LAN으로 직접 보내는 UDP 멀티캐스트 업링크를 받아 handler(topic, payload)를 호출하는 스레드.
+    MQTT on_message 와 같은 처리로 넘기므로 두 경로가 같은 메시지를 주면 호출하는 쪽에서 중복을 거릅니다.
+    """
+
+    def __init__(self, group: str, port: int, handler: Callable[[str, bytes], None], interface: str = "0.0.0.0"):
+        self.group = group
+        self.port = port
+        self.handler = handler
+        self.interface = interface
+        self.received = 0
+        self.invalid = 0
+        self._sock: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(("", self.port))
+        membership = struct.pack('4s4s', socket.inet_aton(self.group), socket.inet_aton(self.interface))
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+        sock.settimeout(0.5)  # stop() 확인 주기
+        self._sock = sock
+        self._thread = threading.Thread(target=self._run, name="lan_receiver", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                datagram, _ = self._sock.recvfrom(65535)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            parsed = unpack_datagram(datagram)
+            if parsed is None:
+                self.invalid += 1
+                continue
+            self.received += 1
+            self.handler(*parsed)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+        if self._sock:
+            self._sock.close()
+
+    def stats(self):
+        return {"received": self.received, "invalid": self.invalid}
@@ -0,0 +1,209 @@
+# lap_engine.py (GPS 궤적으로 결승선/섹터선 통과 시각을 보간해 랩/섹터 이벤트를 만드는 랩 타이머)
+# 재생 테스트: python lap_engine.py <CSV 로그> --finish LAT1,LON1,LAT2,LON2 [--sector LAT1,LON1,LAT2,LON2 ...]
+
+import csv
+import json
+import math
+import sys
+import threading
+import argparse
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+EARTH_RADIUS_M = 6378137.0
+
+LatLon = Tuple[float, float]
+
+
+class LapEngine:
+    """
+    GPS 점 (시각, 위도, 경도)을 순서대로 받아 직전 점과 잇는 선분이 결승선/섹터선과 교차하는지 검사합니다.
+    교차하면 선분 위 교차 위치 비율로 두 측위 사이의 통과 시각을 선형 보간합니다.
+    좌표는 첫 선의 중점을 기준으로 한 로컬 평면(m)으로 바꿔 계산합니다.
+    feed()는 발생한 이벤트 목록만 반환하므로 녹화한 궤적을 그대로 재생해 검증할 수 있습니다.
+    """
+
+    def __init__(self, min_lap_sec: float = 10.0, min_sector_sec: float = 3.0):
+        self.min_lap_sec = min_lap_sec
+        self.min_sector_sec = min_sector_sec
+        self._lock = threading.Lock()
+        self.finish: Optional[Tuple[LatLon, LatLon]] = None
+        self.sectors: List[Tuple[LatLon, LatLon]] = []
+        self._origin: Optional[Tuple[float, float, float]] = None
+        self._lines: List[Tuple[Tuple[float, float], Tuple[float, float]]] = []  # [finish, sector1, ...] (m)
+        self.reset()
+
+    # ======== 설정 ========
+    def set_lines(self, finish: Optional[Sequence[LatLon]], sectors: Iterable[Sequence[LatLon]] = ()):
+        """결승선과 섹터선(트랙 진행 순서)을 설정하고 랩 기록을 초기화합니다. finish가 None이면 비활성."""
+        with self._lock:
+            self.finish = (tuple(finish[0]), tuple(finish[1])) if finish else None
+            self.sectors = [(tuple(a), tuple(b)) for a, b in sectors] if finish else []
+            self._origin = None
+            self._lines = []
+            if self.finish:
+                (lat1, lon1), (lat2, lon2) = self.finish
+                lat0 = (lat1 + lat2) / 2
+                self._origin = (lat0, (lon1 + lon2) / 2, math.cos(math.radians(lat0)))
+                self._lines = [(self._xy(*a), self._xy(*b)) for a, b in [self.finish] + self.sectors]
+            self._reset_locked()
+
+    def reset(self):
+        """선 설정은 유지하고 랩 기록만 지웁니다."""
+        with self._lock:
+            self._reset_locked()
+
+    def _reset_locked(self):
+        self._prev: Optional[Tuple[float, float, float]] = None  # t, x, y
+        self._last_cross = [-math.inf] * len(self._lines)
+        self.lap_start: Optional[float] = None
+        self.sector_start: Optional[float] = None
+        self.next_sector = 1
+        self.current_sectors: List[float] = []
+        self.laps: List[Dict[str, Any]] = []
+        self.best_lap: Optional[float] = None
+
+    # ======== 입력 ========
+    def feed(self, t: float, lat: float, lon: float) -> List[Dict[str, Any]]:
+        """GPS 점 하나를 처리하고 발생한 이벤트(lap_start / sector / lap)를 반환합니다."""
+        with self._lock:
+            if not self._lines or lat is None or lon is None:
+                return []
+            x, y = self._xy(lat, lon)
+            prev = self._prev
+            if prev is not None and (t <= prev[0] or (x == prev[1] and y == prev[2])):
+                # 같은 측위가 반복 수신되면 무시 (보간 기준 시각을 첫 수신 시각으로 유지)
+                return []
+            self._prev = (t, x, y)
+            if prev is None:
+                return []
+            crossings = []
+            for index, (a, b) in enumerate(self._lines):
+                u = _segment_intersection((prev[1], prev[2]), (x, y), a, b)
+                if u is not None:
+                    crossings.append((prev[0] + u * (t - prev[0]), index))
+            events: List[Dict[str, Any]] = []
+            for t_cross, index in sorted(crossings):
+                events.extend(self._on_cross(t_cross, index))
+            return events
+
+    def _on_cross(self, t: float, index: int) -> List[Dict[str, Any]]:
+        min_gap = self.min_lap_sec if index == 0 else self.min_sector_sec
+        if t - self._last_cross[index] < min_gap:
+            return []
+        self._last_cross[index] = t
+
+        if index != 0:
+            # 섹터선은 랩 진행 중이고 순서가 맞을 때만 인정
+            if self.lap_start is None or index != self.next_sector:
+                return []
+            split = t - self.sector_start
+            self.current_sectors.append(split)
+            self.sector_start = t
+            self.next_sector += 1
+            return [{
+                "type": "sector", "lap": len(self.laps) + 1, "sector": index,
+                "sector_time": round(split, 3), "elapsed": round(t - self.lap_start, 3), "time": t,
+            }]
+
+        events: List[Dict[str, Any]] = []
+        if self.lap_start is not None:
+            lap_time = t - self.lap_start
+            sectors = self.current_sectors + [t - self.sector_start]
+            best = self.best_lap is None or lap_time < self.best_lap
+            if best:
+                self.best_lap = lap_time
+            lap = {
+                "lap": len(self.laps) + 1, "lap_time": round(lap_time, 3),
+                "sectors": [round(s, 3) for s in sectors] if self.sectors else [],
+                "start": self.lap_start, "end": t, "best": best,
+            }
+            self.laps.append(lap)
+            events.append(dict(lap, type="lap", time=t))
+        else:
+            events.append({"type": "lap_start", "lap": 1, "time": t})
+        self.lap_start = self.sector_start = t
+        self.next_sector = 1
+        self.current_sectors = []
+        return events
+
+    # ======== 조회 ========
+    def state(self) -> Dict[str, Any]:
+        """새 클라이언트/REST용 현재 설정과 랩 기록."""
+        with self._lock:
+            return {
+                "finish": self.finish,
+                "sectors": self.sectors,
+                "laps": list(self.laps),
+                "best_lap": self.best_lap,
+                "lap_start": self.lap_start,
+            }
+
+    def _xy(self, lat: float, lon: float) -> Tuple[float, float]:
+        lat0, lon0, coslat = self._origin
+        return (math.radians(lon - lon0) * EARTH_RADIUS_M * coslat,
+                math.radians(lat - lat0) * EARTH_RADIUS_M)
+
+
+def _segment_intersection(p0, p1, q0, q1) -> Optional[float]:
+    """선분 p0-p1과 q0-q1이 교차하면 p0에서 교차점까지의 비율(0~1)을, 아니면 None을 반환합니다."""
+    rx, ry = p1[0] - p0[0], p1[1] - p0[1]
+    sx, sy = q1[0] - q0[0], q1[1] - q0[1]
+    denom = rx * sy - ry * sx
+    if denom == 0:
+        return None
+    qpx, qpy = q0[0] - p0[0], q0[1] - p0[1]
+    u = (qpx * sy - qpy * sx) / denom
+    v = (qpx * ry - qpy * rx) / denom
+    if 0 <= u <= 1 and 0 <= v <= 1:
+        return u
+    return None
+
+
+# ======== 재생 (녹화한 CSV 로그로 검증) ========
+def read_track_csv(path: str) -> List[Tuple[float, float, float]]:
+    """Pi의 CSV 로그(또는 session_log export)에서 (시각, 위도, 경도)를 읽습니다. 같은 좌표가 이어지면 첫 점만 사용."""
+    points = []
+    last = None
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            try:
+                lat, lon = float(row["Latitude"]), float(row["Longitude"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if (lat, lon) == last or (lat == 0 and lon == 0):
+                continue
+            last = (lat, lon)
+            t = datetime.strptime(row["Timestamp"], "%Y-%m-%d %H:%M:%S.%f").timestamp()
+            points.append((t, lat, lon))
+    return points
+
+
+def replay(engine: LapEngine, points: Iterable[Tuple[float, float, float]]) -> List[Dict[str, Any]]:
+    events = []
+    for t, lat, lon in points:
+        events.extend(engine.feed(t, lat, lon))
+    return events
+
+
+def _parse_line(text: str) -> Tuple[LatLon, LatLon]:
+    lat1, lon1, lat2, lon2 = (float(v) for v in text.split(","))
+    return (lat1, lon1), (lat2, lon2)
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="녹화한 GPS 궤적으로 랩/섹터 타이밍 재생")
+    parser.add_argument("track", help="Latitude/Longitude/Timestamp 컬럼이 있는 CSV 로그")
+    parser.add_argument("--finish", required=True, help="결승선 LAT1,LON1,LAT2,LON2")
+    parser.add_argument("--sector", action="append", default=[], help="섹터선 LAT1,LON1,LAT2,LON2 (진행 순서대로 반복)")
+    parser.add_argument("--min-lap", type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    engine = LapEngine(min_lap_sec=args.min_lap)
+    engine.set_lines(_parse_line(args.finish), [_parse_line(s) for s in args.sector])
+    for event in replay(engine, read_track_csv(args.track)):
+        print(json.dumps(event, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
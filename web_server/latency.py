@@ -0,0 +1,94 @@
+import math
+import threading
+from typing import Dict, List
+
+# 지연 시간 단계 (Pi 수신 -> 발행 -> 서버 수신 -> socket.io 전송 -> 브라우저 렌더링)
+# pub_to_server_mqtt/lan 은 경로별 도착 지연 (중복 포함), pub_to_server 는 실제로 처리한(먼저 온) 메시지
+STAGES = [
+    "can_to_pub", "gps_to_pub", "accel_to_pub",
+    "pub_to_server", "pub_to_server_mqtt", "pub_to_server_lan", "server_to_emit", "emit_to_render",
+    "pub_to_render", "can_to_render",
+]
+
+
+class LatencyHistogram:
+    """로그 간격 버킷(0.1ms ~ 100s) 히스토그램. 샘플을 저장하지 않고 백분위를 근사합니다."""
+    MIN_SEC = 1e-4
+    BUCKETS_PER_DECADE = 20
+    DECADES = 6
+
+    def __init__(self):
+        self.counts: List[int] = [0] * (self.BUCKETS_PER_DECADE * self.DECADES + 1)
+        self.count = 0
+        self.negative = 0
+        self.max_sec = 0.0
+
+    def _bucket(self, sec: float) -> int:
+        if sec <= self.MIN_SEC:
+            return 0
+        i = int(math.log10(sec / self.MIN_SEC) * self.BUCKETS_PER_DECADE) + 1
+        return min(i, len(self.counts) - 1)
+
+    def _upper(self, i: int) -> float:
+        return self.MIN_SEC * 10 ** (i / self.BUCKETS_PER_DECADE)
+
+    def record(self, sec: float):
+        # 장비 간 시계 오차로 음수가 나오면 0으로 집계하고 따로 센다
+        if sec < 0:
+            self.negative += 1
+            sec = 0.0
+        self.counts[self._bucket(sec)] += 1
+        self.count += 1
+        if sec > self.max_sec:
+            self.max_sec = sec
+
+    def percentile(self, p: float) -> float:
+        if not self.count:
+            return 0.0
+        target = self.count * p / 100.0
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return min(self._upper(i), self.max_sec)
+        return self.max_sec
+
+
+class LatencyTracker:
+    """단계별 LatencyHistogram 모음. MQTT 스레드와 socket.io 핸들러에서 동시에 기록합니다."""
+
+    def __init__(self, stages: List[str] = STAGES):
+        self._lock = threading.Lock()
+        self._stages = list(stages)
+        self._hist: Dict[str, LatencyHistogram] = {s: LatencyHistogram() for s in self._stages}
+
+    def record(self, stage: str, sec: float):
+        with self._lock:
+            hist = self._hist.get(stage)
+            if hist is None:
+                hist = self._hist[stage] = LatencyHistogram()
+            hist.record(sec)
+
+    def record_span(self, stage: str, start, end):
+        """start/end가 모두 숫자일 때만 end - start를 기록합니다."""
+        if isinstance(start, (int, float)) and isinstance(end, (int, float)):
+            self.record(stage, end - start)
+
+    def reset(self):
+        with self._lock:
+            self._hist = {s: LatencyHistogram() for s in self._stages}
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """단계별 count, p50/p95/p99/max (ms)를 반환합니다."""
+        with self._lock:
+            out = {}
+            for stage, hist in self._hist.items():
+                out[stage] = {
+                    "count": hist.count,
+                    "negative": hist.negative,
+                    "p50_ms": round(hist.percentile(50) * 1000, 2),
+                    "p95_ms": round(hist.percentile(95) * 1000, 2),
+                    "p99_ms": round(hist.percentile(99) * 1000, 2),
+                    "max_ms": round(hist.max_sec * 1000, 2),
+                }
+            return out
@@ -0,0 +1,304 @@
+# loadtest.py (socket.io 동시 접속 부하 테스트: 합성 클라이언트 N개 + 실제 주기의 텔레메트리 입력)
+# 실행: python3 loadtest.py --clients 200 --duration 30 [--url http://localhost:5000] [--feed lan|mqtt|none]
+#       [--broker localhost] [--fields can,gps] [--hz 10] [--no-ack] [--ramp 5]
+# 기본 입력은 LAN UDP(서버 config.py 의 LAN_UDP_ENABLE = True 필요). --feed mqtt 는 --broker 를 직접 지정해야 합니다
+# (합성 데이터가 실제 토픽으로 나가 같은 브로커의 대시보드/랩 타이머에 섞이지 않도록).
+# 서버와 같은 장비(또는 NTP로 동기화된 장비)에서 실행해야 emit -> 수신 지연이 의미 있습니다.
+# 한 프로세스가 수백 개 클라이언트를 처리하므로, 마지막에 출력되는 부하 생성기 CPU가 100%에 가까우면
+# 측정값이 부하 생성기 쪽에서 막힌 것입니다 (프로세스를 나눠 여러 개 실행).
+# 필요: pip install "python-socketio[asyncio_client]" (--feed mqtt 는 paho-mqtt 도)
+
+import sys
+import json
+import math
+import time
+import socket
+import asyncio
+import argparse
+import urllib.request
+
+from config import MQTT_PORT, MQTT_TOPICS, LAN_UDP_GROUP, LAN_UDP_PORT
+from latency import LatencyHistogram
+from lan_receiver import DATAGRAM_MAGIC
+
+try:
+    import socketio
+except ImportError:
+    socketio = None
+
+try:
+    import paho.mqtt.client as mqtt
+except ImportError:
+    mqtt = None
+
+# Pi 기본 설정과 같은 입력 (raspi/config.py 의 MQTT_SOURCE_RATES_HZ, MQTT_BATCH_RATE_HZ)
+FEED_RATES_HZ = {"CAN": 10, "GPS": 10, "ACCEL": 10}
+SERIES_RATE_HZ = 25
+SERIES_SIGNALS = ("RPM", "TPS_percent", "VSS_kmh", "MAP_kPa", "CLT_C", "OilTemp_C", "ax_g", "ay_g")
+
+
+def make_can(t: float):
+    rpm = 7000 + 4000 * math.sin(t / 3)
+    return {
+        "RPM": round(rpm), "TPS_percent": round(50 + 50 * math.sin(t / 2), 1), "VSS_kmh": round(80 + 40 * math.sin(t / 7), 1),
+        "MAP_kPa": round(60 + 40 * math.sin(t / 2), 1), "CLT_C": round(90 + 5 * math.sin(t / 60), 1),
+        "OilTemp_C": round(100 + 5 * math.sin(t / 80), 1), "EOT_OUT": round(95 + 5 * math.sin(t / 80), 1),
+        "IAT_C": 35.0, "fuelPumpTemp": 40.0, "OilPressure_bar": round(3 + rpm / 5000, 2), "WBO_Lambda": 0.92,
+        "Gear": 1 + int(t / 4) % 5, "Batt_V": 13.8, "CEL_Error": 0, "FuelPressure_bar": 3.5,
+    }
+
+
+def make_series(t0: float, rows: int):
+    return {
+        "t0": t0, "dt_ms": [round(k * 1000 / SERIES_RATE_HZ) for k in range(rows)],
+        "values": {name: [make_can(t0 + k / SERIES_RATE_HZ).get(name, 0.1 * k) for k in range(rows)] for name in SERIES_SIGNALS},
+    }
+
+
+def make_gps(t: float):
+    ang = t / 60 * 2 * math.pi
+    lat, lon = 37.2830 + 0.004 * math.sin(ang), 127.0450 + 0.005 * math.cos(ang)
+    gps = {"Latitude": lat, "Longitude": lon, "GPS_Speed_KPH": round(80 + 20 * math.sin(ang * 3), 2),
+           "Heading_deg": round(math.degrees(ang) % 360, 2), "Satellites": 14, "gps_fix": True, "HDOP": 0.8,
+           "GPS_Time": time.time()}
+    fusion = {"Fused_Latitude": lat, "Fused_Longitude": lon, "Fused_Speed_KPH": gps["GPS_Speed_KPH"],
+              "Fused_Heading_deg": gps["Heading_deg"], "Fused_PosStd_m": 0.5}
+    return {"gps": gps, "fusion": fusion}
+
+
+def make_accel(t: float):
+    return {"accel": {"ax_g": round(0.8 * math.sin(t), 3), "ay_g": round(1.2 * math.sin(t / 2), 3), "az_g": 1.0,
+                      "g_mean": 0.9, "g_peak": 1.5, "samples": 10}}
+
+
+class Feeder:
+    """Pi 대신 소스별 토픽으로 JSON 텔레메트리를 보냅니다 (MQTT 브로커 또는 LAN UDP 멀티캐스트)."""
+
+    def __init__(self, kind: str, broker: str, port: int):
+        self.kind = kind
+        self.sent = 0
+        self.client = None
+        self.sock = None
+        if kind == "mqtt":
+            if mqtt is None:
+                raise RuntimeError("paho-mqtt 가 설치되어 있지 않습니다. pip install paho-mqtt")
+            self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION1)
+            self.client.connect(broker, port, 60)
+            self.client.loop_start()
+        elif kind == "lan":
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+            self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 1)
+
+    def send(self, topic: str, payload: bytes):
+        if self.client:
+            self.client.publish(topic, payload)
+        elif self.sock:
+            name = topic.encode()
+            self.sock.sendto(DATAGRAM_MAGIC + bytes((len(name),)) + name + payload, (LAN_UDP_GROUP, LAN_UDP_PORT))
+        else:
+            return
+        self.sent += 1
+
+    def close(self):
+        if self.client:
+            self.client.loop_stop()
+            self.client.disconnect()
+        if self.sock:
+            self.sock.close()
+
+
+async def feed_task(feeder: Feeder, stop: asyncio.Event):
+    start = time.time()
+    seqs = dict.fromkeys(FEED_RATES_HZ, 0)
+    loop = asyncio.get_running_loop()
+    next_times = dict.fromkeys(FEED_RATES_HZ, loop.time())
+    last_series = start
+    while not stop.is_set():
+        now = loop.time()
+        for source, due in next_times.items():
+            if due > now:
+                continue
+            seqs[source] += 1
+            wall = time.time()
+            t = wall - start
+            if source == "CAN":
+                data = {"can": make_can(t)}
+                rows = int((wall - last_series) * SERIES_RATE_HZ)
+                if rows:
+                    data["series"] = make_series(last_series, rows)
+                    last_series += rows / SERIES_RATE_HZ
+            elif source == "GPS":
+                data = make_gps(t)
+            else:
+                data = make_accel(t)
+            data["timestamp"] = time.strftime("%Y-%m-%d %H:%M:%S")
+            data["trace"] = {"seq": seqs[source], "pub": wall, "rx": {source.lower(): wall}}
+            feeder.send(MQTT_TOPICS[source], json.dumps(data).encode())
+            next_times[source] = max(due + 1.0 / FEED_RATES_HZ[source], now)
+        await asyncio.sleep(max(0.0, min(next_times.values()) - loop.time()))
+
+
+class LoadStats:
+    """전체 구간과 직전 보고 이후 구간의 지연 히스토그램/메시지 수"""
+
+    def __init__(self):
+        self.connected = 0
+        self.failed = 0
+        self.disconnected = 0
+        self.messages = 0
+        self.connect_time = LatencyHistogram()
+        self.emit_lat = LatencyHistogram()  # 서버 trace.emit -> 클라이언트 수신
+        self.pub_lat = LatencyHistogram()  # 입력 trace.pub -> 클라이언트 수신 (브로커/LAN 경유 전체)
+        self.window = LatencyHistogram()
+        self.window_messages = 0
+
+    def record(self, trace: dict, now: float):
+        self.messages += 1
+        self.window_messages += 1
+        emit, pub = trace.get("emit"), trace.get("pub")
+        if isinstance(emit, (int, float)):
+            self.emit_lat.record(now - emit)
+            self.window.record(now - emit)
+        if isinstance(pub, (int, float)):
+            self.pub_lat.record(now - pub)
+
+    def take_window(self):
+        hist, count = self.window, self.window_messages
+        self.window, self.window_messages = LatencyHistogram(), 0
+        return hist, count
+
+
+def _ms(hist: LatencyHistogram, p: float) -> str:
+    return f"{hist.percentile(p) * 1000:7.1f}"
+
+
+async def run_client(args, stats: LoadStats, stop: asyncio.Event):
+    sio = socketio.AsyncClient(reconnection=False)
+    subscribe = {}
+    if args.fields:
+        subscribe["fields"] = {group: None for group in args.fields.split(",")}
+    if args.hz:
+        subscribe["max_hz"] = args.hz
+
+    @sio.on('telemetry_update')
+    async def on_update(data):
+        now = time.time()
+        trace = (data or {}).get("trace") or {}
+        if "frame" not in trace:
+            return  # 접속 직후의 마지막 상태 스냅샷 (지연 측정 대상 아님)
+        stats.record(trace, now)
+        if args.ack:
+            # 브라우저처럼 렌더링 확인을 보내 서버 백프레셔가 동작하게 함
+            await sio.emit('render_ack', {"trace": trace, "render": time.time()})
+
+    @sio.event
+    async def connect():
+        if subscribe:
+            await sio.emit('subscribe', subscribe)
+
+    @sio.event
+    async def disconnect():
+        if not stop.is_set():
+            stats.disconnected += 1
+
+    t0 = time.monotonic()
+    try:
+        await sio.connect(args.url, transports=['websocket'])
+    except Exception as e:
+        stats.failed += 1
+        if stats.failed <= 3:
+            print(f"[loadtest] 접속 실패: {e}")
+        return
+    stats.connect_time.record(time.monotonic() - t0)
+    stats.connected += 1
+    await stop.wait()
+    await sio.disconnect()
+
+
+def fetch_server_latency(url: str, reset: bool = False):
+    """서버 단계별 지연 (/api/latency). reset=True 면 측정 시작 전에 히스토그램을 비웁니다."""
+    try:
+        if reset:
+            urllib.request.urlopen(urllib.request.Request(f"{url}/api/latency/reset", method="POST"), timeout=2).close()
+            return None
+        with urllib.request.urlopen(f"{url}/api/latency", timeout=2) as res:
+            return json.loads(res.read())
+    except (OSError, ValueError):
+        return None
+
+
+async def main_async(args):
+    stats = LoadStats()
+    stop = asyncio.Event()
+    feeder = Feeder(args.feed, args.broker, args.port) if args.feed != "none" else None
+    tasks = []
+    if feeder:
+        tasks.append(asyncio.create_task(feed_task(feeder, stop)))
+    # 접속 폭주로 서버 accept 큐가 넘치지 않도록 ramp 초에 걸쳐 나눠 접속
+    for i in range(args.clients):
+        tasks.append(asyncio.create_task(run_client(args, stats, stop)))
+        if args.ramp:
+            await asyncio.sleep(args.ramp / args.clients)
+    await asyncio.get_running_loop().run_in_executor(None, fetch_server_latency, args.url, True)
+    # ramp 동안의 수신은 측정에서 제외
+    stats.take_window()
+    stats.messages, stats.emit_lat, stats.pub_lat = 0, LatencyHistogram(), LatencyHistogram()
+    cpu0, wall0 = time.process_time(), time.monotonic()
+    end = wall0 + args.duration
+    last_total = 0
+    while time.monotonic() < end:
+        await asyncio.sleep(1.0)
+        window, count = stats.take_window()
+        print(f"[loadtest] 접속 {stats.connected:4d} (실패 {stats.failed}, 끊김 {stats.disconnected}) | "
+              f"{count:6d} msg/s | emit->수신 p50 {_ms(window, 50)} p95 {_ms(window, 95)} p99 {_ms(window, 99)} ms"
+              f" | 입력 {feeder.sent if feeder else 0}")
+        last_total = stats.messages
+    elapsed = time.monotonic() - wall0
+    cpu = (time.process_time() - cpu0) / max(elapsed, 1e-6) * 100
+    server = await asyncio.get_running_loop().run_in_executor(None, fetch_server_latency, args.url)
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    if feeder:
+        feeder.close()
+
+    print("\n======== 결과 ========")
+    print(f"클라이언트: 접속 {stats.connected}/{args.clients}, 실패 {stats.failed}, 도중 끊김 {stats.disconnected}")
+    print(f"접속 시간 ms: p50 {_ms(stats.connect_time, 50)} p95 {_ms(stats.connect_time, 95)} max {stats.connect_time.max_sec * 1000:.1f}")
+    print(f"수신: {last_total} msg, {last_total / max(elapsed, 1e-6):.0f} msg/s "
+          f"(클라이언트당 {last_total / max(elapsed, 1e-6) / max(stats.connected, 1):.1f} msg/s), 입력 {feeder.sent if feeder else 0} msg")
+    for name, hist in (("emit->수신", stats.emit_lat), ("입력 pub->수신", stats.pub_lat)):
+        print(f"{name:12s} ms: p50 {_ms(hist, 50)} p95 {_ms(hist, 95)} p99 {_ms(hist, 99)} max {hist.max_sec * 1000:.1f}")
+    if server:
+        for stage in ("pub_to_server", "server_to_emit", "emit_to_render"):
+            s = server.get(stage) or {}
+            print(f"서버 {stage:14s} ms: p50 {s.get('p50_ms')} p95 {s.get('p95_ms')} p99 {s.get('p99_ms')} (n={s.get('count')})")
+    print(f"부하 생성기 CPU: {cpu:.0f}%{' (포화: 측정값이 부하 생성기에 막혔을 수 있음)' if cpu > 90 else ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="socket.io 동시 접속 부하 테스트")
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=30.0, help="측정 시간 (s, 접속 ramp 이후)")
+    parser.add_argument("--ramp", type=float, default=5.0, help="모든 클라이언트가 접속하는 데 걸리게 할 시간 (s)")
+    parser.add_argument("--feed", choices=("mqtt", "lan", "none"), default="lan", help="텔레메트리 입력 경로")
+    parser.add_argument("--broker", help="--feed mqtt 에서 쓸 브로커 (필수, 로컬 브로커 권장)")
+    parser.add_argument("--port", type=int, default=MQTT_PORT)
+    parser.add_argument("--fields", default="", help="구독할 그룹 (예: can,gps). 비우면 구독 없이 전체")
+    parser.add_argument("--hz", type=float, default=0.0, help="클라이언트 최대 주기 (0이면 서버 기본값)")
+    parser.add_argument("--no-ack", dest="ack", action="store_false", help="render_ack 를 보내지 않음 (백프레셔 없음)")
+    args = parser.parse_args()
+    if socketio is None:
+        raise RuntimeError('python-socketio 가 설치되어 있지 않습니다. pip install "python-socketio[asyncio_client]"')
+    if args.clients < 1:
+        sys.exit("--clients 는 1 이상")
+    if args.feed == "mqtt" and not args.broker:
+        sys.exit("--feed mqtt 는 --broker 를 지정해야 합니다 (합성 데이터가 실제 토픽으로 발행됨)")
+    try:
+        asyncio.run(main_async(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
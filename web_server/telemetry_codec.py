@@ -0,0 +1,23 @@
+# telemetry_codec.py (업링크 텔레메트리 바이너리 인코딩)
+# 구현은 raspi/telemetry_codec.py 하나뿐이며, 여기서는 그 파일을 그대로 불러옵니다 (두 벌을 따로 고치지 않도록).
+# 서버만 따로 배포할 때도 저장소 구조대로 raspi/telemetry_codec.py 를 함께 두세요.
+
+import os
+import sys
+import importlib.util
+
+_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "raspi", "telemetry_codec.py")
+if not os.path.exists(_PATH):
+    raise ImportError(f"공유 코덱 파일이 없습니다: {_PATH}")
+
+_spec = importlib.util.spec_from_file_location("_shared_telemetry_codec", _PATH)
+_codec = importlib.util.module_from_spec(_spec)
+sys.modules[_spec.name] = _codec
+_spec.loader.exec_module(_codec)
+
+WIRE_VERSION = _codec.WIRE_VERSION
+CODEC_HASH = _codec.CODEC_HASH
+TelemetrySchema = _codec.TelemetrySchema
+TelemetryCodec = _codec.TelemetryCodec
+TelemetryDecoder = _codec.TelemetryDecoder
+is_binary = _codec.is_binary
@@ -1,16 +1,113 @@
+# 비동기 서버 모드: gevent/eventlet 은 다른 모듈(socket, threading, paho)을 불러오기 전에 monkey patch 해야 함
+from config import SERVER_ASYNC_MODE
+async_mode = "threading"
+if SERVER_ASYNC_MODE in ("auto", "gevent"):
+    try:
+        from gevent import monkey
+        monkey.patch_all()
+        async_mode = "gevent"
+    except ImportError:
+        pass
+if async_mode == "threading" and SERVER_ASYNC_MODE in ("auto", "eventlet"):
+    try:
+        import eventlet
+        eventlet.monkey_patch()
+        async_mode = "eventlet"
+    except ImportError:
+        pass
+
 from flask import Flask, render_template, request
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room, leave_room
 import paho.mqtt.client as mqtt
 import json
-from config import MQTT_BROKER, MQTT_PORT, MQTT_TOPICS
+import time
+import os
+import threading
+from config import (MQTT_BROKER, MQTT_PORT, MQTT_TOPICS, LAP_LINES_FILE, LAP_MIN_LAP_SEC, LAP_COMMAND_ENABLE,
+                    TRACK_TOLERANCES_M, TRACK_FLUSH_POINTS, TRACK_MAX_POINTS, KEYFRAME_REQUEST_MIN_SEC,
+                    MQTT_SOURCE_GROUPS, MQTT_SUBSCRIBE_SOURCES,
+                    LAN_UDP_ENABLE, LAN_UDP_GROUP, LAN_UDP_PORT, LAN_UDP_INTERFACE,
+                    FANOUT_DEFAULT_MAX_HZ, FANOUT_MAX_HZ, FANOUT_MAX_INFLIGHT, FANOUT_ACK_TIMEOUT_SEC, FANOUT_TICK_SEC,
+                    SERVER_HOST, SERVER_PORT)
+from latency import LatencyTracker
+from lap_engine import LapEngine
+from delta_timer import DeltaTimer
+from track_store import TrackStore
+from telemetry_codec import TelemetryDecoder, is_binary
+from uplink_state import UplinkState, UplinkDedup, DELTA_GROUPS
+from lan_receiver import UdpMulticastReceiver
+from fanout import FanoutHub
 
 # Flask 및 SocketIO 앱 초기화
 app = Flask(__name__, template_folder='dashboard', static_folder='static')
-socketio = SocketIO(app)
+socketio = SocketIO(app, async_mode=async_mode)
 
-# 마지막으로 수신한 텔레메트리 데이터를 저장할 변수
+# 마지막으로 수신한 텔레메트리 데이터를 저장할 변수 (소스별 토픽은 그룹 단위로 합쳐 둠)
 last_telemetry_data = None
 
+# Pi 상태 요약 (STATUS 토픽, retained)
+last_status = None
+
+# 단계별 지연 시간 히스토그램 (/api/latency 에서 조회)
+latency = LatencyTracker()
+
+# 바이너리 업링크 디코더 (Pi가 retained 로 발행한 스키마를 ID별로 보관)
+telemetry_decoder = TelemetryDecoder()
+known_schemas = set()
+unknown_schema_warned = False
+
+# 델타 업링크에서 전체 상태 복원 (키프레임 + 바뀐 시그널). 토픽마다 키프레임/일련번호가 따로
+uplink_states = {"TELEMETRY": UplinkState()}
+uplink_states.update({source: UplinkState(groups) for source, groups in MQTT_SOURCE_GROUPS.items()})
+source_topics = {MQTT_TOPICS[source]: source for source in uplink_states}
+last_keyframe_request = {} # 토픽 키 -> 마지막 키프레임 요청 시각
+
+# MQTT와 LAN(UDP) 두 경로로 같은 메시지가 오면 먼저 온 것만 처리
+# (MQTT/LAN 콜백 스레드와 /api/submit 이 델타 복원 상태와 마지막 텔레메트리를 함께 쓰지 않도록 락)
+uplink_dedup = UplinkDedup()
+uplink_lock = threading.Lock()
+subscribed_topics = {MQTT_TOPICS[source] for source in ("TELEMETRY", "STATUS", "SCHEMA") + tuple(MQTT_SUBSCRIBE_SOURCES)}
+lan_receiver = None
+
+def send_to_client(sid, data):
+    """FanoutHub 가 세션 하나에 보낼 때: 전송 시각을 trace 에 찍고 서버 내부 지연을 기록"""
+    trace = data["trace"]
+    trace["emit"] = time.time()
+    latency.record_span("server_to_emit", trace.get("server_rx"), trace["emit"])
+    socketio.emit('telemetry_update', data, to=sid)
+
+# 클라이언트별 구독(필드, 최대 주기)에 맞춰 최신 값만 합쳐 보냄 (느린 클라이언트는 프레임을 건너뜀)
+fanout = FanoutHub(send_to_client, default_hz=FANOUT_DEFAULT_MAX_HZ, max_hz=FANOUT_MAX_HZ,
+                   max_inflight=FANOUT_MAX_INFLIGHT, ack_timeout=FANOUT_ACK_TIMEOUT_SEC)
+
+# Pi 디스크 큐에서 재전송된 메시지 (실시간 처리와 분리해 'telemetry_history' 로만 전달)
+history_stats = {"received": 0, "oldest_pub": None, "newest_pub": None, "last_rx": None}
+
+# 서버 측 랩 타이머 (GPS 스트림을 한 번만 처리하고 랩/섹터 이벤트만 브로드캐스트)
+lap_engine = LapEngine(min_lap_sec=LAP_MIN_LAP_SEC)
+last_gps_fix = None
+
+# 줌 단계별 단순화 궤적 (클라이언트는 한 번 받아 간 뒤 증분 세그먼트만 수신)
+track_store = TrackStore(TRACK_TOLERANCES_M, TRACK_FLUSH_POINTS, TRACK_MAX_POINTS)
+
+# 베스트 랩 대비 실시간 델타 (numpy 필요)
+try:
+    delta_timer = DeltaTimer()
+except RuntimeError as e:
+    print(f"[Web Server] 델타 타이머 비활성: {e}")
+    delta_timer = None
+
+def load_lap_lines():
+    if not os.path.exists(LAP_LINES_FILE):
+        return
+    try:
+        with open(LAP_LINES_FILE, encoding='utf-8') as f:
+            lines = json.load(f)
+        lap_engine.set_lines(lines.get("finish"), lines.get("sectors") or [])
+        print(f"[Web Server] 랩 타이머 선 설정 불러옴: 섹터 {len(lap_engine.sectors)}개")
+    except (OSError, ValueError, TypeError) as e:
+        print(f"[Web Server] 랩 타이머 선 설정 읽기 오류: {e}")
+
 # MQTT 클라이언트 설정
 mqtt_client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION1)
 
@@ -18,41 +115,323 @@ def on_connect(client, userdata, flags, rc):
     """MQTT 브로커 연결 성공 시 토픽 구독"""
     if rc == 0:
         print("[Web Server] MQTT 브로커 연결 성공. 토픽 구독 시작...")
-        # 모든 데이터를 받는 메인 토픽을 구독합니다.
-        client.subscribe(MQTT_TOPICS["TELEMETRY"])
+        # 통합 토픽과, 소스별 토픽 중 MQTT_SUBSCRIBE_SOURCES 만 구독합니다 (재전송 토픽도 같은 범위로).
+        client.subscribe(MQTT_TOPICS["SCHEMA"])
+        client.subscribe(MQTT_TOPICS["STATUS"])
+        for source in ("TELEMETRY",) + tuple(MQTT_SUBSCRIBE_SOURCES):
+            client.subscribe(MQTT_TOPICS[source])
+            client.subscribe(f"{MQTT_TOPICS['HISTORY']}/{MQTT_TOPICS[source].rsplit('/', 1)[-1]}")
     else:
         print(f"[Web Server] MQTT 연결 실패 (Code: {rc})")
 
 def on_message(client, userdata, msg):
     """MQTT 메시지 수신 시 데이터 종류를 판별하고 적절한 이벤트를 발생시킴"""
-    global last_telemetry_data
+    handle_uplink(msg.topic, msg.payload, "mqtt")
+
+def on_lan_datagram(topic: str, payload: bytes):
+    """LAN(UDP 멀티캐스트)으로 직접 받은 메시지: 구독하지 않은 소스는 버리고 MQTT와 같은 처리로"""
+    if topic in subscribed_topics:
+        handle_uplink(topic, payload, "lan")
+
+def handle_uplink(topic: str, payload: bytes, path: str):
+    """MQTT/LAN 공통 처리. path 는 도착 경로 ("mqtt" 또는 "lan")"""
+    global unknown_schema_warned
+    server_rx = time.time()
     try:
-        payload = msg.payload.decode('utf-8')
-        data = json.loads(payload)
+        if topic == MQTT_TOPICS["SCHEMA"]:
+            schema_id = telemetry_decoder.add_schema(payload)
+            if schema_id not in known_schemas:
+                known_schemas.add(schema_id)
+                print(f"[Web Server] 바이너리 업링크 스키마 등록: {schema_id:08x}")
+            return
+        if topic == MQTT_TOPICS["STATUS"]:
+            handle_status(json.loads(payload.decode('utf-8')))
+            return
+        history = topic.startswith(MQTT_TOPICS["HISTORY"] + "/")
+        if is_binary(payload):
+            try:
+                data = telemetry_decoder.decode(payload)
+            except KeyError as e:
+                # retained 스키마가 도착하기 전의 메시지는 버림
+                if not unknown_schema_warned:
+                    print(f"[Web Server] 스키마 대기 중, 메시지 무시: {e}")
+                    unknown_schema_warned = True
+                return
+        else:
+            data = json.loads(payload.decode('utf-8'))
         
+        if history:
+            handle_history(data)
+            return
+
         # 데이터 출처를 확인하여 다른 이벤트 이름으로 전송합니다.
         if data.get("source") and "ArduinoLapTimer" in data.get("source"):
             # 출처가 아두이노 랩타이머인 경우, 'lap_time_update' 이벤트로 전송
             print(f"[MQTT] 아두이노 랩타임 데이터 수신: {data}")
             socketio.emit('lap_time_update', data)
         else:
-            # 그 외의 모든 데이터는 'telemetry_update' 이벤트로 전송
-            last_telemetry_data = data
-            socketio.emit('telemetry_update', data)
+            # 그 외의 모든 데이터는 'telemetry_update' 이벤트로 전송 (경로별 도착 지연은 중복이어도 기록)
+            source = source_topics.get(topic, "TELEMETRY")
+            latency.record_span(f"pub_to_server_{path}", (data.get("trace") or {}).get("pub"), server_rx)
+            with uplink_lock:
+                if uplink_dedup.accept(source, data, path):
+                    ingest_telemetry(data, server_rx, source)
             
     except Exception as e:
-        print(f"[Web Server] 메시지 처리 오류: {e}")
+        print(f"[Web Server] 메시지 처리 오류 ({path}): {e}")
+
+def handle_history(data):
+    """재전송된 과거 메시지: 랩 엔진/델타 상태/지연 시간 집계에는 넣지 않고 그대로 전달합니다."""
+    pub = (data.get("trace") or {}).get("pub")
+    history_stats["received"] += 1
+    history_stats["last_rx"] = time.time()
+    if pub:
+        if history_stats["oldest_pub"] is None or pub < history_stats["oldest_pub"]:
+            history_stats["oldest_pub"] = pub
+        history_stats["newest_pub"] = max(pub, history_stats["newest_pub"] or pub)
+    socketio.emit('telemetry_history', data)
+
+def handle_status(data):
+    """Pi 상태 요약: 저장해 두었다가 새 클라이언트에게도 전달 (online=false 는 Pi의 last will)"""
+    global last_status
+    if isinstance(data, dict) and not data.get("online", True):
+        print("[Web Server] Pi 오프라인 (STATUS)")
+    last_status = data
+    socketio.emit('status_update', data)
+
+def request_keyframe(source=None):
+    """
+    Pi에 다음 업링크를 키프레임으로 보내도록 요청 (토픽별 KEYFRAME_REQUEST_MIN_SEC 간격 제한).
+    source 가 None 이면 모든 토픽.
+    """
+    now = time.monotonic()
+    if now - last_keyframe_request.get(source, 0.0) < KEYFRAME_REQUEST_MIN_SEC:
+        return
+    last_keyframe_request[source] = now
+    command = {"reason": "resync"}
+    if source:
+        command["source"] = source
+    mqtt_client.publish(MQTT_TOPICS["COMMAND_KEYFRAME"], json.dumps(command))
+
+def ingest_telemetry(data, server_rx: float, source: str = "TELEMETRY"):
+    """
+    델타 프레임을 전체 상태로 채운 뒤 전송. 상태가 어긋났으면 키프레임을 요청합니다.
+    소스별 토픽 메시지는 그 토픽의 그룹만 전송하고, 마지막 상태에는 그룹 단위로 합칩니다.
+    """
+    global last_telemetry_data
+    data, need_keyframe = uplink_states[source].apply(data)
+    if need_keyframe:
+        request_keyframe(source)
+    if source in MQTT_SOURCE_GROUPS:
+        # 바이너리 디코더는 스키마의 모든 그룹을 (빈 dict로) 채우므로 이 토픽의 그룹만 남긴다
+        own = MQTT_SOURCE_GROUPS[source]
+        data = {k: v for k, v in data.items() if k not in DELTA_GROUPS or k in own}
+    emit_telemetry(data, server_rx)
+    merged = dict(last_telemetry_data or {})
+    merged.update(data)
+    merged.pop("series", None) # 시계열은 실려 온 메시지에만 해당 (새 클라이언트에게 다시 그리지 않도록)
+    last_telemetry_data = merged
+
+def new_gps_fix(data, server_rx: float):
+    """
+    텔레메트리에서 새 GPS 측위 (t, lat, lon)를 꺼냅니다. 측위가 없거나 직전과 같으면 None.
+    시각은 수신기 측위 시각(GPS_Time) > Pi 수신 시각(trace.rx.gps) > 서버 수신 시각 순으로 사용합니다.
+    """
+    global last_gps_fix
+    gps = data.get("gps")
+    if not isinstance(gps, dict) or not gps.get("gps_fix"):
+        return None
+    lat, lon = gps.get("Latitude"), gps.get("Longitude")
+    t = gps.get("GPS_Time") or ((data.get("trace") or {}).get("rx") or {}).get("gps") or server_rx
+    if lat is None or lon is None or (t, lat, lon) == last_gps_fix:
+        return None
+    last_gps_fix = (t, lat, lon)
+    return last_gps_fix
+
+def feed_track_store(lat: float, lon: float):
+    """측위를 궤적 저장소에 넣고, 확정된 세그먼트를 해당 줌 단계를 구독 중인 클라이언트에게만 전송"""
+    for level, update in track_store.add(lat, lon).items():
+        update.update(session=track_store.session, level=level)
+        event = 'track_reload' if update.get("reload") else 'track_append'
+        socketio.emit(event, update, to=f"track_{level}")
+
+def feed_lap_engine(data, server_rx: float):
+    """텔레메트리의 GPS 좌표를 랩 엔진/궤적 저장소에 넣고 발생한 이벤트를 전송합니다."""
+    fix = new_gps_fix(data, server_rx)
+    if fix is None:
+        return
+    t, lat, lon = fix
+    gps = data["gps"]
+    feed_track_store(lat, lon)
+    for event in lap_engine.feed(t, lat, lon):
+        socketio.emit('lap_event', event)
+        if event["type"] == "lap":
+            print(f"[LAP] {event['lap']}랩 {event['lap_time']:.3f}s{' (best)' if event['best'] else ''}")
+            if LAP_COMMAND_ENABLE:
+                mqtt_client.publish(MQTT_TOPICS["COMMAND_LAP"], json.dumps({"lap_count": event["lap"]}))
+        if delta_timer and event["type"] in ("lap_start", "lap"):
+            if event["type"] == "lap":
+                delta_timer.finish_lap(event["lap_time"], event["best"])
+            delta_timer.start_lap(event["time"])
+    if delta_timer:
+        delta = delta_timer.add_fix(t, lat, lon, gps.get("GPS_Speed_KPH"))
+        if delta:
+            data["lap_delta"] = delta
+
+def emit_telemetry(data, server_rx: float):
+    """trace 타임스탬프를 기록하고 지연 시간을 집계한 뒤 구독 중인 클라이언트로 전송 (FanoutHub)"""
+    feed_lap_engine(data, server_rx)
+    trace = data.get("trace")
+    if isinstance(trace, dict):
+        pub = trace.get("pub")
+        rx = trace.get("rx") or {}
+        for source in ("can", "gps", "accel"):
+            latency.record_span(f"{source}_to_pub", rx.get(source), pub)
+        latency.record_span("pub_to_server", pub, server_rx)
+        trace["server_rx"] = server_rx
+    fanout.publish(data)
 
 mqtt_client.on_connect = on_connect
 mqtt_client.on_message = on_message
 
+def emit_last_telemetry():
+    """
+    현재 세션에 마지막 상태를 다시 보냅니다. 새 메시지가 아니므로 trace 를 빼서
+    페이지가 render_ack 로 오래된 지연 시간을 기록하지 않게 합니다.
+    """
+    if last_telemetry_data:
+        emit('telemetry_update', {k: v for k, v in last_telemetry_data.items() if k != 'trace'})
+
 @socketio.on('connect')
 def handle_connect():
-    """새로운 클라이언트가 접속했을 때 마지막 텔레메트리 데이터를 전송"""
+    """새로운 클라이언트가 접속했을 때 마지막 텔레메트리 데이터를 전송 ('subscribe' 전까지는 모든 필드를 기본 주기로)"""
     print("[Web Server] 새로운 클라이언트가 접속했습니다.")
+    fanout.add(request.sid)
     if last_telemetry_data:
         print("[Web Server] 마지막 텔레메트리 데이터를 새 클라이언트에게 전송합니다.")
-        emit('telemetry_update', last_telemetry_data)
+        emit_last_telemetry()
+    if last_status:
+        emit('status_update', last_status)
+    emit('lap_state', lap_engine.state())
+
+@socketio.on('disconnect')
+def handle_disconnect():
+    fanout.remove(request.sid)
+
+@socketio.on('subscribe')
+def handle_subscribe(data=None):
+    """
+    클라이언트가 받을 필드와 최대 주기를 지정: {"fields": {"can": ["RPM", ...], "gps": null}, "max_hz": 5}
+    fields 를 생략하면 모든 그룹, null 은 그룹 전체. 적용된 설정을 'subscribed' 로 돌려줍니다.
+    """
+    data = data if isinstance(data, dict) else {}
+    emit('subscribed', fanout.subscribe(request.sid, data.get("fields"), data.get("max_hz")))
+
+@socketio.on('request_keyframe')
+def handle_request_keyframe(data=None):
+    """클라이언트가 전체 상태를 다시 받고 싶을 때 (서버 상태를 바로 보내고 Pi에도 키프레임 요청)"""
+    emit_last_telemetry()
+    request_keyframe()
+
+@socketio.on('track_subscribe')
+def handle_track_subscribe(data):
+    """클라이언트가 현재 줌에 맞는 궤적 단계를 선택 (이전 단계 룸은 떠남)"""
+    try:
+        level = int((data or {}).get("level", 0))
+    except (TypeError, ValueError):
+        return
+    for i in range(len(TRACK_TOLERANCES_M)):
+        if i != level:
+            leave_room(f"track_{i}")
+    join_room(f"track_{level}")
+
+@socketio.on('render_ack')
+def handle_render_ack(data):
+    """브라우저가 렌더링을 마친 시각을 보내오면 클라이언트 구간 지연 시간을 기록"""
+    if not isinstance(data, dict) or not isinstance(data.get("trace"), dict):
+        return
+    trace, render = data["trace"], data.get("render")
+    fanout.ack(request.sid, trace.get("frame"))
+    latency.record_span("emit_to_render", trace.get("emit"), render)
+    latency.record_span("pub_to_render", trace.get("pub"), render)
+    latency.record_span("can_to_render", (trace.get("rx") or {}).get("can"), render)
+
+@app.route('/api/latency', methods=['GET'])
+def get_latency():
+    """단계별 지연 시간 p50/p95/p99 (ms)"""
+    return latency.summary(), 200
+
+@app.route('/api/latency/reset', methods=['POST'])
+def reset_latency():
+    latency.reset()
+    return {"status": "success"}, 200
+
+@app.route('/api/uplink', methods=['GET'])
+def get_uplink():
+    """
+    업링크 상태: Pi 디스크 큐(backlog), 속도 제어 단계(link), 재전송 수신 현황, 토픽별 델타 복원 통계, Pi STATUS.
+    소스별 토픽 모드면 backlog/link 는 STATUS 에서, 통합 토픽 모드면 마지막 텔레메트리에서 (0단계면 link 없음).
+    """
+    last = last_status or last_telemetry_data or {}
+    delta = {source: state.stats for source, state in uplink_states.items()
+             if state.stats["keyframes"] or state.stats["deltas"]}
+    return {"backlog": last.get("backlog"), "link": last.get("link"),
+            "history": history_stats, "delta": delta, "status": last_status,
+            "paths": dict(uplink_dedup.stats, lan_received=lan_receiver.received if lan_receiver else None)}, 200
+
+@app.route('/api/clients', methods=['GET'])
+def get_clients():
+    """접속 중인 클라이언트별 구독(그룹, 최대 주기)과 전송/건너뜀/밀린 프레임 수"""
+    return fanout.stats(), 200
+
+@app.route('/api/laps', methods=['GET'])
+def get_laps():
+    """랩 타이머 선 설정과 랩 기록"""
+    return lap_engine.state(), 200
+
+@app.route('/api/laps/lines', methods=['POST'])
+def set_lap_lines():
+    """결승선/섹터선 설정: {"finish": [[lat, lon], [lat, lon]] 또는 null, "sectors": [[[lat, lon], [lat, lon]], ...]}"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return {"status": "error", "message": "Invalid JSON"}, 400
+    try:
+        lap_engine.set_lines(data.get("finish"), data.get("sectors") or [])
+        if delta_timer:
+            delta_timer.reset()
+    except (TypeError, ValueError, IndexError) as e:
+        return {"status": "error", "message": f"Invalid line: {e}"}, 400
+    socketio.emit('lap_state', lap_engine.state())
+    try:
+        with open(LAP_LINES_FILE, 'w', encoding='utf-8') as f:
+            json.dump({"finish": lap_engine.finish, "sectors": lap_engine.sectors}, f)
+    except OSError as e:
+        print(f"[Web Server] 랩 타이머 선 설정 저장 오류: {e}")
+        return {"status": "error", "message": f"Lines applied but not saved: {e}"}, 500
+    return {"status": "success"}, 200
+
+@app.route('/api/laps/reset', methods=['POST'])
+def reset_laps():
+    lap_engine.reset()
+    if delta_timer:
+        delta_timer.reset()
+    socketio.emit('lap_state', lap_engine.state())
+    return {"status": "success"}, 200
+
+@app.route('/api/track', methods=['GET'])
+def get_track():
+    """세션 궤적 스냅샷: ?level=0(가장 세밀) ~ len(TRACK_TOLERANCES_M)-1"""
+    try:
+        level = int(request.args.get("level", 0))
+    except ValueError:
+        return {"status": "error", "message": "Invalid level"}, 400
+    return track_store.snapshot(level), 200
+
+@app.route('/api/track/reset', methods=['POST'])
+def reset_track():
+    track_store.reset()
+    socketio.emit('track_reset', {"session": track_store.session})
+    return {"status": "success"}, 200
 
 @app.route('/api/submit', methods=['POST'])
 def handle_external_data():
@@ -66,9 +445,8 @@ def handle_external_data():
     if data.get("source") and "ArduinoLapTimer" in data.get("source"):
         socketio.emit('lap_time_update', data)
     else:
-        global last_telemetry_data
-        last_telemetry_data = data
-        socketio.emit('telemetry_update', data)
+        with uplink_lock:
+            ingest_telemetry(data, time.time())
     return {"status": "success"}, 200
 
 @app.route('/')
@@ -84,18 +462,44 @@ def show_page(page_name):
     except Exception:
         return "Page not found", 404
 
+def fanout_loop():
+    """주기 제한 때문에 미뤄 둔 클라이언트 전송을 FANOUT_TICK_SEC 마다 보냄"""
+    while True:
+        fanout.flush()
+        socketio.sleep(FANOUT_TICK_SEC)
+
 def run_server():
-    """웹 서버와 MQTT 클라이언트를 실행"""
+    """웹 서버와 MQTT 클라이언트(와 LAN 수신)를 실행"""
+    global lan_receiver
+    load_lap_lines()
+    if LAN_UDP_ENABLE:
+        try:
+            lan_receiver = UdpMulticastReceiver(LAN_UDP_GROUP, LAN_UDP_PORT, on_lan_datagram, LAN_UDP_INTERFACE)
+            lan_receiver.start()
+            print(f"[Web Server] LAN 직접 업링크 수신: udp://{LAN_UDP_GROUP}:{LAN_UDP_PORT}")
+        except OSError as e:
+            print(f"[Web Server] LAN 수신 소켓을 열 수 없습니다. MQTT만 사용합니다: {e}")
+            lan_receiver = None
     print("[Web Server] MQTT 클라이언트 시작 중...")
     try:
         mqtt_client.connect(MQTT_BROKER, MQTT_PORT, 60)
         mqtt_client.loop_start()
-        print("[Web Server] Flask 서버 시작 중...")
-        socketio.run(app, host='0.0.0.0', port=5000, allow_unsafe_werkzeug=True)
+        socketio.start_background_task(fanout_loop)
+        print(f"[Web Server] Flask 서버 시작 중... (비동기 모드: {async_mode})")
+        if async_mode == "threading":
+            if SERVER_ASYNC_MODE != "threading":
+                print(f"[Web Server] {SERVER_ASYNC_MODE} 모드를 쓸 수 없어 개발용 Werkzeug 서버로 실행합니다. "
+                      "동시 접속이 많으면 pip install gevent gevent-websocket")
+            socketio.run(app, host=SERVER_HOST, port=SERVER_PORT, allow_unsafe_werkzeug=True)
+        else:
+            # gevent(pywsgi + WebSocket 핸들러) / eventlet(wsgi): 접속마다 greenlet 하나, 수백 개의 WebSocket 유지
+            socketio.run(app, host=SERVER_HOST, port=SERVER_PORT)
     except Exception as e:
         print(f"[Web Server] 서버 시작 오류: {e}")
     finally:
         mqtt_client.loop_stop()
+        if lan_receiver:
+            lan_receiver.stop()
 
 if __name__ == '__main__':
     run_server()
\ No newline at end of file
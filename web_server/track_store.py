@@ -0,0 +1,152 @@
+import math
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+EARTH_RADIUS_M = 6378137.0
+
+LatLon = Tuple[float, float]
+
+
+def douglas_peucker(xy: Sequence[Tuple[float, float]], tolerance: float) -> List[int]:
+    """Douglas-Peucker 단순화. 남길 점의 인덱스(처음/끝 포함, 오름차순)를 반환합니다 (재귀 대신 스택 사용)."""
+    n = len(xy)
+    if n <= 2:
+        return list(range(n))
+    keep = [False] * n
+    keep[0] = keep[-1] = True
+    tol2 = tolerance * tolerance
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        x0, y0 = xy[first]
+        dx, dy = xy[last][0] - x0, xy[last][1] - y0
+        seg2 = dx * dx + dy * dy
+        worst, worst_d2 = -1, tol2
+        for i in range(first + 1, last):
+            px, py = xy[i][0] - x0, xy[i][1] - y0
+            if seg2 > 0:
+                u = max(0.0, min(1.0, (px * dx + py * dy) / seg2))
+                ex, ey = px - u * dx, py - u * dy
+            else:
+                ex, ey = px, py
+            d2 = ex * ex + ey * ey
+            if d2 > worst_d2:
+                worst, worst_d2 = i, d2
+        if worst >= 0:
+            keep[worst] = True
+            stack.append((first, worst))
+            stack.append((worst, last))
+    return [i for i in range(n) if keep[i]]
+
+
+class TrackLevel:
+    """허용 오차 하나에 해당하는 단순화 궤적. 확정된 점(committed)과 아직 단순화하지 않은 꼬리(tail)로 나뉩니다."""
+
+    def __init__(self, tolerance: float):
+        self.base_tolerance = tolerance
+        self.tolerance = tolerance
+        self.points: List[LatLon] = []
+        self.xy: List[Tuple[float, float]] = []
+        self.seq = 0
+
+
+class TrackStore:
+    """
+    세션 궤적을 줌 단계별 허용 오차(m)로 단순화해 보관합니다.
+    새 측위는 꼬리 버퍼에 쌓였다가 flush_points개가 모이면 마지막 확정점부터 꼬리까지만 Douglas-Peucker로
+    단순화해 확정하고, 새로 확정된 점만 증분 세그먼트로 돌려줍니다. 한 단계의 점 수가 max_points를 넘으면
+    허용 오차를 두 배씩(최대 max_coarsen배) 올려 전체를 다시 단순화하고, 그래도 많으면(같은 코스를 여러 랩
+    돈 경우) 가장 오래된 점부터 버린 뒤 클라이언트가 다시 받아 가도록(reload) 합니다.
+    """
+
+    def __init__(self, tolerances_m: Sequence[float] = (1.0, 3.0, 10.0, 30.0),
+                 flush_points: int = 20, max_points: int = 5000, max_coarsen: float = 4.0):
+        self.tolerances_m = tuple(tolerances_m)
+        self.flush_points = max(3, flush_points)
+        self.max_points = max_points
+        self.max_coarsen = max_coarsen
+        self._lock = threading.Lock()
+        self.session = 0
+        self._origin: Optional[Tuple[float, float, float]] = None
+        self.reset()
+
+    def reset(self):
+        """새 세션 시작 (모든 단계의 궤적 삭제)."""
+        with self._lock:
+            self.session += 1
+            self._origin = None
+            self.levels = [TrackLevel(tol) for tol in self.tolerances_m]
+            self._tail: List[LatLon] = []
+            self._tail_xy: List[Tuple[float, float]] = []
+
+    def add(self, lat: float, lon: float) -> Dict[int, Dict[str, Any]]:
+        """
+        측위 하나를 추가합니다. 꼬리를 확정했으면 {단계: {"points": [...], "seq": n}} 또는
+        {단계: {"reload": True}}를 반환하고, 아니면 빈 dict를 반환합니다.
+        """
+        with self._lock:
+            if self._origin is None:
+                self._origin = (lat, lon, math.cos(math.radians(lat)))
+            xy = self._xy(lat, lon)
+            if not self._tail and not self.levels[0].points:
+                # 첫 점은 바로 확정
+                for level in self.levels:
+                    level.points.append((lat, lon))
+                    level.xy.append(xy)
+                    level.seq += 1
+                return {i: {"points": [[lat, lon]], "seq": level.seq} for i, level in enumerate(self.levels)}
+            self._tail.append((lat, lon))
+            self._tail_xy.append(xy)
+            if len(self._tail) < self.flush_points:
+                return {}
+            return self._flush_locked()
+
+    def _flush_locked(self) -> Dict[int, Dict[str, Any]]:
+        out: Dict[int, Dict[str, Any]] = {}
+        tail, tail_xy = self._tail, self._tail_xy
+        for i, level in enumerate(self.levels):
+            # 마지막 확정점 + 꼬리 전체를 단순화하고, 첫 점(이미 확정)을 제외한 나머지를 확정
+            pts = [level.points[-1]] + tail
+            xy = [level.xy[-1]] + tail_xy
+            keep = douglas_peucker(xy, level.tolerance)[1:]
+            new_pts = [pts[k] for k in keep]
+            level.points.extend(new_pts)
+            level.xy.extend(xy[k] for k in keep)
+            level.seq += 1
+            if len(level.points) > self.max_points:
+                self._coarsen(level)
+                out[i] = {"reload": True, "seq": level.seq}
+            else:
+                out[i] = {"points": [list(p) for p in new_pts], "seq": level.seq}
+        self._tail = []
+        self._tail_xy = []
+        return out
+
+    def _coarsen(self, level: TrackLevel):
+        target = self.max_points // 2
+        while len(level.points) > target and level.tolerance * 2 <= level.base_tolerance * self.max_coarsen:
+            level.tolerance *= 2
+            keep = douglas_peucker(level.xy, level.tolerance)
+            level.points = [level.points[k] for k in keep]
+            level.xy = [level.xy[k] for k in keep]
+        if len(level.points) > target:
+            del level.points[:-target]
+            del level.xy[:-target]
+
+    def snapshot(self, index: int) -> Dict[str, Any]:
+        """단계 하나의 확정 궤적 전체."""
+        with self._lock:
+            index = max(0, min(index, len(self.levels) - 1))
+            level = self.levels[index]
+            return {
+                "session": self.session,
+                "level": index,
+                "tolerance_m": level.tolerance,
+                "seq": level.seq,
+                "points": [list(p) for p in level.points],
+            }
+
+    def _xy(self, lat: float, lon: float) -> Tuple[float, float]:
+        lat0, lon0, coslat = self._origin
+        return (math.radians(lon - lon0) * EARTH_RADIUS_M * coslat,
+                math.radians(lat - lat0) * EARTH_RADIUS_M)
@@ -0,0 +1,88 @@
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# Pi의 DeltaFramer 가 델타로 보내는 그룹 (raspi/uplink_delta.py 의 DELTA_GROUPS 와 같게 유지)
+DELTA_GROUPS = ("can", "gps", "accel", "fusion")
+
+
+class UplinkState:
+    """
+    델타 업링크를 받아 전체 상태를 다시 만듭니다.
+    키프레임이면 그룹 상태를 통째로 교체하고, 델타면 바뀐 시그널만 덮어씁니다. 키프레임을 아직 못 받았거나
+    trace.seq 가 건너뛰었으면(델타 유실) need_keyframe 을 True 로 돌려 Pi에 키프레임을 요청하게 합니다.
+    "keyframe" 키가 없는 메시지(기존 전체 전송)는 그대로 통과합니다.
+    소스별 토픽은 토픽마다 하나씩 두고 groups 에 그 토픽이 싣는 그룹만 넘깁니다 (일련번호도 토픽별).
+    """
+
+    def __init__(self, groups: Iterable[str] = DELTA_GROUPS):
+        self.groups = tuple(groups)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._groups: Dict[str, Dict[str, Any]] = {g: {} for g in self.groups}
+            self._synced = False
+            self._last_seq: Optional[int] = None
+            self.stats = {"keyframes": 0, "deltas": 0, "gaps": 0}
+
+    def apply(self, data: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        """(전체 상태로 채운 메시지, 키프레임 필요 여부)"""
+        if "keyframe" not in data:
+            return data, False
+        with self._lock:
+            seq = (data.get("trace") or {}).get("seq")
+            gap = seq is not None and self._last_seq is not None and seq != self._last_seq + 1
+            if seq is not None:
+                self._last_seq = seq
+            if data["keyframe"]:
+                self.stats["keyframes"] += 1
+                self._synced = True
+                for group in self.groups:
+                    self._groups[group] = dict(data.get(group) or {})
+            else:
+                self.stats["deltas"] += 1
+                if gap:
+                    self.stats["gaps"] += 1
+                    self._synced = False
+                for group in self.groups:
+                    changed = data.get(group)
+                    if changed:
+                        self._groups[group].update(changed)
+            out = dict(data)
+            for group in self.groups:
+                out[group] = dict(self._groups[group])
+            return out, not self._synced
+
+
+class UplinkDedup:
+    """
+    같은 업링크가 MQTT와 LAN(UDP) 두 경로로 올 때 토픽별로 먼저 도착한 것만 통과시킵니다.
+    trace 의 (seq, pub)가 마지막으로 통과한 메시지보다 새로우면 통과하고, 같으면 중복, 둘 다 오래됐으면 늦게 온 메시지로
+    버립니다 (이미 더 새 델타를 적용했으므로). Pi가 재시작해 seq 가 1부터 다시 시작해도 pub 이 새로우면 통과합니다.
+    trace 가 없는 메시지(외부 HTTP 등)는 그대로 통과합니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last: Dict[str, Tuple[int, float]] = {}
+        self.stats: Dict[str, int] = {"duplicates": 0, "stale": 0}
+
+    def accept(self, source: str, data: Dict[str, Any], path: str) -> bool:
+        trace = data.get("trace") or {}
+        seq, pub = trace.get("seq"), trace.get("pub")
+        if seq is None or pub is None:
+            return True
+        with self._lock:
+            last = self._last.get(source)
+            if last is not None:
+                if (seq, pub) == last:
+                    self.stats["duplicates"] += 1
+                    return False
+                if seq <= last[0] and pub <= last[1]:
+                    self.stats["stale"] += 1
+                    return False
+            self._last[source] = (seq, pub)
+            key = f"first_{path}"  # 어느 경로가 먼저 도착했는지
+            self.stats[key] = self.stats.get(key, 0) + 1
+            return True